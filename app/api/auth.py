@@ -2,41 +2,52 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.schemas import user as user_schema
 from app.services import user_service
+from app.services.hashing import password_hasher
 from app.services import security as security_service
+from app.api import deps
 from app.api.deps import get_db
 from fastapi.security import OAuth2PasswordRequestForm
 
 router = APIRouter()
 
 @router.post("/register", response_model=user_schema.UserRead, status_code=201)
-def register_user(user: user_schema.UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: user_schema.UserCreate, db: Session = Depends(get_db)):
     """
     Endpoint para registrar un nuevo usuario.
     """
-    db_user = user_service.get_user_by_email(db, email=user.email)
+    db_user = await deps.run_db(db, user_service.get_user_by_email, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="El email/usuario ya está registrado")
 
-    new_user = user_service.create_user(db=db, user=user)
+    # bcrypt es costoso en CPU: se calcula en el pool de procesos de hashing
+    password_hash = await password_hasher.hash(user.password)
+    new_user = await deps.run_db(db, user_service.create_user, user=user, password_hash=password_hash)
     return new_user
 
 @router.post("/login", response_model=user_schema.Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), 
     db: Session = Depends(get_db)
 ):
     """
     Endpoint para iniciar sesión y obtener un token de acceso.
     """
-    user = user_service.get_user_by_email(db, email=form_data.username)
+    user = await deps.run_db(db, user_service.get_user_by_email, email=form_data.username)
 
-    if not user or not security_service.verify_password(form_data.password, user.password_hash):
+    verified, new_hash = (False, None)
+    if user:
+        verified, new_hash = await password_hasher.verify_and_update(form_data.password, user.password_hash)
+    if not verified:
         raise HTTPException(
             status_code=401,
             detail="Email o contraseña incorrectos",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # El hash tenía un costo distinto al configurado: se guarda el recalculado
+    if new_hash:
+        user = await deps.run_db(db, user_service.update_password_hash, user=user, password_hash=new_hash)
+
     access_token = security_service.create_access_token(
         data={"sub": user.email, "role": user.role}
     )
@@ -0,0 +1,46 @@
+import json
+from typing import TypeVar
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+
+Row = TypeVar("Row", bound=BaseModel)
+
+
+async def read_bulk_rows(
+    http_request: Request, model: type[Row], max_rows: int, noun: str
+) -> tuple[list[tuple[int, Row]], list[tuple[int, str]]]:
+    """
+    Lee el cuerpo de una carga masiva: un arreglo JSON o NDJSON (un objeto por línea).
+    Devuelve las filas válidas como (índice, modelo) y los errores de validación como
+    (índice, mensaje). Responde 400 si el cuerpo no tiene ninguna de esas formas y 413 si
+    supera max_rows filas.
+    """
+    body = await http_request.body()
+    try:
+        if http_request.headers.get("content-type", "").startswith("application/x-ndjson"):
+            raw_rows = [line for line in body.splitlines() if line.strip()]
+        else:
+            raw_rows = json.loads(body)
+            if not isinstance(raw_rows, list):
+                raise ValueError
+    except ValueError:
+        raise HTTPException(status_code=400, detail="El cuerpo debe ser un arreglo JSON o NDJSON.")
+
+    if len(raw_rows) > max_rows:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Se admiten como máximo {max_rows} {noun} por carga.",
+        )
+
+    rows = []
+    errors = []
+    for index, raw in enumerate(raw_rows):
+        try:
+            if isinstance(raw, bytes):
+                rows.append((index, model.model_validate_json(raw)))
+            else:
+                rows.append((index, model.model_validate(raw)))
+        except ValidationError as e:
+            errors.append((index, str(e.errors()[0]["msg"])))
+    return rows, errors
@@ -1,20 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
 import uuid
+from collections import Counter
 
 from app.api import deps
+from app.api.bulk import read_bulk_rows
+from app.api.responses import etag_matches, not_modified, paginated_response, set_cache_headers
+from app.config import settings
 from app.models import user as user_model
 from app.schemas import company as company_schema
 from app.services import company_service
+from app.services.pagination import InvalidCursorError, InvalidOrderError, TotalMode
 
 from app.schemas.common import PaginatedResponse
 from app.schemas.company import CompanyRead
 
 router = APIRouter()
 
+
+def company_etag(version: int) -> str:
+    return f'"{version}"'
+
+
 @router.post("/", response_model=company_schema.CompanyRead, status_code=201)
-def create_company(
+async def create_company(
     *,
     db: Session = Depends(deps.get_db),
     company_in: company_schema.CompanyCreate,
@@ -23,39 +33,87 @@ def create_company(
     """
     Endpoint para crear una nueva compañía. Solo para usuarios autenticados.
     """
-    company = company_service.get_company_by_name(db, name=company_in.name)
-    if company:
+    try:
+        new_company = await deps.run_db(db, company_service.create_company, company=company_in)
+    except company_service.CompanyNameConflictError:
         raise HTTPException(
             status_code=400,
             detail="Una compañía con este nombre ya existe, pruebe con otro nombre.",
         )
-
-    new_company = company_service.create_company(db=db, company=company_in)
     return new_company
 
 
-@router.get("/", response_model=PaginatedResponse[CompanyRead])
-def read_companies(
+@router.post(
+    "/bulk",
+    response_model=company_schema.CompanyBulkResponse,
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/CompanyCreate"}}},
+        "application/x-ndjson": {"schema": {"type": "string"}},
+    }}},
+)
+async def upsert_companies_bulk(
+    *,
     db: Session = Depends(deps.get_db),
+    http_request: Request,
+    current_user: user_model.User = Depends(deps.get_current_user)
+):
+    """
+    Endpoint para sincronizar compañías en masa: crea las que no existen y actualiza tax_id y
+    país de las existentes (por nombre). Acepta un arreglo JSON o NDJSON (una compañía por
+    línea) y devuelve el resultado de cada fila.
+    """
+    rows, errors = await read_bulk_rows(
+        http_request, company_schema.CompanyCreate, settings.COMPANY_BULK_MAX_ROWS, "compañías"
+    )
+    errors = [company_schema.CompanyBulkItemResult(index=index, error=error) for index, error in errors]
+
+    results = await deps.run_db(db, company_service.upsert_companies_bulk, rows=rows) if rows else []
+    results = sorted(results + errors, key=lambda result: result.index)
+
+    outcomes = Counter(result.outcome for result in results)
+    return company_schema.CompanyBulkResponse(
+        created=outcomes["created"],
+        updated=outcomes["updated"],
+        unchanged=outcomes["unchanged"],
+        failed=outcomes[None],
+        results=results,
+    )
+
+
+@router.get("/", response_model=PaginatedResponse[CompanyRead])
+async def read_companies(
+    http_request: Request,
+    db: Session = Depends(deps.get_read_db),
     page: int = 1,
     page_size: int = 10,
     q: str | None = None,
     order_by: str | None = None,
+    cursor: str | None = None,
+    total: TotalMode | None = None,
     current_user: user_model.User = Depends(deps.get_current_user)
 ):
+    """
+    Endpoint para listar compañías, paginando por número de página o por cursor (next_cursor).
+    q busca por nombre o prefijo de tax_id; con order_by=relevance se ordena por relevancia.
+    El parámetro total elige cómo se calcula el total: exact, estimate o none.
+    Responde 304 sin cuerpo si el If-None-Match coincide con el ETag de la página.
+    """
     skip = (page - 1) * page_size
-    companies, total = company_service.get_companies(db, skip=skip, limit=page_size, search=q, order_by=order_by)
+    try:
+        result = await deps.run_db(
+            db, company_service.get_companies,
+            skip=skip, limit=page_size, search=q, order_by=order_by, cursor=cursor, total_mode=total
+        )
+    except (InvalidCursorError, InvalidOrderError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    return PaginatedResponse(
-        total=total,
-        page=page,
-        page_size=page_size,
-        items=companies
-    )
+    if etag_matches(http_request, result.etag):
+        return not_modified(result.etag)
+    return paginated_response(result, page=page, page_size=page_size)
 
 
 @router.put("/{company_id}", response_model=company_schema.CompanyRead)
-def update_company_endpoint(
+async def update_company_endpoint(
     *,
     db: Session = Depends(deps.get_db),
     company_id: uuid.UUID,
@@ -65,19 +123,19 @@ def update_company_endpoint(
     """
     Endpoint para actualizar una compañía existente.
     """
-    company = company_service.get_company_by_id(db, company_id=company_id)
+    company = await deps.run_db(db, company_service.get_company_by_id, company_id=company_id)
     if not company:
         raise HTTPException(
             status_code=404,
             detail="La compañía con este ID no existe.",
         )
 
-    updated_company = company_service.update_company(db=db, company=company, company_in=company_in)
+    updated_company = await deps.run_db(db, company_service.update_company, company=company, company_in=company_in)
     return updated_company
 
 
 @router.delete("/{company_id}", status_code=204)
-def delete_company_endpoint(
+async def delete_company_endpoint(
     *,
     db: Session = Depends(deps.get_db),
     company_id: uuid.UUID,
@@ -86,31 +144,40 @@ def delete_company_endpoint(
     """
     Endpoint para eliminar una compañía.
     """
-    company = company_service.get_company_by_id(db, company_id=company_id)
+    company = await deps.run_db(db, company_service.get_company_by_id, company_id=company_id)
     if not company:
         raise HTTPException(
             status_code=404,
             detail="La compañía con este ID no existe.",
         )
 
-    company_service.delete_company(db=db, company=company)
+    await deps.run_db(db, company_service.delete_company, company=company)
     return None
 
 
 @router.get("/{company_id}", response_model=company_schema.CompanyRead)
-def read_single_company(
+async def read_single_company(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     company_id: uuid.UUID,
+    http_request: Request,
+    response: Response,
     current_user: user_model.User = Depends(deps.get_current_user)
 ):
     """
     Endpoint para obtener los detalles de una sola compañía por su ID.
+    Con If-None-Match se compara primero solo la versión de la fila y se responde 304 si no cambió.
     """
-    company = company_service.get_company_by_id(db, company_id=company_id)
+    if http_request.headers.get("if-none-match"):
+        version = await deps.run_db(db, company_service.get_company_version, company_id=company_id)
+        if version is not None and etag_matches(http_request, company_etag(version)):
+            return not_modified(company_etag(version))
+
+    company = await deps.run_db(db, company_service.get_company_by_id, company_id=company_id)
     if not company:
         raise HTTPException(
             status_code=404,
             detail="La compañía con este ID no existe.",
         )
-    return company
\ No newline at end of file
+    set_cache_headers(response, company_etag(company.version))
+    return company
@@ -1,28 +1,57 @@
+import secrets
+from typing import Any, Callable
+
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer, OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.db.db import SessionLocal
+from app.db import db as db_module, routing
 from app.models import user as user_model
-from app.services import user_service
+from app.services import security as security_service, user_service
 
 # Configuración del esquema OAuth2 para la autenticación
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+# Token fijo del scraper de métricas (METRICS_TOKEN), independiente de los usuarios
+metrics_scheme = HTTPBearer(auto_error=False)
 
-def get_db():
+async def get_db():
     """
     Crea una sesión de base de datos para una petición y se asegura de cerrarla siempre.
+    Con DB_ASYNC entrega una AsyncSession; si no, una Session síncrona.
     """
-    db = SessionLocal()
+    if settings.DB_ASYNC:
+        async with db_module.AsyncSessionLocal() as db:
+            yield db
+        return
+
+    # La sesión no toma una conexión del pool hasta la primera consulta, así que las peticiones
+    # que fallan antes (por ejemplo, un token inválido) no ocupan conexiones.
+    db = db_module.SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        if db.get_transaction() is None:
+            # Nunca se usó la base de datos: cerrar no hace I/O, no hace falta el threadpool
+            db.close()
+        else:
+            await run_in_threadpool(db.close)
+
+
+async def run_db(db: Session | AsyncSession, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Ejecuta una función de servicio sobre la sesión de la petición.
+    Con AsyncSession se usa run_sync: la función corre en el event loop sobre el driver async,
+    sin ocupar hilos. Con Session se ejecuta en el threadpool, como un handler síncrono.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> user_model.User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session | AsyncSession = Depends(get_db)) -> user_model.User:
     """
     Dependencia para obtener el usuario actual a partir de un token JWT.
     """
@@ -32,14 +61,74 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
+        payload = security_service.decode_access_token(token)
+    except security_service.InvalidTokenError:
+        raise credentials_exception
+    email: str = payload.get("sub")
+    if email is None:
         raise credentials_exception
 
-    user = user_service.get_user_by_email(db, email=email)
+    user = await run_db(db, user_service.get_cached_user_by_email, email=email)
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+    # Las escrituras de esta sesión abren la ventana de read-your-writes del usuario
+    db.info["principal"] = user.email
+    return user
+
+
+async def get_read_db(
+    db: Session | AsyncSession = Depends(get_db),
+    current_user: user_model.User = Depends(get_current_user)
+):
+    """
+    Sesión para endpoints de solo lectura: usa la réplica si está configurada, salvo que el
+    usuario haya escrito hace poco (read-your-writes), en cuyo caso sigue en la primaria.
+    """
+    if settings.DB_ASYNC:
+        replica_factory = db_module.AsyncReplicaSessionLocal
+    else:
+        replica_factory = db_module.ReplicaSessionLocal
+    if replica_factory is None or routing.wrote_recently(current_user.email):
+        yield db
+        return
+
+    if settings.DB_ASYNC:
+        async with replica_factory() as replica:
+            yield replica
+        return
+
+    replica = replica_factory()
+    try:
+        yield replica
+    finally:
+        if replica.get_transaction() is None:
+            replica.close()
+        else:
+            await run_in_threadpool(replica.close)
+
+
+async def get_current_admin(current_user: user_model.User = Depends(get_current_user)) -> user_model.User:
+    """
+    Dependencia que exige que el usuario actual tenga rol de administrador.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tiene permisos para acceder a este recurso",
+        )
+    return current_user
+
+
+async def verify_metrics_token(credentials: HTTPAuthorizationCredentials | None = Depends(metrics_scheme)) -> None:
+    """
+    Dependencia de /metrics: exige el token METRICS_TOKEN. Sin token configurado el endpoint
+    no se expone.
+    """
+    if settings.METRICS_TOKEN is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(credentials.credentials, settings.METRICS_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de métricas inválido",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -0,0 +1,91 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.db import db as db_module
+from app.db.pool import pool_status
+from app.models import user as user_model
+from app.schemas import job as job_schema
+from app.services import company_service, job_service, pagination, risk as risk_service, security as security_service, user_service
+from app.services.hashing import password_hasher
+from app.services.rules import RuleSetError
+
+router = APIRouter()
+
+
+@router.get("/cache")
+async def read_cache_stats(current_user: user_model.User = Depends(deps.get_current_admin)):
+    """
+    Endpoint interno (solo administradores) con las estadísticas de las cachés en memoria.
+    """
+    return {
+        "principals": user_service.principal_cache.stats(),
+        "tokens": security_service.token_cache.stats(),
+        "counts": pagination.count_cache.stats(),
+        "companies": company_service.company_cache.stats(),
+    }
+
+
+
+@router.get("/pool")
+async def read_pool_stats(current_user: user_model.User = Depends(deps.get_current_admin)):
+    """
+    Endpoint interno (solo administradores) con la utilización del pool de conexiones.
+    """
+    stats = {"sync": pool_status(db_module.engine.pool)}
+    if db_module.async_engine is not None:
+        stats["async"] = pool_status(db_module.async_engine.pool)
+    return stats
+
+
+
+@router.get("/hashing")
+async def read_hashing_stats(current_user: user_model.User = Depends(deps.get_current_admin)):
+    """
+    Endpoint interno (solo administradores) con la cola y los tiempos del pool de hashing de contraseñas.
+    """
+    return {
+        "workers": password_hasher.workers,
+        "max_concurrency": password_hasher.max_concurrency,
+        **password_hasher.metrics.snapshot(),
+    }
+
+
+
+@router.post("/ruleset/reload")
+async def reload_risk_ruleset(current_user: user_model.User = Depends(deps.get_current_admin)):
+    """
+    Endpoint interno (solo administradores) para recargar el conjunto de reglas de riesgo.
+    """
+    try:
+        ruleset = risk_service.reload_ruleset()
+    except RuleSetError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"version": ruleset.version, "rules": list(ruleset.rules)}
+
+
+
+@router.post("/rescore", response_model=job_schema.JobRead, status_code=202)
+async def start_rescore(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_in: job_schema.RescoreJobCreate | None = None,
+    current_user: user_model.User = Depends(deps.get_current_admin)
+):
+    """
+    Endpoint interno (solo administradores) que lanza el recálculo de todos los risk_score con
+    las reglas vigentes como trabajo en segundo plano; el avance se sigue en GET /jobs/{id}.
+    """
+    params = (job_in or job_schema.RescoreJobCreate()).model_dump()
+    return await deps.run_db(
+        db, job_service.enqueue_job, kind="rescore", params=params, created_by=current_user.id
+    )
+
+
+
+@router.get("/jobs")
+async def read_job_stats(current_user: user_model.User = Depends(deps.get_current_admin)):
+    """
+    Endpoint interno (solo administradores) con la ocupación del pool de trabajos de este proceso.
+    """
+    return job_service.job_runner.stats()
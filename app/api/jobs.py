@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+import uuid
+
+from app.api import deps
+from app.models import user as user_model
+from app.models.job import Job
+from app.schemas import job as job_schema
+from app.services import job_service
+
+router = APIRouter()
+
+
+async def get_visible_job(db: Session, job_id: uuid.UUID, current_user: user_model.User) -> Job:
+    # Cada usuario ve sus trabajos; los administradores, todos
+    job = await deps.run_db(db, job_service.get_job, job_id=job_id)
+    if job is None or (job.created_by != current_user.id and current_user.role != "admin"):
+        raise HTTPException(status_code=404, detail="El trabajo con este ID no existe.")
+    return job
+
+
+@router.get("/{job_id}", response_model=job_schema.JobRead)
+async def read_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_id: uuid.UUID,
+    current_user: user_model.User = Depends(deps.get_current_user)
+):
+    """
+    Endpoint para consultar el estado, el avance (processed de total) y el resultado de un trabajo.
+    """
+    return await get_visible_job(db, job_id, current_user)
+
+
+@router.post("/{job_id}/cancel", response_model=job_schema.JobRead, status_code=202)
+async def cancel_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_id: uuid.UUID,
+    current_user: user_model.User = Depends(deps.get_current_user)
+):
+    """
+    Endpoint para cancelar un trabajo. Si está en cola se cancela en el acto; si está en curso
+    se detiene en su siguiente reporte de avance (cancel_requested queda en true hasta entonces).
+    """
+    await get_visible_job(db, job_id, current_user)
+    job = await deps.run_db(db, job_service.cancel_job, job_id=job_id)
+    if job is None:
+        raise HTTPException(status_code=409, detail="El trabajo ya terminó.")
+    return job
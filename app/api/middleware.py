@@ -0,0 +1,58 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services import metrics
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Plantilla de la ruta que atendió la petición (/companies/{company_id}). Se reconstruye
+    desde la URL y los path_params, porque la ruta que deja el router en el scope no incluye
+    el prefijo de include_router. Las peticiones sin ruta se agrupan en una sola serie.
+    """
+    if "endpoint" not in scope:
+        return "sin_ruta"
+    names = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    if not names:
+        return scope["path"]
+    return "/".join(f"{{{names[segment]}}}" if segment in names else segment for segment in scope["path"].split("/"))
+
+
+class MetricsMiddleware:
+    """
+    Mide cada petición HTTP: latencia por ruta y estado, tiempo en la base de datos y número
+    de sentencias SQL (ver app/db/instrumentation.py). La ruta es la plantilla del endpoint
+    (/requests/{request_id}), no la URL, para que la cantidad de series sea acotada.
+    Es un middleware ASGI puro: no envuelve el cuerpo de la respuesta.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = metrics.RequestTiming()
+        token = metrics.current_timing.set(timing)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.current_timing.reset(token)
+            path = route_template(scope)
+            method = scope["method"]
+            metrics.request_duration.observe(elapsed, method, path, str(status))
+            metrics.request_db_duration.observe(timing.db_seconds, method, path)
+            metrics.request_statements.observe(timing.statements, method, path)
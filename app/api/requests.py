@@ -1,20 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 import uuid
 from app.api import deps
+from app.api.bulk import read_bulk_rows
+from app.api.responses import etag_matches, not_modified, paginated_response, set_cache_headers
+from app.config import settings
 from app.models import user as user_model
 from app.schemas import request as request_schema
 from app.schemas.common import PaginatedResponse
 from app.schemas.request import RequestRead
-from app.services import request_service, company_service
+from app.services import request_service, company_service, export_service, stats_service
 from app.models.enums import StatusRequestEnum
+from app.services.pagination import InvalidCursorError, InvalidOrderError, TotalMode
 
 router = APIRouter()
 
 
+def request_etag(version: int, company_version: int) -> str:
+    # La respuesta incluye la compañía, así que el ETag cambia si cambia cualquiera de las dos
+    return f'"{version}.{company_version}"'
+
+
 @router.post("/", response_model=request_schema.RequestRead, status_code=201)
-def create_request(
+async def create_request(
     *,
     db: Session = Depends(deps.get_db),
     request_in: request_schema.RequestCreate,
@@ -24,52 +35,159 @@ def create_request(
     Endpoint para crear una nueva solicitud de evaluación.
     """
     # Verificación: Asegurarse de que la compañía para la que se crea la solicitud existe.
-    company = company_service.get_company_by_id(db, company_id=request_in.company_id)
-    if not company:
+    if not await deps.run_db(db, company_service.company_exists, company_id=request_in.company_id):
         raise HTTPException(
             status_code=404,
             detail="La compañía especificada no existe.",
         )
 
-    new_request = request_service.create_request(db=db, request_in=request_in)
+    new_request = await deps.run_db(db, request_service.create_request, request_in=request_in)
     return new_request
 
 
-@router.get("/", response_model=PaginatedResponse[RequestRead])
-def read_requests(
+@router.post(
+    "/bulk",
+    response_model=request_schema.RequestBulkResponse,
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/RequestCreate"}}},
+        "application/x-ndjson": {"schema": {"type": "string"}},
+    }}},
+)
+async def create_requests_bulk(
+    *,
     db: Session = Depends(deps.get_db),
+    http_request: Request,
+    current_user: user_model.User = Depends(deps.get_current_user)
+):
+    """
+    Endpoint para crear muchas solicitudes de una vez.
+    Acepta un arreglo JSON o NDJSON (una solicitud por línea) y devuelve el resultado de cada fila.
+    """
+    rows, errors = await read_bulk_rows(
+        http_request, request_schema.RequestCreate, settings.BULK_MAX_ROWS, "solicitudes"
+    )
+    errors = [request_schema.RequestBulkItemResult(index=index, error=error) for index, error in errors]
+
+    results = await deps.run_db(db, request_service.create_requests_bulk, rows=rows) if rows else []
+    results = sorted(results + errors, key=lambda result: result.index)
+
+    failed = sum(1 for result in results if result.error)
+    return request_schema.RequestBulkResponse(created=len(results) - failed, failed=failed, results=results)
+
+
+@router.get("/", response_model=PaginatedResponse[RequestRead])
+async def read_requests(
+    http_request: Request,
+    db: Session = Depends(deps.get_read_db),
     page: int = 1,
     page_size: int = 10,
     q: str | None = None,
     status: StatusRequestEnum | None = None,
     risk_min: int | None = None,
     risk_max: int | None = None,
+    cursor: str | None = None,
+    total: TotalMode | None = None,
     current_user: user_model.User = Depends(deps.get_current_user)
 ):
     """
     Endpoint para listar solicitudes con paginación y filtros.
+    Acepta el next_cursor de una respuesta previa para paginar por keyset.
+    El parámetro total elige cómo se calcula el total: exact, estimate o none.
+    Responde 304 sin cuerpo si el If-None-Match coincide con el ETag de la página.
     """
     skip = (page - 1) * page_size
-    requests, total = request_service.get_requests(
-        db, 
-        skip=skip, 
-        limit=page_size, 
-        search=q, 
-        status=status,
-        risk_min=risk_min,
-        risk_max=risk_max
-    )
+    try:
+        result = await deps.run_db(
+            db,
+            request_service.get_requests,
+            skip=skip, 
+            limit=page_size, 
+            search=q, 
+            status=status,
+            risk_min=risk_min,
+            risk_max=risk_max,
+            cursor=cursor,
+            total_mode=total
+        )
+    except (InvalidCursorError, InvalidOrderError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if etag_matches(http_request, result.etag):
+        return not_modified(result.etag)
+    return paginated_response(result, page=page, page_size=page_size)
+
+
+@router.get("/stats", response_model=request_schema.RequestStatsRead)
+async def read_request_stats(
+    db: Session = Depends(deps.get_read_db),
+    company_id: uuid.UUID | None = None,
+    current_user: user_model.User = Depends(deps.get_current_user)
+):
+    """
+    Endpoint para el dashboard: totales por estado, histograma de risk_score y desglose por
+    compañía, leídos de la tabla de agregados precalculados.
+    """
+    return await deps.run_db(db, stats_service.get_stats, company_id=company_id)
+
 
-    return PaginatedResponse(
-        total=total,
-        page=page,
-        page_size=page_size,
-        items=requests
+@router.get("/export")
+async def export_requests(
+    db: Session = Depends(deps.get_read_db),
+    format: export_service.ExportFormat = export_service.ExportFormat.CSV,
+    q: str | None = None,
+    status: StatusRequestEnum | None = None,
+    risk_min: int | None = None,
+    risk_max: int | None = None,
+    current_user: user_model.User = Depends(deps.get_current_user)
+):
+    """
+    Endpoint para exportar todas las solicitudes (con su compañía) en CSV o NDJSON.
+    Acepta los mismos filtros que el listado. La respuesta se genera en streaming a medida
+    que se leen las filas, sin cargar el resultado completo en memoria.
+    """
+    filters = {"search": q, "status": status, "risk_min": risk_min, "risk_max": risk_max}
+    if isinstance(db, AsyncSession):
+        content = export_service.aiter_export(db, format, **filters)
+    else:
+        content = export_service.iter_export(db, format, **filters)
+
+    return StreamingResponse(
+        content,
+        media_type=export_service.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="requests.{format.value}"'},
     )
 
 
+@router.get("/{request_id}", response_model=request_schema.RequestRead)
+async def read_single_request(
+    *,
+    db: Session = Depends(deps.get_read_db),
+    request_id: uuid.UUID,
+    http_request: Request,
+    response: Response,
+    current_user: user_model.User = Depends(deps.get_current_user)
+):
+    """
+    Endpoint para obtener una solicitud (con su compañía) por su ID.
+    Con If-None-Match se comparan primero solo las versiones de las filas y se responde 304 si no cambiaron.
+    """
+    if http_request.headers.get("if-none-match"):
+        versions = await deps.run_db(db, request_service.get_request_version, request_id=request_id)
+        if versions is not None and etag_matches(http_request, request_etag(*versions)):
+            return not_modified(request_etag(*versions))
+
+    request = await deps.run_db(db, request_service.get_request_by_id, request_id=request_id)
+    if not request:
+        raise HTTPException(
+            status_code=404,
+            detail="La solicitud con este ID no existe.",
+        )
+    set_cache_headers(response, request_etag(request.version, request.company.version))
+    return request
+
+
 @router.put("/{request_id}", response_model=request_schema.RequestRead)
-def update_request_endpoint(
+async def update_request_endpoint(
     *,
     db: Session = Depends(deps.get_db),
     request_id: uuid.UUID,
@@ -79,19 +197,19 @@ def update_request_endpoint(
     """
     Endpoint para actualizar una solicitud existente.
     """
-    request = request_service.get_request_by_id(db, request_id=request_id)
+    request = await deps.run_db(db, request_service.get_request_by_id, request_id=request_id)
     if not request:
         raise HTTPException(
             status_code=404,
             detail="La solicitud con este ID no existe.",
         )
 
-    updated_request = request_service.update_request(db=db, request=request, request_in=request_in)
+    updated_request = await deps.run_db(db, request_service.update_request, request=request, request_in=request_in)
     return updated_request
 
 
 @router.delete("/{request_id}", status_code=204)
-def delete_request_endpoint(
+async def delete_request_endpoint(
     *,
     db: Session = Depends(deps.get_db),
     request_id: uuid.UUID,
@@ -100,12 +218,12 @@ def delete_request_endpoint(
     """
     Endpoint para eliminar una solicitud.
     """
-    request = request_service.get_request_by_id(db, request_id=request_id)
+    request = await deps.run_db(db, request_service.get_request_by_id, request_id=request_id)
     if not request:
         raise HTTPException(
             status_code=404,
             detail="La solicitud con este ID no existe.",
         )
 
-    request_service.delete_request(db=db, request=request)
+    await deps.run_db(db, request_service.delete_request, request=request)
     return None
\ No newline at end of file
@@ -0,0 +1,65 @@
+from typing import Any
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.services.pagination import Page
+
+# Las respuestas dependen del usuario autenticado y se revalidan siempre con el ETag
+CACHE_CONTROL = "private, no-cache"
+
+
+class FastJSONResponse(Response):
+    """
+    Respuesta JSON serializada directamente a bytes con orjson (UUID y datetime incluidos).
+    Se usa en los listados, cuyos ítems ya vienen como dicts desde los servicios y no
+    necesitan pasar por la validación del response_model.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def paginated_response(result: Page, page: int, page_size: int) -> FastJSONResponse:
+    """
+    Arma la respuesta de un listado con la misma forma (y orden de llaves) que PaginatedResponse.
+    """
+    response = FastJSONResponse({
+        "total": result.total,
+        "page": page,
+        "page_size": page_size,
+        "items": result.items,
+        "has_next": result.has_next,
+        "next_cursor": result.next_cursor,
+    })
+    if result.etag:
+        set_cache_headers(response, result.etag)
+    return response
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Indica si el ETag coincide con alguno de If-None-Match (comparación débil, como indica el RFC 9110).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def set_cache_headers(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Respuesta 304 sin cuerpo para un If-None-Match que coincide.
+    """
+    response = Response(status_code=304)
+    set_cache_headers(response, etag)
+    return response
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -8,9 +10,74 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     TEST_DATABASE_URL: str
 
+    # Modo async: AsyncSession + asyncpg. Si no se define ASYNC_DATABASE_URL se deriva de DATABASE_URL
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: str | None = None
+
+    # Réplica de lectura para los GET de listados y consultas (opcional). Tras una escritura,
+    # las lecturas del mismo usuario van a la primaria durante READ_YOUR_WRITES_SECONDS
+    REPLICA_DATABASE_URL: str | None = None
+    READ_YOUR_WRITES_SECONDS: int = 5
+    READ_YOUR_WRITES_MAXSIZE: int = 10000
+
+    # Pool de conexiones (no aplica a SQLite en memoria)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int | None = None
+
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Librería JWT: "jose" (python-jose) o "pyjwt" (PyJWT, opcional: pip install pyjwt).
+    # En las mediciones sin caché PyJWT resultó algo más lenta; lo que más pesa es la caché de tokens
+    JWT_BACKEND: Literal["jose", "pyjwt"] = "jose"
+    # Tokens ya verificados en memoria (0 desactiva la caché)
+    TOKEN_CACHE_MAXSIZE: int = 4096
+
+    # Hash de contraseñas: costo de bcrypt y pool de procesos dedicado (0 workers = threadpool)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 4
+
+    # Caché de usuarios autenticados (get_current_user)
+    AUTH_CACHE_MAXSIZE: int = 1024
+    AUTH_CACHE_TTL_SECONDS: int = 60
+
+    # Caché compartida de búsquedas puntuales de compañías: "memory" (por proceso) o "redis"
+    CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    REDIS_URL: str | None = None
+    COMPANY_CACHE_MAXSIZE: int = 10000
+    COMPANY_CACHE_TTL_SECONDS: int = 300
+    COMPANY_CACHE_NEGATIVE_TTL_SECONDS: int = 30
+
+    # Caché de conteos aproximados (total=estimate) por combinación de filtros
+    COUNT_CACHE_MAXSIZE: int = 512
+    COUNT_CACHE_TTL_SECONDS: int = 30
+
+    # Reglas de riesgo: archivo JSON (relativo a la raíz del proyecto) y cada cuánto revisar si cambió
+    RISK_RULESET_PATH: str = "app/rules/risk_ruleset.json"
+    RISK_RULESET_RELOAD_SECONDS: int = 5
+
+    # Carga masiva de solicitudes (POST /requests/bulk)
+    BULK_MAX_ROWS: int = 50000
+    BULK_INSERT_CHUNK_SIZE: int = 1000
+    # Sincronización masiva de compañías (POST /companies/bulk), en bloques de BULK_INSERT_CHUNK_SIZE
+    COMPANY_BULK_MAX_ROWS: int = 100000
+
+    # Trabajos en segundo plano (recálculo de scores): hilos del pool de cada proceso
+    JOB_WORKERS: int = 2
+    # Al arrancar, un trabajo en curso sin reportar avance hace más de esto se da por interrumpido
+    # (debe superar el tiempo entre reportes de cualquier trabajo). None desactiva la recuperación
+    JOB_STALE_SECONDS: int | None = 900
+
+    # Instrumentación: métricas por ruta en /metrics y log de sentencias SQL lentas (None lo desactiva)
+    METRICS_ENABLED: bool = True
+    # Token que el scraper envía como "Authorization: Bearer ..." (sin token, /metrics no se expone)
+    METRICS_TOKEN: str | None = None
+    SLOW_QUERY_MS: int | None = 200
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -1,4 +1,6 @@
 from app.db.base_class import Base
 from app.models.user import User
 from app.models.company import Company
-from app.models.request import Request
\ No newline at end of file
+from app.models.request import Request
+from app.models.request_stats import RequestStat
+from app.models.job import Job
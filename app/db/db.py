@@ -1,11 +1,76 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from ..config import settings
+from .pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """
+    Opciones de create_engine según la configuración del pool en Settings.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # SQLite en memoria usa un pool propio de una sola conexión
+        return {}
+
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+    if settings.DB_STATEMENT_TIMEOUT_MS and parsed.get_backend_name() == "postgresql":
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+
+    return options
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Motor async (asyncpg), solo se crea si DB_ASYNC está activo
+ASYNC_SQLALCHEMY_DATABASE_URL = settings.ASYNC_DATABASE_URL or SQLALCHEMY_DATABASE_URL.replace("+psycopg2", "+asyncpg")
+
+async_engine = (
+    create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, **engine_options(ASYNC_SQLALCHEMY_DATABASE_URL, is_async=True))
+    if settings.DB_ASYNC else None
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False) if settings.DB_ASYNC else None
+
+
+# Réplica de lectura (opcional): mismos parámetros de pool que la primaria
+replica_engine = (
+    create_engine(settings.REPLICA_DATABASE_URL, **engine_options(settings.REPLICA_DATABASE_URL))
+    if settings.REPLICA_DATABASE_URL else None
+)
+
+ReplicaSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) if replica_engine is not None else None
+)
+
+ASYNC_REPLICA_DATABASE_URL = (
+    settings.REPLICA_DATABASE_URL.replace("+psycopg2", "+asyncpg") if settings.REPLICA_DATABASE_URL else None
+)
+
+async_replica_engine = (
+    create_async_engine(ASYNC_REPLICA_DATABASE_URL, **engine_options(ASYNC_REPLICA_DATABASE_URL, is_async=True))
+    if settings.DB_ASYNC and ASYNC_REPLICA_DATABASE_URL else None
+)
+
+AsyncReplicaSessionLocal = (
+    async_sessionmaker(async_replica_engine, autoflush=False) if async_replica_engine is not None else None
+)
@@ -0,0 +1,24 @@
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def dialect_insert(db: Session):
+    """
+    Devuelve la función insert() del dialecto de la sesión, que soporta ON CONFLICT
+    (on_conflict_do_update / on_conflict_do_nothing) tanto en Postgres como en SQLite.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
+def lock_transaction(db: Session, key: str) -> None:
+    """
+    Serializa entre procesos las transacciones que usan la misma clave: en Postgres toma un
+    advisory lock que se libera con el commit o el rollback. En SQLite no hace falta, porque
+    las escrituras ya se ejecutan de a una.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(func.hashtext(key))))
+
@@ -0,0 +1,54 @@
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.services import metrics
+
+# Sentencias que superan SLOW_QUERY_MS, con los tipos de sus parámetros
+slow_query_logger = logging.getLogger("app.db.slow_query")
+
+
+def describe_parameters(parameters, executemany: bool) -> str:
+    """
+    Cantidad y tipos de los parámetros de una sentencia, sin sus valores: el log no debe
+    guardar hashes de contraseñas, correos ni otros datos de las filas. En las cargas masivas
+    (executemany) se describe la primera fila.
+    """
+    rows = parameters if executemany else [parameters]
+    if not rows:
+        return "ninguno"
+    first = rows[0]
+    values = first.values() if isinstance(first, dict) else first
+    types = ", ".join(type(value).__name__ for value in values)
+    description = f"{len(values)} ({types})"
+    return f"{len(rows)} filas de {description}" if executemany else description
+
+
+# Se registran sobre la clase Engine para cubrir todos los motores (primaria, réplica, los
+# sync_engine de los motores async y los de los tests)
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    metrics.record_statement(elapsed)
+    if settings.SLOW_QUERY_MS is not None and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        metrics.slow_queries.inc()
+        slow_query_logger.warning(
+            "Consulta lenta (%.1f ms): %s | parámetros: %s",
+            elapsed * 1000, statement, describe_parameters(parameters, executemany),
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_timer(exception_context):
+    # Si la sentencia falla no hay after_cursor_execute: se descarta su marca de inicio
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
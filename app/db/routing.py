@@ -0,0 +1,39 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.services.cache import TTLCache
+
+# Usuarios que escribieron en la primaria hace menos de READ_YOUR_WRITES_SECONDS.
+# Sus lecturas siguen yendo a la primaria para no ver datos atrasados de la réplica.
+# Es un registro por proceso: con varios workers cada uno conoce solo sus propias escrituras.
+recent_writers = TTLCache(maxsize=settings.READ_YOUR_WRITES_MAXSIZE, ttl=settings.READ_YOUR_WRITES_SECONDS)
+
+
+def wrote_recently(principal: str) -> bool:
+    return recent_writers.get(principal) is not None
+
+
+@event.listens_for(Session, "after_flush")
+def _flag_flush(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _flag_dml(orm_execute_state):
+    # INSERT/UPDATE/DELETE masivos ejecutados con session.execute (no pasan por el flush)
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _record_write(session):
+    # session.info["principal"] lo fija get_current_user en la sesión de la petición
+    principal = session.info.get("principal")
+    if session.info.pop("wrote", False) and principal:
+        recent_writers.set(principal, True)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_write_flag(session):
+    session.info.pop("wrote", None)
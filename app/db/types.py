@@ -0,0 +1,11 @@
+from sqlalchemy import DateTime
+from sqlalchemy.dialects import sqlite
+
+# En SQLite, server_default=func.now() guarda 'YYYY-MM-DD HH:MM:SS' sin microsegundos,
+# mientras que SQLAlchemy enlaza los parámetros como 'YYYY-MM-DD HH:MM:SS.ffffff'.
+# Como SQLite compara fechas como texto, se usa el mismo formato en ambos lados para que
+# las comparaciones (por ejemplo, los cursores de paginación) sean exactas.
+Timestamp = DateTime().with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
@@ -0,0 +1,14 @@
+from sqlalchemy.orm import Session
+
+
+def commit_detached(db: Session, *instances) -> None:
+    """
+    Hace commit conservando los valores ya cargados de las instancias (típicamente leídos con
+    INSERT/UPDATE ... RETURNING). El commit expira todo lo que está en la sesión y leer un
+    atributo después costaría otro SELECT; por eso las instancias se desligan antes, como las
+    del caché de usuarios autenticados.
+    """
+    for instance in instances:
+        if instance is not None and instance in db:
+            db.expunge(instance)
+    db.commit()
@@ -1,8 +1,30 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import auth, companies, requests
+from app.api import auth, companies, requests, internal, jobs
+from app.api.deps import verify_metrics_token
+from app.api.middleware import MetricsMiddleware
+from app.config import settings
+from app.db import instrumentation  # noqa: F401 (registra los eventos de SQLAlchemy)
+from app.services import metrics
+from app.services.job_service import job_runner
+from app.services.hashing import password_hasher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Se retoman los trabajos que dejó un proceso anterior detenido sin apagarse en orden
+    if settings.JOB_STALE_SECONDS is not None:
+        await run_in_threadpool(job_runner.recover, settings.JOB_STALE_SECONDS)
+    yield
+    # Se detienen los procesos de hashing de contraseñas y el pool de trabajos al apagar la aplicación
+    password_hasher.shutdown()
+    job_runner.shutdown()
 
-app = FastAPI(title="API de Evaluación de Proveedores")
+
+app = FastAPI(title="API de Evaluación de Proveedores", lifespan=lifespan)
 
 origins = [
     "http://localhost:5173", # Dirección Frontend
@@ -17,10 +39,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(companies.router, prefix="/companies", tags=["Companies"])
 app.include_router(requests.router, prefix="/requests", tags=["Requests"])
+app.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
+app.include_router(internal.router, prefix="/internal", tags=["Internal"])
 
 
 @app.get("/")
@@ -28,4 +55,13 @@ def read_root():
     """
     Endpoint de bienvenida para verificar que la API está funcionando.
     """
-    return {"mensaje": "¡Bienvenido a la API de Evaluación de Proveedores!"}
\ No newline at end of file
+    return {"mensaje": "¡Bienvenido a la API de Evaluación de Proveedores!"}
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(verify_metrics_token)])
+def read_metrics():
+    """
+    Métricas de la API en el formato de texto de Prometheus, para que las recoja el scraper
+    (con el token METRICS_TOKEN).
+    """
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
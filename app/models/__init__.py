@@ -1,3 +1,5 @@
 from .company import Company
 from .request import Request
-from .user import User
\ No newline at end of file
+from .user import User
+from .request_stats import RequestStat
+from .job import Job
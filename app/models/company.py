@@ -1,18 +1,73 @@
 import uuid
-from sqlalchemy import String, func, DateTime
+from sqlalchemy import DDL, Integer, String, func, DateTime, Index, event, literal_column, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from app.db.base_class import Base
+from app.db.types import Timestamp
 
 class Company(Base):
     __tablename__ = "companies"
+    __table_args__ = (
+        # Índice parcial: solo compañías activas (sin soft delete)
+        Index(
+            "ix_companies_active_name_id", "name", "id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        # Búsqueda por similitud (ilike '%q%') con pg_trgm; en SQLite queda como índice simple
+        Index(
+            "ix_companies_name_trgm", "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        # Búsqueda por prefijo de tax_id (LIKE 'q%') independiente del collation
+        Index("ix_companies_tax_id_prefix", "tax_id", postgresql_ops={"tax_id": "text_pattern_ops"}),
+        # Orden del listado por open_requests (ver también ix_companies_active_max_risk_score)
+        Index(
+            "ix_companies_active_open_requests", "open_requests", "id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     name: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
     tax_id: Mapped[str | None] = mapped_column(String(50)) # Union[str, None]
     country: Mapped[str] = mapped_column(String(2), default="CL", nullable=False)
-    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(Timestamp, server_default=func.now())
 
     deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True)) # Para soft delete
+    # Se incrementa en cada UPDATE (ORM o masivo); es la base de los ETag
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version") + 1
+    )
 
-    requests: Mapped[list["Request"]] = relationship(back_populates="company")
\ No newline at end of file
+    # Resúmenes de sus solicitudes, mantenidos por request_service (ver rollup_service)
+    latest_risk_score: Mapped[int | None] = mapped_column(Integer)
+    max_risk_score: Mapped[int | None] = mapped_column(Integer)
+    open_requests: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+    requests: Mapped[list["Request"]] = relationship(back_populates="company")
+
+
+# Orden del listado por -max_risk_score. El listado deja los NULL (compañías sin solicitudes)
+# al final, y para que Postgres recorra el índice en ese orden debe declararse DESC NULLS LAST,
+# algo que SQLite no admite en un índice.
+Index(
+    "ix_companies_active_max_risk_score",
+    Company.max_risk_score.desc().nulls_last(),
+    Company.id.desc(),
+    postgresql_where=text("deleted_at IS NULL"),
+).ddl_if(dialect="postgresql")
+
+
+# Índice de texto completo sobre nombre + tax_id. Es un índice de expresión propio de Postgres,
+# así que se crea solo en ese motor; la expresión es la de search.company_tsvector().
+event.listen(
+    Company.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_companies_search_tsv ON companies "
+        "USING gin (to_tsvector('simple', name || ' ' || coalesce(tax_id, '')))"
+    ).execute_if(dialect="postgresql"),
+)
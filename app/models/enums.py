@@ -4,4 +4,11 @@ class StatusRequestEnum(str, enum.Enum):
     PENDING = "pending"
     IN_REVIEW = "in_review"
     APPROVED = "approved"
-    REJECTED = "rejected"
\ No newline at end of file
+    REJECTED = "rejected"
+
+class JobStatusEnum(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
@@ -0,0 +1,40 @@
+import uuid
+import sqlalchemy as sa
+from sqlalchemy import JSON, Boolean, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.db.base_class import Base
+from app.db.types import Timestamp
+from app.models.enums import JobStatusEnum
+
+
+class Job(Base):
+    """
+    Trabajo en segundo plano (ver job_service): su estado, avance y resultado quedan en la tabla
+    para consultarlos con GET /jobs/{id} desde cualquier proceso.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Trabajos en curso de un tipo: execute_job los cuenta para el límite de concurrencia entre procesos
+        Index("ix_jobs_kind_status", "kind", "status"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    status: Mapped[JobStatusEnum] = mapped_column(
+        sa.Enum(JobStatusEnum, name="jobstatusenum"), default=JobStatusEnum.QUEUED, nullable=False
+    )
+    params: Mapped[dict | None] = mapped_column(JSON)
+    # Avance: unidades procesadas sobre el total (None si el trabajo no lo conoce)
+    processed: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    total: Mapped[int | None] = mapped_column(Integer)
+    result: Mapped[dict | None] = mapped_column(JSON)
+    error: Mapped[str | None] = mapped_column(Text)
+    # Lo pide POST /jobs/{id}/cancel; el trabajo lo ve en su siguiente reporte de avance
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=sa.false())
+    created_by: Mapped[uuid.UUID | None] = mapped_column(ForeignKey("users.id"))
+    created_at: Mapped[datetime] = mapped_column(Timestamp, server_default=func.now())
+    started_at: Mapped[datetime | None] = mapped_column(Timestamp)
+    # Último reporte de avance: si no se mueve, el proceso que lo ejecutaba pudo haberse detenido
+    updated_at: Mapped[datetime | None] = mapped_column(Timestamp)
+    finished_at: Mapped[datetime | None] = mapped_column(Timestamp)
@@ -1,9 +1,10 @@
 import uuid
 import sqlalchemy as sa
-from sqlalchemy import String, Integer, JSON, ForeignKey, func
+from sqlalchemy import String, Integer, JSON, ForeignKey, Index, func, literal_column
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from app.db.base_class import Base
+from app.db.types import Timestamp
 from app.models.enums import StatusRequestEnum as StatusEnum
 
 # Evita problemas de importación circular
@@ -13,13 +14,26 @@ if TYPE_CHECKING:
 
 class Request(Base):
     __tablename__ = "requests"
+    # Índices para los filtros y el orden (created_at, id) del listado de solicitudes
+    __table_args__ = (
+        # Solicitudes de una compañía en orden; también sirve para la última (ver rollup_service)
+        Index("ix_requests_company_id_created_at", "company_id", "created_at", "id"),
+        Index("ix_requests_created_at_id", "created_at", "id"),
+        Index("ix_requests_status_created_at", "status", "created_at", "id"),
+        Index("ix_requests_risk_score_created_at", "risk_score", "created_at"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     company_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("companies.id"))
     status: Mapped[StatusEnum] = mapped_column(sa.Enum(StatusEnum, name="statusenum"), default=StatusEnum.PENDING, nullable=False)
     risk_inputs: Mapped[dict | None] = mapped_column(JSON)
     risk_score: Mapped[int | None] = mapped_column(Integer)
-    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
+    ruleset_version: Mapped[str | None] = mapped_column(String(50)) # Versión de las reglas que calcularon el risk_score
+    created_at: Mapped[datetime] = mapped_column(Timestamp, server_default=func.now())
+    # Se incrementa en cada UPDATE (ORM o masivo); es la base de los ETag
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version") + 1
+    )
 
     # Esta relación le permite a SQLAlchemy acceder al objeto 'Company' completo desde una 'Request'
     company: Mapped["Company"] = relationship(back_populates="requests")
\ No newline at end of file
@@ -0,0 +1,16 @@
+import uuid
+from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+class RequestStat(Base):
+    """
+    Conteo de solicitudes por compañía, estado y tramo de risk_score.
+    Se mantiene incrementalmente desde request_service para no recorrer la tabla requests.
+    """
+    __tablename__ = "request_stats"
+
+    company_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("companies.id"), primary_key=True)
+    status: Mapped[str] = mapped_column(String(20), primary_key=True)
+    risk_bucket: Mapped[int] = mapped_column(Integer, primary_key=True) # Límite inferior del tramo; -1 si no hay score
+    count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -4,7 +4,9 @@ from typing import List, TypeVar, Generic
 T = TypeVar('T')
 
 class PaginatedResponse(BaseModel, Generic[T]):
-    total: int
+    total: int | None
     page: int
     page_size: int
-    items: List[T]
\ No newline at end of file
+    items: List[T]
+    has_next: bool = False
+    next_cursor: str | None = None
\ No newline at end of file
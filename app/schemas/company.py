@@ -16,5 +16,23 @@ class CompanyUpdate(CompanyBase):
 class CompanyRead(CompanyBase):
     id: uuid.UUID
     created_at: datetime
+    # Resúmenes de riesgo de sus solicitudes
+    latest_risk_score: int | None = None
+    max_risk_score: int | None = None
+    open_requests: int | None = None
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class CompanyBulkItemResult(BaseModel):
+    index: int
+    id: uuid.UUID | None = None
+    # created, updated o unchanged (sin error)
+    outcome: str | None = None
+    error: str | None = None
+
+class CompanyBulkResponse(BaseModel):
+    created: int
+    updated: int
+    unchanged: int
+    failed: int
+    results: list[CompanyBulkItemResult]
@@ -0,0 +1,22 @@
+import uuid
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+
+class JobRead(BaseModel):
+    id: uuid.UUID
+    kind: str
+    status: str
+    processed: int
+    total: int | None = None
+    result: dict | None = None
+    error: str | None = None
+    cancel_requested: bool
+    created_at: datetime
+    started_at: datetime | None = None
+    updated_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class RescoreJobCreate(BaseModel):
+    chunk_size: int = Field(5000, ge=100, le=50000)
@@ -23,7 +23,35 @@ class RequestRead(BaseModel):
     status: str
     risk_inputs: RiskInputsSchema | None
     risk_score: int | None
+    ruleset_version: str | None = None
     created_at: datetime
     company: CompanyRead
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class RequestBulkItemResult(BaseModel):
+    index: int
+    id: uuid.UUID | None = None
+    risk_score: int | None = None
+    error: str | None = None
+
+class RequestBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: list[RequestBulkItemResult]
+
+class RiskBucketCount(BaseModel):
+    min: int | None
+    max: int | None
+    count: int
+
+class CompanyRequestStats(BaseModel):
+    company_id: uuid.UUID
+    total: int
+    by_status: dict[str, int]
+
+class RequestStatsRead(BaseModel):
+    total: int
+    by_status: dict[str, int]
+    by_risk_bucket: list[RiskBucketCount]
+    by_company: list[CompanyRequestStats]
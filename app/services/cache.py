@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from app.config import settings
+
+try:
+    import redis
+except ImportError:  # redis es opcional: solo se necesita con un backend "redis"
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Caché en memoria acotada (LRU) con expiración por tiempo y contadores de aciertos/fallos.
+    Es segura para usarse desde el threadpool de Starlette.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        """
+        Devuelve el valor asociado a la llave, o None si no existe o ya expiró.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """
+        Guarda un valor. Si se supera maxsize se descarta la entrada usada hace más tiempo.
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class MemoryCacheBackend:
+    """
+    Backend de caché compartida en memoria del proceso (un TTLCache con llaves de texto).
+    Cada worker tiene su propia copia: las invalidaciones no cruzan procesos.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: str) -> str | None:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.invalidate(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class RedisCacheBackend:
+    """
+    Backend de caché en Redis (o compatible), compartido entre procesos. Las llaves llevan un
+    prefijo por caché. Si Redis no responde, se registra el error y se sigue como un fallo de
+    caché, de modo que la petición termina consultando la base de datos.
+    """
+
+    def __init__(self, client, prefix: str, ttl: float):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key: str) -> str | None:
+        try:
+            value = self.client.get(self._key(key))
+        except redis.RedisError:
+            self.errors += 1
+            logger.warning("Caché %s: Redis no disponible en get", self.prefix, exc_info=True)
+            return None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value.decode() if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        try:
+            self.client.set(self._key(key), value, px=int((self.ttl if ttl is None else ttl) * 1000))
+        except redis.RedisError:
+            self.errors += 1
+            logger.warning("Caché %s: Redis no disponible en set", self.prefix, exc_info=True)
+
+    def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        try:
+            self.client.delete(*(self._key(key) for key in keys))
+        except redis.RedisError:
+            self.errors += 1
+            logger.warning("Caché %s: Redis no disponible en delete", self.prefix, exc_info=True)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}:*"))
+        if keys:
+            self.client.delete(*keys)
+        self.hits = self.misses = self.errors = 0
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "ttl": self.ttl, "hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+def build_cache_backend(prefix: str, maxsize: int, ttl: float) -> MemoryCacheBackend | RedisCacheBackend:
+    """
+    Crea el backend configurado en CACHE_BACKEND ("memory" o "redis", con REDIS_URL).
+    """
+    if settings.CACHE_BACKEND == "redis":
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requiere instalar el paquete redis.")
+        if not settings.REDIS_URL:
+            raise RuntimeError("CACHE_BACKEND=redis requiere definir REDIS_URL.")
+        return RedisCacheBackend(redis.Redis.from_url(settings.REDIS_URL), prefix=prefix, ttl=ttl)
+    return MemoryCacheBackend(maxsize=maxsize, ttl=ttl)
@@ -1,28 +1,146 @@
 import uuid
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import Query, Session
 from app.models import company as company_model
 from app.schemas import company as company_schema
+from app.config import settings
+from app.db.dialect import dialect_insert
+from app.db.writes import commit_detached
+from app.services import pagination, search as search_service
+from app.services.cache import build_cache_backend
 from datetime import datetime, timezone
 
+# Caché de existencia de compañías activas (por id y por nombre). Guarda "1" o "0": los
+# fallos también se cachean (con un TTL más corto) para que las comprobaciones repetidas
+# no lleguen a la base de datos.
+company_cache = build_cache_backend(
+    "companies", maxsize=settings.COMPANY_CACHE_MAXSIZE, ttl=settings.COMPANY_CACHE_TTL_SECONDS
+)
 
-def get_companies(db: Session, skip: int = 0, limit: int = 10, search: str | None = None, order_by: str | None = None) -> tuple[list[company_model.Company], int]:
+
+class CompanyNameConflictError(ValueError):
+    """
+    Ya existe una compañía con ese nombre (activa o con soft delete: el nombre es único en la tabla).
+    """
+
+
+# Columnas no nulas sobre las que se puede paginar por cursor
+CURSOR_ORDER_FIELDS = {"name", "country", "created_at", "open_requests", "id"}
+
+# Orden por relevancia de la búsqueda (solo con q, paginación por página)
+RELEVANCE_ORDER = "relevance"
+
+
+# Columnas del listado: lo que se devuelve en CompanyRead, más la versión para el ETag
+LIST_COLUMNS = (
+    company_model.Company.name,
+    company_model.Company.tax_id,
+    company_model.Company.country,
+    company_model.Company.id,
+    company_model.Company.created_at,
+    company_model.Company.latest_risk_score,
+    company_model.Company.max_risk_score,
+    company_model.Company.open_requests,
+    company_model.Company.version,
+)
+
+
+def company_row(row) -> dict:
+    """
+    Convierte una fila de LIST_COLUMNS en un dict con la misma forma que CompanyRead.
+    """
+    return {
+        "name": row.name,
+        "tax_id": row.tax_id,
+        "country": row.country,
+        "id": row.id,
+        "created_at": row.created_at,
+        "latest_risk_score": row.latest_risk_score,
+        "max_risk_score": row.max_risk_score,
+        "open_requests": row.open_requests,
+    }
+
+
+def _nulls_last(column, ordering):
+    # Las compañías sin solicitudes (resúmenes en NULL) quedan al final en ambos sentidos
+    return ordering.nulls_last() if column.nullable else ordering
+
+
+def get_companies(
+    db: Session,
+    skip: int = 0,
+    limit: int = 10,
+    search: str | None = None,
+    order_by: str | None = None,
+    cursor: str | None = None,
+    total_mode: pagination.TotalMode | None = None
+) -> pagination.Page[dict]:
+    """
+    Obtiene una lista paginada de compañías activas, con búsqueda por nombre o prefijo de tax_id.
+    Con order_by=relevance se ordena por relevancia de la búsqueda; también se puede ordenar
+    por los resúmenes de riesgo (latest_risk_score, max_risk_score, open_requests).
+    Si se entrega un cursor se pagina por keyset sobre (columna de order_by, id) y se ignora skip.
+    Por defecto el total es exacto en la paginación por página y se omite al paginar por cursor.
+    Los ítems son dicts con la forma de CompanyRead, leídos como filas Core (ver company_row).
+    """
     query = db.query(company_model.Company).filter(company_model.Company.deleted_at.is_(None))
 
     if search:
-        query = query.filter(company_model.Company.name.ilike(f"%{search}%"))
+        query = query.filter(search_service.company_search_filter(db, search))
+
+    order_by = order_by or "id"
+    descending = order_by.startswith("-")
+    field = order_by[1:] if descending else order_by
+    id_column = company_model.Company.id
+    if field == RELEVANCE_ORDER:
+        if not search or descending:
+            raise pagination.InvalidOrderError("El orden 'relevance' requiere un término de búsqueda (q) y no admite '-'.")
+        column = None
+    elif field in company_model.Company.__table__.columns.keys():
+        column = getattr(company_model.Company, field)
+    else:
+        raise pagination.InvalidOrderError(f"No se puede ordenar por '{field}'.")
+
+    if total_mode is None:
+        total_mode = pagination.TotalMode.NONE if cursor else pagination.TotalMode.EXACT
+    total = pagination.count_total(db, query, total_mode, cache_key=("companies", search))
+
+    if column is None:
+        # Más relevantes primero; a igual relevancia, por nombre
+        rank = search_service.company_search_rank(db, search)
+        query = query.order_by(rank.desc(), company_model.Company.name.asc(), id_column.asc())
+    elif descending:
+        query = query.order_by(_nulls_last(column, column.desc()), id_column.desc())
+    else:
+        query = query.order_by(_nulls_last(column, column.asc()), id_column.asc())
 
-    if order_by:
-        if order_by.startswith("-"):
-            field = order_by[1:]
-            query = query.order_by(getattr(company_model.Company, field).desc())
-        else:
-            query = query.order_by(getattr(company_model.Company, order_by).asc())
+    order_key = f"-{field}" if descending else field
+    if cursor:
+        if field not in CURSOR_ORDER_FIELDS:
+            raise pagination.InvalidCursorError(f"El orden '{field}' no admite paginación por cursor.")
+        value, last_id = pagination.decode_cursor(cursor, order_key, (column, id_column))
+        query = query.filter(pagination.keyset_filter(column, id_column, value, last_id, descending))
+        skip = 0
 
-    total = query.count()
-    companies = query.offset(skip).limit(limit).all()
-    return companies, total
+    # Se pide una fila extra para saber si existe una página siguiente
+    companies = query.with_entities(*LIST_COLUMNS).offset(skip).limit(limit + 1).all()
+
+    has_next = len(companies) > limit
+    companies = companies[:limit]
+    next_cursor = None
+    if has_next and companies and field in CURSOR_ORDER_FIELDS:
+        last = companies[-1]
+        next_cursor = pagination.encode_cursor(order_key, (getattr(last, field), last.id))
+
+    etag = pagination.page_etag([(c.id, c.version) for c in companies], total, has_next, next_cursor)
+    return pagination.Page(
+        items=[company_row(company) for company in companies],
+        total=total,
+        has_next=has_next,
+        next_cursor=next_cursor,
+        etag=etag,
+    )
 
 def get_company_by_id(db: Session, company_id: uuid.UUID) -> company_model.Company | None:
     """
@@ -31,6 +149,57 @@ def get_company_by_id(db: Session, company_id: uuid.UUID) -> company_model.Compa
     return db.query(company_model.Company).filter(company_model.Company.id == company_id, company_model.Company.deleted_at.is_(None)).first()
 
 
+def get_company_version(db: Session, company_id: uuid.UUID) -> int | None:
+    """
+    Versión actual de una compañía activa (None si no existe), sin cargar la fila completa.
+    """
+    return db.scalar(
+        select(company_model.Company.version)
+        .where(company_model.Company.id == company_id, company_model.Company.deleted_at.is_(None))
+    )
+
+
+def _id_key(company_id: uuid.UUID) -> str:
+    return f"id:{company_id}"
+
+
+def _name_key(name: str) -> str:
+    return f"name:{name}"
+
+
+def _cached_exists(key: str, load) -> bool:
+    cached = company_cache.get(key)
+    if cached is not None:
+        return cached == "1"
+
+    exists = load()
+    if exists:
+        company_cache.set(key, "1")
+    else:
+        company_cache.set(key, "0", ttl=settings.COMPANY_CACHE_NEGATIVE_TTL_SECONDS)
+    return exists
+
+
+def company_exists(db: Session, company_id: uuid.UUID) -> bool:
+    """
+    Indica si existe una compañía activa con ese ID, pasando primero por company_cache.
+    """
+    return _cached_exists(_id_key(company_id), lambda: db.scalar(
+        select(company_model.Company.id)
+        .where(company_model.Company.id == company_id, company_model.Company.deleted_at.is_(None))
+    ) is not None)
+
+
+def company_name_exists(db: Session, name: str) -> bool:
+    """
+    Indica si existe una compañía activa con ese nombre, pasando primero por company_cache.
+    """
+    return _cached_exists(_name_key(name), lambda: db.scalar(
+        select(company_model.Company.id)
+        .where(company_model.Company.name == name, company_model.Company.deleted_at.is_(None))
+    ) is not None)
+
+
 def get_company_by_name(db: Session, name: str) -> company_model.Company | None:
     """
     Busca una compañía por su nombre en la base de datos.
@@ -40,32 +209,133 @@ def get_company_by_name(db: Session, name: str) -> company_model.Company | None:
 
 def create_company(db: Session, company: company_schema.CompanyCreate) -> company_model.Company:
     """
-    Crea una nueva compañía en la base de datos.
+    Crea una nueva compañía en la base de datos con un solo INSERT ... ON CONFLICT DO NOTHING.
+    Si el nombre ya existe (incluso por una creación concurrente) lanza CompanyNameConflictError.
     """
-    db_company = company_model.Company(**company.model_dump())
-    db.add(db_company)
-    db.commit()
-    db.refresh(db_company)
+    # RETURNING: la fila vuelve completa (created_at, resúmenes) sin releerla; sin filas si chocó
+    db_company = db.scalars(
+        dialect_insert(db)(company_model.Company)
+        .values(**company.model_dump())
+        .on_conflict_do_nothing(index_elements=[company_model.Company.name])
+        .returning(company_model.Company)
+    ).one_or_none()
+    if db_company is None:
+        raise CompanyNameConflictError(f"Ya existe una compañía con el nombre {company.name!r}.")
+    commit_detached(db, db_company)
+    company_cache.set(_id_key(db_company.id), "1")
+    company_cache.set(_name_key(db_company.name), "1")
     return db_company
 
 
+def upsert_companies_bulk(
+    db: Session, rows: list[tuple[int, company_schema.CompanyCreate]]
+) -> list[company_schema.CompanyBulkItemResult]:
+    """
+    Crea o actualiza muchas compañías por nombre en una sola transacción, para sincronizar
+    datos maestros. Cada bloque es un INSERT ... ON CONFLICT (name) DO UPDATE con executemany,
+    que solo toca (y sube la versión de) las compañías cuyo tax_id o país cambió; RETURNING
+    dice cuáles se crearon y cuáles se actualizaron. rows son pares (índice original,
+    compañía) y el resultado indica, para cada índice, el ID y qué pasó, o el motivo del error.
+    Las compañías con soft delete no se reactivan: su fila se informa como error.
+    """
+    # Si un nombre se repite gana la última fila: Postgres no admite que un mismo INSERT
+    # ... ON CONFLICT actualice dos veces la misma fila
+    last_by_name = {row.name: (index, row) for index, row in rows}
+    results = [
+        company_schema.CompanyBulkItemResult(index=index, error="Nombre repetido más adelante en la carga.")
+        for index, row in rows if last_by_name[row.name][0] != index
+    ]
+    valid = list(last_by_name.values())
+
+    companies = company_model.Company.__table__
+    statement = dialect_insert(db)(companies)
+    excluded = statement.excluded
+    # ON CONFLICT DO UPDATE no aplica el onupdate de version: se incrementa explícitamente
+    statement = statement.on_conflict_do_update(
+        index_elements=[companies.c.name],
+        set_={"tax_id": excluded.tax_id, "country": excluded.country, "version": companies.c.version + 1},
+        where=companies.c.deleted_at.is_(None) & (
+            companies.c.tax_id.is_distinct_from(excluded.tax_id) | (companies.c.country != excluded.country)
+        ),
+    ).returning(companies.c.id, companies.c.name, companies.c.version)
+
+    created_keys = []
+    chunk_size = settings.BULK_INSERT_CHUNK_SIZE
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        written = {
+            result.name: result for result in db.execute(statement, [row.model_dump() for _, row in chunk])
+        }
+        # Las que no volvieron no cambiaron o tienen soft delete
+        missing = [row.name for _, row in chunk if row.name not in written]
+        untouched = {}
+        if missing:
+            untouched = {
+                result.name: result for result in db.execute(
+                    select(companies.c.id, companies.c.name, companies.c.deleted_at)
+                    .where(companies.c.name.in_(missing))
+                )
+            }
+        for index, row in chunk:
+            if row.name in written:
+                # Una fila nueva tiene la versión inicial; una actualizada, una mayor
+                result = written[row.name]
+                outcome = "created" if result.version == 1 else "updated"
+                if outcome == "created":
+                    created_keys.extend((_id_key(result.id), _name_key(row.name)))
+                results.append(company_schema.CompanyBulkItemResult(index=index, id=result.id, outcome=outcome))
+            elif untouched[row.name].deleted_at is None:
+                results.append(company_schema.CompanyBulkItemResult(
+                    index=index, id=untouched[row.name].id, outcome="unchanged"
+                ))
+            else:
+                results.append(company_schema.CompanyBulkItemResult(
+                    index=index, error="La compañía con este nombre fue eliminada."
+                ))
+    db.commit()
+
+    # Las compañías nuevas pueden tener un "0" (no existe) en el caché; se borra por bloques
+    for start in range(0, len(created_keys), chunk_size):
+        company_cache.delete(*created_keys[start:start + chunk_size])
+
+    results.sort(key=lambda result: result.index)
+    return results
+
+
 def update_company(db: Session, company: company_model.Company, company_in: company_schema.CompanyUpdate) -> company_model.Company:
     """
     Actualiza los datos de una compañía en la base de datos.
     """
-    update_data = company_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(company, field, value)
+    # Solo los campos que cambian: un PUT sin cambios no toca la fila ni su versión (ETag)
+    update_data = {
+        field: value for field, value in company_in.model_dump(exclude_unset=True).items()
+        if getattr(company, field) != value
+    }
+    previous_name = company.name
+    if not update_data:
+        return company
 
-    db.add(company)
-    db.commit()
-    db.refresh(company)
+    # UPDATE ... RETURNING: la compañía queda al día (versión incluida) sin releerla
+    company = db.scalars(
+        update(company_model.Company)
+        .where(company_model.Company.id == company.id)
+        .values(update_data)
+        .returning(company_model.Company)
+        .execution_options(populate_existing=True)
+    ).one()
+    commit_detached(db, company)
+    if company.name != previous_name:
+        company_cache.delete(_name_key(previous_name))
+        company_cache.set(_name_key(company.name), "1")
     return company
 
 def delete_company(db: Session, company: company_model.Company) -> None:
     """
     Realiza un borrado lógico (soft delete) de una compañía.
     """
+    # Las llaves se arman antes del commit, que expira los atributos y obligaría a releer la fila
+    cache_keys = (_id_key(company.id), _name_key(company.name))
     company.deleted_at = datetime.now(timezone.utc)
     db.add(company)
-    db.commit()
\ No newline at end of file
+    db.commit()
+    company_cache.delete(*cache_keys)
\ No newline at end of file
@@ -0,0 +1,150 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Iterator
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import enums as enums_model, request as request_model
+from app.services import request_service
+
+
+class ExportFormat(str, enum.Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+# Columnas de la exportación (la compañía se aplana en columnas company_*)
+EXPORT_FIELDS = [
+    "id",
+    "status",
+    "risk_score",
+    "ruleset_version",
+    "created_at",
+    "pep_flag",
+    "sanction_list",
+    "late_payments",
+    "company_id",
+    "company_name",
+    "company_tax_id",
+    "company_country",
+]
+
+# Filas leídas por viaje al servidor y filas por bloque escrito en la respuesta
+EXPORT_YIELD_PER = 1000
+
+
+def build_export_statement(
+    db: Session | AsyncSession,
+    search: str | None = None,
+    status: enums_model.StatusRequestEnum | None = None,
+    risk_min: int | None = None,
+    risk_max: int | None = None,
+) -> Select:
+    """
+    Consulta de la exportación: los mismos filtros del listado, en un orden estable y leída
+    por bloques (yield_per), lo que en Postgres abre un cursor del lado del servidor.
+    """
+    sync_db = db.sync_session if isinstance(db, AsyncSession) else db
+    query = request_service.build_requests_query(
+        sync_db, search=search, status=status, risk_min=risk_min, risk_max=risk_max
+    )
+    return (
+        query.order_by(request_model.Request.created_at, request_model.Request.id)
+        .statement
+        .execution_options(yield_per=EXPORT_YIELD_PER)
+    )
+
+
+def export_row(request: request_model.Request) -> dict:
+    """
+    Convierte una solicitud (con su compañía) en una fila plana de la exportación.
+    """
+    inputs = request.risk_inputs or {}
+    company = request.company
+    return {
+        "id": str(request.id),
+        "status": enums_model.StatusRequestEnum(request.status).value,
+        "risk_score": request.risk_score,
+        "ruleset_version": request.ruleset_version,
+        "created_at": request.created_at.isoformat() if isinstance(request.created_at, datetime) else None,
+        "pep_flag": inputs.get("pep_flag"),
+        "sanction_list": inputs.get("sanction_list"),
+        "late_payments": inputs.get("late_payments"),
+        "company_id": str(company.id),
+        "company_name": company.name,
+        "company_tax_id": company.tax_id,
+        "company_country": company.country,
+    }
+
+
+class _Encoder:
+    """
+    Acumula filas y las entrega como bloques de texto en el formato pedido.
+    """
+
+    def __init__(self, fmt: ExportFormat):
+        self.fmt = fmt
+        self.buffer = io.StringIO()
+        self.writer = csv.DictWriter(self.buffer, fieldnames=EXPORT_FIELDS) if fmt == ExportFormat.CSV else None
+
+    def header(self) -> str:
+        if self.writer is None:
+            return ""
+        self.writer.writeheader()
+        return self.flush()
+
+    def write(self, request: request_model.Request) -> None:
+        row = export_row(request)
+        if self.writer is not None:
+            self.writer.writerow(row)
+        else:
+            self.buffer.write(json.dumps(row, separators=(",", ":")))
+            self.buffer.write("\n")
+
+    def flush(self) -> str:
+        chunk = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return chunk
+
+
+def iter_export(db: Session, fmt: ExportFormat, **filters) -> Iterator[str]:
+    """
+    Genera la exportación por bloques de EXPORT_YIELD_PER filas sobre una Session síncrona.
+    La cabecera sale antes de ejecutar la consulta para que el primer byte llegue de inmediato.
+    """
+    encoder = _Encoder(fmt)
+    header = encoder.header()
+    if header:
+        yield header
+
+    for partition in db.scalars(build_export_statement(db, **filters)).partitions():
+        for request in partition:
+            encoder.write(request)
+        yield encoder.flush()
+
+
+async def aiter_export(db: AsyncSession, fmt: ExportFormat, **filters) -> AsyncIterator[str]:
+    """
+    Igual que iter_export, pero sobre AsyncSession con un resultado en streaming.
+    """
+    encoder = _Encoder(fmt)
+    header = encoder.header()
+    if header:
+        yield header
+
+    result = await db.stream_scalars(build_export_statement(db, **filters))
+    async for partition in result.partitions():
+        for request in partition:
+            encoder.write(request)
+        yield encoder.flush()
@@ -0,0 +1,111 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.services import security as security_service
+
+
+class HashingMetrics:
+    """
+    Acumula cuántas operaciones de bcrypt se ejecutaron, cuánto esperaron turno y cuánto tardaron.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.operations = 0
+        self.in_flight = 0
+        self.total_queue = 0.0
+        self.max_queue = 0.0
+        self.total_run = 0.0
+
+    def record(self, queue_seconds: float, run_seconds: float) -> None:
+        with self._lock:
+            self.operations += 1
+            self.total_queue += queue_seconds
+            self.max_queue = max(self.max_queue, queue_seconds)
+            self.total_run += run_seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "operations": self.operations,
+                "in_flight": self.in_flight,
+                "queue_avg_ms": round(self.total_queue * 1000 / self.operations, 3) if self.operations else 0.0,
+                "queue_max_ms": round(self.max_queue * 1000, 3),
+                "run_avg_ms": round(self.total_run * 1000 / self.operations, 3) if self.operations else 0.0,
+            }
+
+
+class PasswordHasher:
+    """
+    Ejecuta bcrypt en un pool de procesos dedicado, para no ocupar el event loop ni el
+    threadpool que usan los demás endpoints. Como mucho max_concurrency operaciones están en
+    vuelo a la vez; el resto espera su turno y ese tiempo queda registrado en las métricas.
+    Con workers=0 se usa el threadpool de Starlette (útil en desarrollo).
+    """
+
+    def __init__(self, workers: int, max_concurrency: int):
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.metrics = HashingMetrics()
+        self._executor: ProcessPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+        self._semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = weakref.WeakKeyDictionary()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # El pool se crea al primer uso; forkserver evita hacer fork de un proceso con hilos
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("forkserver")
+                )
+            return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Un asyncio.Semaphore pertenece a un event loop (los tests crean uno por cliente)
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _run(self, fn: Callable[..., Any], *args) -> Any:
+        queued_at = time.perf_counter()
+        async with self._get_semaphore():
+            started_at = time.perf_counter()
+            self.metrics.in_flight += 1
+            try:
+                if self.workers > 0:
+                    return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+                return await run_in_threadpool(fn, *args)
+            finally:
+                self.metrics.in_flight -= 1
+                self.metrics.record(started_at - queued_at, time.perf_counter() - started_at)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(security_service.get_password_hash, password)
+
+    async def verify_and_update(self, password: str, password_hash: str) -> tuple[bool, str | None]:
+        """
+        Verifica la contraseña. Si es correcta y el hash usa parámetros de costo distintos a los
+        configurados, devuelve también el hash recalculado para guardarlo.
+        """
+        return await self._run(security_service.verify_and_update_password, password, password_hash)
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS, max_concurrency=settings.PASSWORD_HASH_MAX_CONCURRENCY
+)
@@ -0,0 +1,354 @@
+import logging
+import threading
+import uuid
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+
+from sqlalchemy import case, func, insert, literal, select, update
+from sqlalchemy.orm import Session, aliased
+
+from app.config import settings
+from app.db.db import SessionLocal
+from app.db.dialect import lock_transaction
+from app.db.writes import commit_detached
+from app.models.enums import JobStatusEnum
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelledError(Exception):
+    """
+    Se pidió cancelar el trabajo. La lanza JobContext.report para cortar la ejecución.
+    """
+
+
+class UnknownJobKindError(ValueError):
+    """
+    No hay un trabajo registrado con ese tipo (ver register_job).
+    """
+
+
+class JobContext:
+    """
+    Lo que recibe un trabajo al ejecutarse: su sesión, sus parámetros y report() para informar
+    el avance.
+    """
+
+    def __init__(self, db: Session, job_id: uuid.UUID, params: dict):
+        self.db = db
+        self.job_id = job_id
+        self.params = params
+
+    def report(self, processed: int, total: int | None = None) -> None:
+        """
+        Guarda el avance y hace commit. Si se pidió cancelar lanza JobCancelledError: lo que el
+        trabajo ya confirmó se conserva y el resto no se ejecuta. El mismo UPDATE lee el pedido
+        de cancelación, así que reportar cuesta una sentencia.
+        """
+        values = {"processed": processed, "updated_at": func.now()}
+        if total is not None:
+            values["total"] = total
+        cancel_requested = self.db.execute(
+            update(Job).where(Job.id == self.job_id).values(values).returning(Job.cancel_requested)
+            .execution_options(synchronize_session=False)
+        ).scalar_one()
+        self.db.commit()
+        if cancel_requested:
+            raise JobCancelledError()
+
+
+@dataclass(frozen=True)
+class JobKind:
+    """
+    Un tipo de trabajo: la función que lo ejecuta (recibe el JobContext y devuelve el resultado
+    como dict) y cuántos de ese tipo pueden correr a la vez.
+    """
+    handler: Callable[[JobContext], dict | None]
+    max_concurrency: int
+
+
+JOB_KINDS: dict[str, JobKind] = {}
+
+
+def register_job(kind: str, handler: Callable[[JobContext], dict | None], max_concurrency: int = 1) -> None:
+    """
+    Registra un tipo de trabajo. Los servicios registran los suyos al importarse.
+    """
+    JOB_KINDS[kind] = JobKind(handler, max_concurrency)
+
+
+def _finish(db: Session, job_id: uuid.UUID, status: JobStatusEnum, result: dict | None = None, error: str | None = None) -> None:
+    db.execute(
+        update(Job).where(Job.id == job_id)
+        .values(status=status, result=result, error=error, finished_at=func.now(), updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def execute_job(db: Session, job_id: uuid.UUID, kind: str) -> bool:
+    """
+    Ejecuta un trabajo en cola y deja su estado final en la tabla. Si fue cancelado antes de
+    empezar no hace nada. Devuelve False si no pudo empezar porque su tipo ya tiene
+    max_concurrency trabajos en curso (contando los de otros procesos): sigue en cola.
+    """
+    # Se toma solo si sigue en cola (una cancelación previa ya lo dejó terminado) y si hay lugar
+    # en el límite de su tipo. El lock por tipo ordena las tomas de varios procesos: la segunda
+    # espera al commit de la primera y ve su trabajo en curso
+    running = aliased(Job)
+    running_of_kind = (
+        select(func.count()).select_from(running)
+        .where(running.kind == kind, running.status == JobStatusEnum.RUNNING)
+        .scalar_subquery()
+    )
+    lock_transaction(db, f"jobs:{kind}")
+    claimed = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JobStatusEnum.QUEUED, running_of_kind < JOB_KINDS[kind].max_concurrency)
+        .values(status=JobStatusEnum.RUNNING, started_at=func.now(), updated_at=func.now())
+        .returning(Job.params)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if claimed is None:
+        still_queued = db.scalar(select(Job.status).where(Job.id == job_id)) == JobStatusEnum.QUEUED
+        db.commit()
+        return not still_queued
+    db.commit()
+
+    context = JobContext(db, job_id, claimed.params or {})
+    try:
+        result = JOB_KINDS[kind].handler(context)
+    except JobCancelledError:
+        # report() ya hizo commit: no queda nada pendiente en la sesión
+        _finish(db, job_id, JobStatusEnum.CANCELLED)
+    except Exception as e:
+        db.rollback()
+        logger.exception("El trabajo %s (%s) falló", job_id, kind)
+        _finish(db, job_id, JobStatusEnum.FAILED, error=str(e) or type(e).__name__)
+    else:
+        _finish(db, job_id, JobStatusEnum.SUCCEEDED, result=result)
+    return True
+
+
+def fail_queued_jobs(db: Session, job_ids: list[uuid.UUID], error: str) -> None:
+    """
+    Marca como failed los trabajos de la lista que siguen en cola (los cancelados o ya tomados
+    por otro proceso no se tocan).
+    """
+    db.execute(
+        update(Job).where(Job.id.in_(job_ids), Job.status == JobStatusEnum.QUEUED)
+        .values(status=JobStatusEnum.FAILED, error=error, finished_at=func.now(), updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def recover_jobs(db: Session, stale_after_seconds: int) -> list[tuple[uuid.UUID, str]]:
+    """
+    Recupera los trabajos que dejó un proceso detenido sin apagarse en orden. Los que siguen en
+    curso sin reportar avance desde hace stale_after_seconds quedan como failed (se pueden
+    volver a lanzar). Devuelve los que siguen en cola, en orden de llegada, para enviarlos de
+    nuevo al pool: si otro proceso también los tiene, solo uno logra tomarlos (ver execute_job).
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=stale_after_seconds)
+    db.execute(
+        update(Job).where(Job.status == JobStatusEnum.RUNNING, Job.updated_at < cutoff)
+        .values(
+            status=JobStatusEnum.FAILED, error="Se interrumpió: el proceso que lo ejecutaba se detuvo.",
+            finished_at=func.now(), updated_at=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+    queued = db.execute(
+        select(Job.id, Job.kind).where(Job.status == JobStatusEnum.QUEUED).order_by(Job.created_at, Job.id)
+    ).all()
+    unknown = [job.id for job in queued if job.kind not in JOB_KINDS]
+    if unknown:
+        fail_queued_jobs(db, unknown, "Tipo de trabajo desconocido.")
+    return [(job.id, job.kind) for job in queued if job.kind in JOB_KINDS]
+
+
+class JobRunner:
+    """
+    Ejecuta los trabajos en un pool de hilos del mismo proceso, sin un broker externo. Como
+    mucho `workers` trabajos corren a la vez y cada tipo tiene su propio límite
+    (max_concurrency); los demás esperan en una cola en memoria, en orden de llegada, sin
+    ocupar un hilo. El estado de cada trabajo vive en la tabla jobs. El límite de cada tipo se
+    vuelve a comprobar en la tabla al tomar el trabajo (ver execute_job), así vale también entre
+    procesos: si otro proceso ya lo llenó, el trabajo se reintenta cada retry_seconds.
+    """
+
+    def __init__(self, workers: int, session_factory: Callable[[], Session], retry_seconds: float = 5.0):
+        self.workers = workers
+        self.session_factory = session_factory
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._queue: deque[tuple[uuid.UUID, str]] = deque()
+        self._running: Counter = Counter()
+        # Trabajos que esperan su reintento, con el timer que los devuelve a la cola
+        self._retrying: dict[uuid.UUID, tuple[str, threading.Timer]] = {}
+        # Trabajos en cola o en curso, para esperar a que terminen (wait)
+        self._done: dict[uuid.UUID, threading.Event] = {}
+
+    def submit(self, job_id: uuid.UUID, kind: str) -> None:
+        with self._lock:
+            self._queue.append((job_id, kind))
+            self._done[job_id] = threading.Event()
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        # Arranca los trabajos en cola que caben en los límites, sin saltarse el orden de cada tipo
+        with self._lock:
+            waiting: deque[tuple[uuid.UUID, str]] = deque()
+            while self._queue:
+                job_id, kind = self._queue.popleft()
+                if sum(self._running.values()) < self.workers and self._running[kind] < JOB_KINDS[kind].max_concurrency:
+                    self._running[kind] += 1
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+                    self._executor.submit(self._run, job_id, kind)
+                else:
+                    waiting.append((job_id, kind))
+            self._queue = waiting
+
+    def _run(self, job_id: uuid.UUID, kind: str) -> None:
+        started = True
+        try:
+            with self.session_factory() as db:
+                started = execute_job(db, job_id, kind)
+        except Exception:
+            # Falló la propia tabla jobs (por ejemplo, la base de datos no responde)
+            logger.exception("No se pudo ejecutar el trabajo %s (%s)", job_id, kind)
+        finally:
+            with self._lock:
+                self._running[kind] -= 1
+                done = None
+                if started:
+                    done = self._done.pop(job_id, None)
+                else:
+                    # Otro proceso tiene lleno el límite del tipo: se reintenta más tarde
+                    timer = threading.Timer(self.retry_seconds, self._retry, (job_id, kind))
+                    timer.daemon = True
+                    self._retrying[job_id] = (kind, timer)
+                    timer.start()
+            # Primero se despacha lo que esperaba este lugar, así wait() ve la cola ya avanzada
+            self._dispatch()
+            if done is not None:
+                done.set()
+
+    def _retry(self, job_id: uuid.UUID, kind: str) -> None:
+        with self._lock:
+            if self._retrying.pop(job_id, None) is None:
+                # El pool se apagó mientras esperaba
+                return
+            # Vuelve al frente: llegó antes que los que esperan detrás en la cola
+            self._queue.appendleft((job_id, kind))
+        self._dispatch()
+
+    def wait(self, job_id: uuid.UUID, timeout: float | None = None) -> bool:
+        """
+        Espera a que termine un trabajo enviado por este proceso. Devuelve False si se agotó el timeout.
+        """
+        with self._lock:
+            done = self._done.get(job_id)
+        return done is None or done.wait(timeout)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queued": len(self._queue) + len(self._retrying),
+                "running": {kind: count for kind, count in self._running.items() if count},
+            }
+
+    def recover(self, stale_after_seconds: int) -> None:
+        """
+        Al arrancar: cierra los trabajos en curso que quedaron colgados y vuelve a enviar al pool
+        los que siguen en cola (ver recover_jobs).
+        """
+        try:
+            with self.session_factory() as db:
+                queued = recover_jobs(db, stale_after_seconds)
+        except Exception:
+            logger.exception("No se pudieron recuperar los trabajos pendientes")
+            return
+        for job_id, kind in queued:
+            self.submit(job_id, kind)
+
+    def shutdown(self) -> None:
+        """
+        Detiene el pool. Los trabajos que esperaban en la cola no van a correr: quedan como
+        failed en la tabla, en vez de en cola para siempre.
+        """
+        with self._lock:
+            pending = [job_id for job_id, _ in self._queue]
+            self._queue.clear()
+            for job_id, (_, timer) in self._retrying.items():
+                timer.cancel()
+                pending.append(job_id)
+            self._retrying.clear()
+            done = [self._done.pop(job_id) for job_id in pending if job_id in self._done]
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+        if pending:
+            try:
+                with self.session_factory() as db:
+                    fail_queued_jobs(db, pending, "El proceso se detuvo antes de ejecutarlo; se puede volver a lanzar.")
+            except Exception:
+                logger.exception("No se pudieron cerrar los trabajos en cola")
+        for event in done:
+            event.set()
+
+
+job_runner = JobRunner(workers=settings.JOB_WORKERS, session_factory=SessionLocal)
+
+
+def enqueue_job(db: Session, kind: str, params: dict | None = None, created_by: uuid.UUID | None = None) -> Job:
+    """
+    Crea el trabajo en la tabla (en cola) y lo envía al pool de este proceso.
+    """
+    if kind not in JOB_KINDS:
+        raise UnknownJobKindError(f"Tipo de trabajo desconocido: {kind!r}.")
+    job = db.scalars(
+        insert(Job).values(kind=kind, params=params, created_by=created_by).returning(Job)
+    ).one()
+    commit_detached(db, job)
+    job_runner.submit(job.id, kind)
+    return job
+
+
+def get_job(db: Session, job_id: uuid.UUID) -> Job | None:
+    """
+    Busca un trabajo por su ID.
+    """
+    return db.get(Job, job_id)
+
+
+def cancel_job(db: Session, job_id: uuid.UUID) -> Job | None:
+    """
+    Pide cancelar un trabajo. Uno en cola queda cancelado en el acto; uno en curso se detiene
+    en su siguiente reporte de avance. Devuelve None si el trabajo ya había terminado.
+    """
+    queued = Job.status == JobStatusEnum.QUEUED
+    job = db.scalars(
+        update(Job)
+        .where(Job.id == job_id, Job.status.in_([JobStatusEnum.QUEUED, JobStatusEnum.RUNNING]))
+        .values(
+            cancel_requested=True,
+            status=case((queued, literal(JobStatusEnum.CANCELLED, Job.status.type)), else_=Job.status),
+            finished_at=case((queued, func.now()), else_=Job.finished_at),
+        )
+        .returning(Job)
+        .execution_options(populate_existing=True)
+    ).one_or_none()
+    if job is not None:
+        commit_detached(db, job)
+    return job
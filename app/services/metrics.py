@@ -0,0 +1,131 @@
+import bisect
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+# Límites de los histogramas de latencia (segundos) y de sentencias SQL por petición
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+class Histogram:
+    """
+    Histograma acumulado por combinación de etiquetas, con el formato de Prometheus.
+    """
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # etiquetas -> [conteos por bucket (no acumulados) + el de +Inf, suma]
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for label_values, counts, total in sorted(series):
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else f"{bound:g}"
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    """
+    Contador monótono sin etiquetas, con el formato de Prometheus.
+    """
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter", f"{self.name} {self.value}"]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.value = 0
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP por ruta.",
+    ("method", "route", "status"), LATENCY_BUCKETS,
+)
+request_db_duration = Histogram(
+    "http_request_db_seconds", "Tiempo en la base de datos por petición HTTP.",
+    ("method", "route"), LATENCY_BUCKETS,
+)
+request_statements = Histogram(
+    "http_request_db_statements", "Sentencias SQL ejecutadas por petición HTTP.",
+    ("method", "route"), STATEMENT_BUCKETS,
+)
+slow_queries = Counter("db_slow_queries_total", "Sentencias SQL que superaron SLOW_QUERY_MS.")
+
+REGISTRY = (request_duration, request_db_duration, request_statements, slow_queries)
+
+
+@dataclass
+class RequestTiming:
+    """
+    Lo que acumula una petición mientras se atiende: sentencias SQL y tiempo en la base de datos.
+    """
+    statements: int = 0
+    db_seconds: float = 0.0
+
+
+# Medición de la petición en curso. Es un objeto mutable: el threadpool y run_sync trabajan
+# sobre una copia del contexto, pero apuntan al mismo RequestTiming.
+current_timing: ContextVar[RequestTiming | None] = ContextVar("current_timing", default=None)
+
+
+def record_statement(seconds: float) -> None:
+    timing = current_timing.get()
+    if timing is not None:
+        timing.statements += 1
+        timing.db_seconds += seconds
+
+
+def render() -> str:
+    """
+    Todas las métricas en el formato de texto de Prometheus.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    for metric in REGISTRY:
+        metric.clear()
@@ -0,0 +1,138 @@
+import base64
+import enum
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Generic, Hashable, TypeVar
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query, Session
+
+from app.config import settings
+from app.services.cache import TTLCache
+
+T = TypeVar("T")
+
+# Caché de conteos para total=estimate, indexada por tabla + combinación de filtros
+count_cache = TTLCache(maxsize=settings.COUNT_CACHE_MAXSIZE, ttl=settings.COUNT_CACHE_TTL_SECONDS)
+
+
+class TotalMode(str, enum.Enum):
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+    NONE = "none"
+
+
+@dataclass
+class Page(Generic[T]):
+    """
+    Resultado de una consulta paginada. total es None si no se pidió (o no se calculó) el conteo.
+    """
+    items: list[T]
+    total: int | None
+    has_next: bool
+    next_cursor: str | None = None
+    etag: str | None = None
+
+
+class InvalidCursorError(ValueError):
+    """
+    El cursor recibido no se pudo decodificar o no corresponde al orden solicitado.
+    """
+
+
+class InvalidOrderError(ValueError):
+    """
+    El campo de order_by no existe o no se puede usar para ordenar.
+    """
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (str, int, float)) or value is None:
+        return value
+    return str(value)
+
+
+def encode_cursor(order_key: str, values: tuple) -> str:
+    """
+    Genera un cursor opaco (base64) a partir de la llave de orden y los valores de la última fila.
+    """
+    payload = json.dumps([order_key, [_to_json(v) for v in values]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order_key: str, columns: tuple) -> tuple:
+    """
+    Decodifica un cursor y convierte sus valores al tipo Python de cada columna.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key, raw_values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if key != order_key or len(raw_values) != len(columns):
+            raise InvalidCursorError("El cursor no corresponde al orden solicitado.")
+
+        values = []
+        for column, raw in zip(columns, raw_values):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                values.append(datetime.fromisoformat(raw))
+            else:
+                values.append(python_type(raw))
+        return tuple(values)
+    except InvalidCursorError:
+        raise
+    except (ValueError, TypeError):
+        raise InvalidCursorError("El cursor no es válido.")
+
+
+def page_etag(versions: list[tuple], total: int | None, has_next: bool, next_cursor: str | None) -> str:
+    """
+    ETag fuerte de una página a partir de (id, versión) de sus filas: cambia si alguna fila de
+    la página cambia, entra o sale, sin necesidad de serializar la respuesta.
+    """
+    digest = hashlib.blake2b(repr((versions, total, has_next, next_cursor)).encode(), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def keyset_filter(column, id_column, value: Any, last_id: Any, descending: bool):
+    """
+    Condición "fila posterior a (value, last_id)" para paginación por cursor (keyset).
+    Se usa una comparación de row values para que el motor pueda recorrer el índice
+    compuesto (column, id) como un rango.
+    """
+    if descending:
+        return tuple_(column, id_column) < (value, last_id)
+    return tuple_(column, id_column) > (value, last_id)
+
+
+def estimate_count(db: Session, query: Query) -> int:
+    """
+    Conteo aproximado a partir de las estadísticas del planificador de Postgres (EXPLAIN).
+    En otros motores (SQLite en los tests) se recurre al conteo exacto.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        statement = query.statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+        plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}").scalar()
+        return int(plan[0]["Plan"]["Plan Rows"])
+    return query.count()
+
+
+def count_total(db: Session, query: Query, mode: TotalMode | None, cache_key: Hashable) -> int | None:
+    """
+    Calcula el total de una consulta según el modo pedido:
+    exact hace un COUNT(*), estimate usa el planificador (cacheado con TTL corto por
+    combinación de filtros) y none omite el conteo.
+    """
+    if mode is None or mode == TotalMode.NONE:
+        return None
+    if mode == TotalMode.EXACT:
+        return query.count()
+
+    total = count_cache.get(cache_key)
+    if total is None:
+        total = estimate_count(db, query)
+        count_cache.set(cache_key, total)
+    return total
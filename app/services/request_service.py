@@ -1,9 +1,14 @@
 import uuid
-from sqlalchemy.orm import Session
+from typing import Callable
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Query, Session
+from app.config import settings
 from app.models import request as request_model
 from app.schemas import request as request_schema
-from app.services import risk as risk_service
+from app.services import job_service, pagination, risk as risk_service, rollup_service, search as search_service, stats_service
 from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from app.db.writes import commit_detached
 from app.models import company as company_model, enums as enums_model
 
 
@@ -11,18 +16,177 @@ def create_request(db: Session, request_in: request_schema.RequestCreate) -> req
     """
     Crea una nueva solicitud de evaluación, calculando su risk_score.
     """
-    risk_score = risk_service.calculate_risk_score(request_in.risk_inputs)
+    ruleset = risk_service.get_ruleset()
+    risk_score = ruleset.score(request_in.risk_inputs)
 
-    db_request = request_model.Request(
-        company_id=request_in.company_id,
-        risk_inputs=request_in.risk_inputs.model_dump(),
-        risk_score=risk_score
-    )
+    # INSERT ... RETURNING: la fila vuelve completa (created_at, version) sin releerla
+    db_request = db.scalars(
+        insert(request_model.Request)
+        .values(
+            company_id=request_in.company_id,
+            risk_inputs=request_in.risk_inputs.model_dump(),
+            risk_score=risk_score,
+            ruleset_version=ruleset.version,
+        )
+        .returning(request_model.Request)
+    ).one()
+    stats_service.record_change(db, added=[
+        stats_service.stat_key(request_in.company_id, enums_model.StatusRequestEnum.PENDING, risk_score)
+    ])
+    # El UPDATE de los resúmenes devuelve la compañía, que queda como la relación ya cargada:
+    # serializar la respuesta no dispara un lazy load (con AsyncSession no está permitido)
+    company = rollup_service.record_created_one(db, (request_in.company_id, enums_model.StatusRequestEnum.PENDING, risk_score))
+    set_committed_value(db_request, "company", company)
+    commit_detached(db, db_request, company)
+    return db_request
+
+
+def create_requests_bulk(
+    db: Session, rows: list[tuple[int, request_schema.RequestCreate]]
+) -> list[request_schema.RequestBulkItemResult]:
+    """
+    Crea muchas solicitudes en una sola transacción.
+    Valida todas las compañías con una consulta IN, calcula los scores en lote e inserta con
+    executemany por bloques. rows son pares (índice original, solicitud) y el resultado
+    indica, para cada índice, el ID creado o el motivo del error.
+    """
+    company_ids = {row.company_id for _, row in rows}
+    existing_ids = set()
+    if company_ids:
+        existing_ids = set(db.scalars(
+            select(company_model.Company.id).where(
+                company_model.Company.id.in_(company_ids),
+                company_model.Company.deleted_at.is_(None),
+            )
+        ))
+
+    valid = [(index, row) for index, row in rows if row.company_id in existing_ids]
+    ruleset = risk_service.get_ruleset()
+    scores = risk_service.calculate_risk_scores([row.risk_inputs for _, row in valid], ruleset)
+
+    results = [
+        request_schema.RequestBulkItemResult(index=index, error="La compañía especificada no existe.")
+        for index, row in rows if row.company_id not in existing_ids
+    ]
+    values = []
+    for (index, row), score in zip(valid, scores):
+        request_id = uuid.uuid4()
+        values.append({
+            "id": request_id,
+            "company_id": row.company_id,
+            "status": enums_model.StatusRequestEnum.PENDING,
+            "risk_inputs": row.risk_inputs.model_dump(),
+            "risk_score": score,
+            "ruleset_version": ruleset.version,
+        })
+        results.append(request_schema.RequestBulkItemResult(index=index, id=request_id, risk_score=score))
 
-    db.add(db_request)
+    chunk_size = settings.BULK_INSERT_CHUNK_SIZE
+    for start in range(0, len(values), chunk_size):
+        db.execute(insert(request_model.Request), values[start:start + chunk_size])
+    stats_service.record_change(db, added=[
+        stats_service.stat_key(value["company_id"], value["status"], value["risk_score"]) for value in values
+    ])
+    rollup_service.record_created(db, [(value["company_id"], value["status"], value["risk_score"]) for value in values])
     db.commit()
-    db.refresh(db_request)
-    return db_request
+
+    results.sort(key=lambda result: result.index)
+    return results
+
+
+def request_filters(
+    db: Session,
+    search: str | None = None,
+    status: enums_model.StatusRequestEnum | None = None,
+    risk_min: int | None = None,
+    risk_max: int | None = None
+) -> list:
+    """
+    Condiciones de los filtros del listado. El filtro de búsqueda (nombre o tax_id de la
+    compañía, ver search.company_search_filter) requiere el join con Company.
+    """
+    criteria = []
+    if search:
+        criteria.append(search_service.company_search_filter(db, search))
+    if status:
+        criteria.append(request_model.Request.status == status)
+    if risk_min is not None:
+        criteria.append(request_model.Request.risk_score >= risk_min)
+    if risk_max is not None:
+        criteria.append(request_model.Request.risk_score <= risk_max)
+    return criteria
+
+
+def build_requests_query(
+    db: Session,
+    search: str | None = None,
+    status: enums_model.StatusRequestEnum | None = None,
+    risk_min: int | None = None,
+    risk_max: int | None = None
+) -> Query:
+    """
+    Construye la consulta de solicitudes (con su compañía) aplicando los filtros del listado.
+    """
+    query = db.query(request_model.Request).options(joinedload(request_model.Request.company))
+
+    if search:
+        query = query.join(company_model.Company)
+
+    return query.filter(*request_filters(db, search=search, status=status, risk_min=risk_min, risk_max=risk_max))
+
+
+# Columnas del listado: lo que se devuelve en RequestRead (con la compañía anidada), más las
+# versiones de ambas filas para el ETag
+LIST_COLUMNS = (
+    request_model.Request.id,
+    request_model.Request.status,
+    request_model.Request.risk_inputs,
+    request_model.Request.risk_score,
+    request_model.Request.ruleset_version,
+    request_model.Request.created_at,
+    company_model.Company.name.label("company_name"),
+    company_model.Company.tax_id.label("company_tax_id"),
+    company_model.Company.country.label("company_country"),
+    company_model.Company.id.label("company_id"),
+    company_model.Company.created_at.label("company_created_at"),
+    company_model.Company.latest_risk_score.label("company_latest_risk_score"),
+    company_model.Company.max_risk_score.label("company_max_risk_score"),
+    company_model.Company.open_requests.label("company_open_requests"),
+    request_model.Request.version,
+    company_model.Company.version.label("company_version"),
+)
+
+_RISK_INPUT_DEFAULTS = {
+    field: info.default for field, info in request_schema.RiskInputsSchema.model_fields.items()
+}
+
+
+def request_row(row) -> dict:
+    """
+    Convierte una fila de LIST_COLUMNS en un dict con la misma forma (y orden de llaves) que
+    RequestRead, listo para serializar sin pasar por Pydantic.
+    """
+    inputs = row.risk_inputs
+    if inputs is not None:
+        inputs = {field: inputs.get(field, default) for field, default in _RISK_INPUT_DEFAULTS.items()}
+    return {
+        "id": row.id,
+        "status": enums_model.StatusRequestEnum(row.status).value,
+        "risk_inputs": inputs,
+        "risk_score": row.risk_score,
+        "ruleset_version": row.ruleset_version,
+        "created_at": row.created_at,
+        "company": {
+            "name": row.company_name,
+            "tax_id": row.company_tax_id,
+            "country": row.company_country,
+            "id": row.company_id,
+            "created_at": row.company_created_at,
+            "latest_risk_score": row.company_latest_risk_score,
+            "max_risk_score": row.company_max_risk_score,
+            "open_requests": row.company_open_requests,
+        },
+    }
 
 
 def get_requests(
@@ -32,42 +196,84 @@ def get_requests(
     search: str | None = None,
     status: enums_model.StatusRequestEnum | None = None,
     risk_min: int | None = None,
-    risk_max: int | None = None
-) -> tuple[list[request_model.Request], int]:
+    risk_max: int | None = None,
+    cursor: str | None = None,
+    total_mode: pagination.TotalMode | None = None
+) -> pagination.Page[dict]:
     """
     Obtiene una lista paginada de solicitudes, con filtros.
+    Si se entrega un cursor se pagina por keyset sobre (created_at, id) y se ignora skip.
+    Por defecto el total es exacto en la paginación por página y se omite al paginar por cursor.
+    Los ítems son dicts con la forma de RequestRead, leídos como filas Core (ver request_row).
     """
-    query = db.query(request_model.Request).options(joinedload(request_model.Request.company))
-
-    if search:
-        query = query.join(company_model.Company).filter(company_model.Company.name.ilike(f"%{search}%"))
+    filters = {"search": search, "status": status, "risk_min": risk_min, "risk_max": risk_max}
+    if total_mode is None:
+        total_mode = pagination.TotalMode.NONE if cursor else pagination.TotalMode.EXACT
+    total = pagination.count_total(
+        db, build_requests_query(db, **filters), total_mode,
+        cache_key=("requests", search, status, risk_min, risk_max)
+    )
 
-    # --- AÑADE ESTA LÓGICA DE FILTROS ---
-    if status:
-        query = query.filter(request_model.Request.status == status)
-    if risk_min is not None:
-        query = query.filter(request_model.Request.risk_score >= risk_min)
-    if risk_max is not None:
-        query = query.filter(request_model.Request.risk_score <= risk_max)
-    # ------------------------------------
+    query = (
+        select(*LIST_COLUMNS)
+        .join(request_model.Request.company)
+        .where(*request_filters(db, **filters))
+    )
 
-    total = query.count()
+    columns = (request_model.Request.created_at, request_model.Request.id)
+    if cursor:
+        created_at, last_id = pagination.decode_cursor(cursor, "created_at", columns)
+        query = query.where(pagination.keyset_filter(*columns, created_at, last_id, descending=True))
+        skip = 0
 
-    requests = (
-        query.order_by(request_model.Request.created_at.desc())
+    # Se pide una fila extra para saber si existe una página siguiente
+    rows = db.execute(
+        query.order_by(request_model.Request.created_at.desc(), request_model.Request.id.desc())
         .offset(skip)
-        .limit(limit)
-        .all()
-    )
+        .limit(limit + 1)
+    ).all()
+
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_next and rows:
+        last = rows[-1]
+        next_cursor = pagination.encode_cursor("created_at", (last.created_at, last.id))
 
-    return requests, total
+    etag = pagination.page_etag(
+        [(row.id, row.version, row.company_version) for row in rows], total, has_next, next_cursor
+    )
+    return pagination.Page(
+        items=[request_row(row) for row in rows],
+        total=total,
+        has_next=has_next,
+        next_cursor=next_cursor,
+        etag=etag,
+    )
 
 
 def get_request_by_id(db: Session, request_id: uuid.UUID) -> request_model.Request | None:
     """
-    Busca una solicitud por su ID.
+    Busca una solicitud por su ID (con su compañía).
+    """
+    return (
+        db.query(request_model.Request)
+        .options(joinedload(request_model.Request.company))
+        .filter(request_model.Request.id == request_id)
+        .first()
+    )
+
+
+def get_request_version(db: Session, request_id: uuid.UUID) -> tuple[int, int] | None:
+    """
+    Versiones actuales de una solicitud y de su compañía (None si no existe), sin cargar las filas.
     """
-    return db.query(request_model.Request).filter(request_model.Request.id == request_id).first()
+    row = db.execute(
+        select(request_model.Request.version, company_model.Company.version)
+        .join(request_model.Request.company)
+        .where(request_model.Request.id == request_id)
+    ).first()
+    return tuple(row) if row is not None else None
 
 
 
@@ -76,19 +282,37 @@ def update_request(db: Session, request: request_model.Request, request_in: requ
     Actualiza los datos de una solicitud. Si se actualizan los risk_inputs, recalcula el risk_score.
     """
     update_data = request_in.model_dump(exclude_unset=True)
+    previous_key = stats_service.stat_key(request.company_id, request.status, request.risk_score)
+    previous_facts = (request.company_id, request.status, request.risk_score)
+    company = request.company
 
     # Si 'risk_inputs' está en los datos a actualizar, recalculamos el score
     if 'risk_inputs' in update_data:
-        risk_score = risk_service.calculate_risk_score(request_schema.RiskInputsSchema(**update_data['risk_inputs']))
-        request.risk_score = risk_score
+        ruleset = risk_service.get_ruleset()
+        update_data['risk_score'] = ruleset.score(request_schema.RiskInputsSchema(**update_data['risk_inputs']))
+        update_data['ruleset_version'] = ruleset.version
+    # Solo los campos que cambian: un PUT sin cambios no toca la fila ni su versión (ETag)
+    update_data = {field: value for field, value in update_data.items() if getattr(request, field) != value}
+    if not update_data:
+        return request
 
-    # Actualizamos el resto de los campos
-    for field, value in update_data.items():
-        setattr(request, field, value)
-
-    db.add(request)
-    db.commit()
-    db.refresh(request)
+    # UPDATE ... RETURNING: la solicitud queda al día (score, versión) sin releerla. Así el
+    # recálculo de los resúmenes que sigue ya ve el score nuevo en la base de datos.
+    request = db.scalars(
+        update(request_model.Request)
+        .where(request_model.Request.id == request.id)
+        .values(update_data)
+        .returning(request_model.Request)
+        .execution_options(populate_existing=True)
+    ).one()
+    current_key = stats_service.stat_key(request.company_id, request.status, request.risk_score)
+    if current_key != previous_key:
+        stats_service.record_change(db, removed=[previous_key], added=[current_key])
+    updated_company = rollup_service.record_changed(
+        db, previous_facts, (request.company_id, request.status, request.risk_score)
+    )
+    set_committed_value(request, "company", updated_company or company)
+    commit_detached(db, request, updated_company or company)
     return request
 
 
@@ -98,4 +322,92 @@ def delete_request(db: Session, request: request_model.Request) -> None:
     Elimina una solicitud de la base de datos.
     """
     db.delete(request)
-    db.commit()
\ No newline at end of file
+    stats_service.record_change(db, removed=[
+        stats_service.stat_key(request.company_id, request.status, request.risk_score)
+    ])
+    db.flush()
+    rollup_service.record_deleted(db, (request.company_id, request.status, request.risk_score))
+    db.commit()
+
+def rescore_requests(
+    db: Session, chunk_size: int = 5000, on_chunk: Callable[[int, int], None] | None = None
+) -> tuple[int, int]:
+    """
+    Recalcula el risk_score de todas las solicitudes por bloques (keyset sobre id) con el
+    conjunto de reglas vigente. Cada bloque se calcula con el motor vectorizado y solo se
+    actualizan las filas cuyo score o ruleset_version cambió, con un UPDATE masivo por clave
+    primaria. Cada bloque se confirma por separado y después se llama a on_chunk con las
+    filas revisadas y actualizadas hasta ahora. Devuelve (filas revisadas, filas actualizadas).
+    """
+    ruleset = risk_service.get_ruleset()
+    defaults = {
+        field: info.default for field, info in request_schema.RiskInputsSchema.model_fields.items()
+    }
+    scanned = 0
+    updated = 0
+    last_id = None
+
+    while True:
+        query = select(
+            request_model.Request.id,
+            request_model.Request.risk_inputs,
+            request_model.Request.risk_score,
+            request_model.Request.ruleset_version,
+            request_model.Request.company_id,
+            request_model.Request.status,
+        ).order_by(request_model.Request.id).limit(chunk_size)
+        if last_id is not None:
+            query = query.where(request_model.Request.id > last_id)
+        rows = db.execute(query).all()
+        if not rows:
+            break
+
+        inputs = [row.risk_inputs or {} for row in rows]
+        columns = {field: [i.get(field, default) for i in inputs] for field, default in defaults.items()}
+        scores = risk_service.calculate_risk_scores_columnar(columns, ruleset).tolist()
+
+        changes = [
+            {"id": row.id, "risk_score": score, "ruleset_version": ruleset.version}
+            for row, score in zip(rows, scores)
+            if row.risk_score != score or row.ruleset_version != ruleset.version
+        ]
+        if changes:
+            db.execute(update(request_model.Request), changes)
+            # Los scores que cambian de tramo se mueven en la tabla de agregados
+            rescored = [(row, score) for row, score in zip(rows, scores) if row.risk_score != score]
+            stats_service.record_change(
+                db,
+                removed=[stats_service.stat_key(row.company_id, row.status, row.risk_score) for row, _ in rescored],
+                added=[stats_service.stat_key(row.company_id, row.status, score) for row, score in rescored],
+            )
+            rollup_service.recompute(
+                db, {row.company_id for row, _ in rescored}, fields=("latest_risk_score", "max_risk_score")
+            )
+        db.commit()
+
+        scanned += len(rows)
+        updated += len(changes)
+        last_id = rows[-1].id
+        if on_chunk is not None:
+            on_chunk(scanned, updated)
+
+    return scanned, updated
+
+
+def rescore_job(context: job_service.JobContext) -> dict:
+    """
+    Trabajo en segundo plano de rescore_requests: informa el avance en solicitudes revisadas
+    tras cada bloque, y una cancelación lo detiene entre bloques.
+    """
+    total = context.db.scalar(select(func.count()).select_from(request_model.Request))
+    context.report(0, total)
+    scanned, updated = rescore_requests(
+        context.db,
+        chunk_size=context.params.get("chunk_size", 5000),
+        on_chunk=lambda scanned, updated: context.report(scanned, total),
+    )
+    return {"scanned": scanned, "updated": updated}
+
+
+# Un solo recálculo a la vez: dos en paralelo revisarían las mismas filas
+job_service.register_job("rescore", rescore_job, max_concurrency=1)
@@ -1,21 +1,107 @@
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.config import settings
 from app.schemas.request import RiskInputsSchema
+from app.services.rules import RuleSet, RuleSetError, load_ruleset
 
-def calculate_risk_score(risk_inputs: RiskInputsSchema) -> int:
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _ruleset_path() -> Path:
+    path = Path(settings.RISK_RULESET_PATH)
+    return path if path.is_absolute() else PROJECT_ROOT / path
+
+
+class _ActiveRuleSet:
+    """
+    Conjunto de reglas vigente. Se recarga si el archivo cambia (revisando como mucho cada
+    RISK_RULESET_RELOAD_SECONDS) o al llamar a reload_ruleset().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.path = _ruleset_path()
+        self.ruleset = load_ruleset(self.path)
+        self.mtime = os.stat(self.path).st_mtime
+        self.next_check = time.monotonic() + settings.RISK_RULESET_RELOAD_SECONDS
+
+    def get(self) -> RuleSet:
+        if settings.RISK_RULESET_RELOAD_SECONDS > 0 and time.monotonic() >= self.next_check:
+            self._reload_if_changed()
+        return self.ruleset
+
+    def _reload_if_changed(self) -> None:
+        with self._lock:
+            self.next_check = time.monotonic() + settings.RISK_RULESET_RELOAD_SECONDS
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                return
+            if mtime != self.mtime:
+                try:
+                    self.reload()
+                except RuleSetError:
+                    # Un archivo inválido no reemplaza a las reglas vigentes
+                    logger.exception("No se pudo recargar el conjunto de reglas de riesgo")
+                    self.mtime = mtime
+
+    def reload(self, path: Path | None = None) -> RuleSet:
+        path = path or self.path
+        ruleset = load_ruleset(path)
+        self.path, self.ruleset, self.mtime = path, ruleset, os.stat(path).st_mtime
+        logger.info("Conjunto de reglas de riesgo cargado: versión %s", ruleset.version)
+        return ruleset
+
+
+_active = _ActiveRuleSet()
+
+
+def get_ruleset() -> RuleSet:
     """
-    Calcula el risk_score basado en reglas de negocio.
+    Devuelve el conjunto de reglas vigente. Quien calcula y guarda un score debe usar un mismo
+    RuleSet para ambos, así el ruleset_version guardado corresponde a las reglas aplicadas.
     """
-    score = 0
+    return _active.get()
 
-    # Regla 1: Si pep_flag es verdadero, suma 60 puntos.
-    if risk_inputs.pep_flag:
-        score += 60
 
-    # Regla 2: Si sanction_list es verdadero, suma 40 puntos.
-    if risk_inputs.sanction_list:
-        score += 40
+def reload_ruleset(path: str | Path | None = None) -> RuleSet:
+    """
+    Recarga (y recompila) el conjunto de reglas desde el archivo configurado u otro archivo.
+    """
+    with _active._lock:
+        return _active.reload(Path(path) if path else None)
 
-    # Regla 3: Suma 10 puntos por cada pago atrasado.
-    late_payments_score = risk_inputs.late_payments * 10
-    score += min(late_payments_score, 30) # Tope de 30 puntos
 
-    return score
\ No newline at end of file
+def calculate_risk_score(risk_inputs: RiskInputsSchema) -> int:
+    """
+    Calcula el risk_score basado en reglas de negocio (conjunto de reglas vigente).
+    No revisa si el archivo cambió: eso lo hace get_ruleset(), una vez por operación.
+    """
+    return _active.ruleset.score(risk_inputs)
+
+def calculate_risk_scores_columnar(columns: dict, ruleset: RuleSet | None = None) -> np.ndarray:
+    """
+    Calcula el risk_score de un lote a partir de columnas (campo -> arreglo, todos de igual largo),
+    vectorizado con NumPy.
+    """
+    return (ruleset or get_ruleset()).score_columnar(columns)
+
+
+def calculate_risk_scores(risk_inputs: list[RiskInputsSchema], ruleset: RuleSet | None = None) -> list[int]:
+    """
+    Calcula el risk_score de un lote de entradas en una sola pasada.
+    """
+    ruleset = ruleset or get_ruleset()
+    columns = {
+        field: [getattr(inputs, field) for inputs in risk_inputs]
+        for field in RiskInputsSchema.model_fields
+    }
+    return ruleset.score_columnar(columns).tolist()
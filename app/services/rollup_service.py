@@ -0,0 +1,172 @@
+import uuid
+from collections import defaultdict
+from typing import Iterable
+
+from sqlalchemy import Integer, bindparam, case, func, literal, select, update
+from sqlalchemy.orm import Session
+
+from app.models import company as company_model, request as request_model
+from app.models.enums import StatusRequestEnum
+
+# Estados que cuentan como solicitud abierta
+OPEN_STATUSES = (StatusRequestEnum.PENDING, StatusRequestEnum.IN_REVIEW)
+
+companies = company_model.Company.__table__
+requests = request_model.Request.__table__
+
+# (company_id, estado, risk_score) de una solicitud
+RequestFacts = tuple[uuid.UUID, str | StatusRequestEnum, int | None]
+
+
+def is_open(status: str | StatusRequestEnum) -> bool:
+    return StatusRequestEnum(status) in OPEN_STATUSES
+
+
+def _recomputed_values() -> dict:
+    """
+    Valores de los resúmenes calculados desde requests, como subconsultas correlacionadas con
+    la fila de companies que se actualiza. "Última" es la más reciente por (created_at, id),
+    el mismo orden del listado de solicitudes.
+    """
+    own = requests.c.company_id == companies.c.id
+    return {
+        "latest_risk_score": (
+            select(requests.c.risk_score).where(own)
+            .order_by(requests.c.created_at.desc(), requests.c.id.desc())
+            .limit(1)
+            .scalar_subquery()
+        ),
+        "max_risk_score": select(func.max(requests.c.risk_score)).where(own).scalar_subquery(),
+        "open_requests": (
+            select(func.count()).where(own, requests.c.status.in_(OPEN_STATUSES)).scalar_subquery()
+        ),
+    }
+
+
+def recompute(db: Session, company_ids: Iterable[uuid.UUID], fields: Iterable[str] | None = None) -> None:
+    """
+    Recalcula desde requests los resúmenes (todos, o solo fields) de las compañías indicadas.
+    Se usa cuando un cambio no se puede expresar como delta: una baja o un score que baja
+    pueden cambiar el máximo o la última solicitud.
+    """
+    company_ids = list(set(company_ids))
+    if not company_ids:
+        return
+    values = _recomputed_values()
+    if fields is not None:
+        values = {field: values[field] for field in fields}
+    db.execute(update(companies).where(companies.c.id.in_(company_ids)).values(values))
+
+
+def _created_values(opened, new_max) -> dict:
+    # Suma de las abiertas y el máximo que sube si corresponde; new_max puede ser NULL
+    return {
+        "open_requests": companies.c.open_requests + opened,
+        "max_risk_score": case(
+            (new_max.is_(None), companies.c.max_risk_score),
+            (companies.c.max_risk_score.is_(None) | (companies.c.max_risk_score < new_max), new_max),
+            else_=companies.c.max_risk_score,
+        ),
+        "latest_risk_score": _recomputed_values()["latest_risk_score"],
+    }
+
+
+def _update_company(db: Session, company_id: uuid.UUID, values: dict) -> company_model.Company:
+    # UPDATE ... RETURNING: la compañía queda cargada (y actualizada en la sesión) sin otro SELECT
+    return db.scalars(
+        update(company_model.Company)
+        .where(company_model.Company.id == company_id)
+        .values(values)
+        .returning(company_model.Company)
+        .execution_options(populate_existing=True)
+    ).one()
+
+
+def record_created_one(db: Session, created: RequestFacts) -> company_model.Company:
+    """
+    Igual que record_created para una sola solicitud; devuelve la compañía ya actualizada.
+    """
+    company_id, status, risk_score = created
+    return _update_company(db, company_id, _created_values(int(is_open(status)), literal(risk_score, Integer)))
+
+
+def record_created(db: Session, created: Iterable[RequestFacts]) -> None:
+    """
+    Suma solicitudes nuevas (ya insertadas) a los resúmenes de sus compañías con un UPDATE
+    por compañía (executemany): open_requests suma las abiertas y max_risk_score sube si
+    corresponde. latest_risk_score se relee con el índice (company_id, created_at, id), porque
+    varias solicitudes pueden compartir created_at y la última es la que define ese orden.
+    """
+    per_company: dict[uuid.UUID, dict] = defaultdict(lambda: {"opened": 0, "new_max": None})
+    for company_id, status, risk_score in created:
+        entry = per_company[company_id]
+        entry["opened"] += is_open(status)
+        if risk_score is not None and (entry["new_max"] is None or risk_score > entry["new_max"]):
+            entry["new_max"] = risk_score
+    if not per_company:
+        return
+
+    new_max = bindparam("new_max", type_=companies.c.max_risk_score.type)
+    statement = (
+        update(companies)
+        .where(companies.c.id == bindparam("company_id"))
+        .values(_created_values(bindparam("opened"), new_max))
+    )
+    db.execute(statement, [{"company_id": company_id, **entry} for company_id, entry in per_company.items()])
+
+
+def _apply(db: Session, company_id: uuid.UUID, opened: int, recompute_scores: bool) -> company_model.Company | None:
+    # Un solo UPDATE con el delta de open_requests y, si hace falta, el recálculo de los scores
+    values = {}
+    if opened:
+        values["open_requests"] = companies.c.open_requests + opened
+    if recompute_scores:
+        recomputed = _recomputed_values()
+        values["latest_risk_score"] = recomputed["latest_risk_score"]
+        values["max_risk_score"] = recomputed["max_risk_score"]
+    if not values:
+        return None
+    return _update_company(db, company_id, values)
+
+
+def record_changed(db: Session, previous: RequestFacts, current: RequestFacts) -> company_model.Company | None:
+    """
+    Ajusta los resúmenes tras modificar una solicitud. El cambio de estado es un delta sobre
+    open_requests; si cambió el score, el máximo y la última se recalculan para esa compañía.
+    Devuelve la compañía actualizada, o None si sus resúmenes no cambiaron.
+    """
+    company_id, previous_status, previous_score = previous
+    _, current_status, current_score = current
+    opened = is_open(current_status) - is_open(previous_status)
+    return _apply(db, company_id, opened, recompute_scores=current_score != previous_score)
+
+
+def record_deleted(db: Session, deleted: RequestFacts) -> company_model.Company | None:
+    """
+    Quita una solicitud de los resúmenes de su compañía.
+    """
+    company_id, status, _ = deleted
+    return _apply(db, company_id, -int(is_open(status)), recompute_scores=True)
+
+
+def rebuild_rollups(db: Session, chunk_size: int = 1000) -> int:
+    """
+    Reconstruye los resúmenes de todas las compañías desde requests (reparación), por bloques
+    de compañías (keyset sobre id) con un commit por bloque. Devuelve las compañías revisadas.
+    """
+    scanned = 0
+    last_id = None
+    while True:
+        query = select(companies.c.id).order_by(companies.c.id).limit(chunk_size)
+        if last_id is not None:
+            query = query.where(companies.c.id > last_id)
+        ids = db.scalars(query).all()
+        if not ids:
+            break
+
+        recompute(db, ids)
+        db.commit()
+        scanned += len(ids)
+        last_id = ids[-1]
+
+    return scanned
@@ -0,0 +1,128 @@
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+from app.schemas.request import RiskInputsSchema
+
+
+class RuleSetError(ValueError):
+    """
+    El archivo de reglas no es válido (formato, tipo de regla o campo desconocido).
+    """
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """
+    Conjunto de reglas de riesgo ya compilado.
+    score evalúa un RiskInputsSchema y score_columnar un lote en formato columnar
+    (diccionario campo -> secuencia de valores).
+    """
+    version: str
+    rules: tuple[dict, ...]
+    score: Callable[[RiskInputsSchema], int]
+    score_columnar: Callable[[dict[str, Any]], np.ndarray]
+
+
+def _as_int_array(values, upper: int | None) -> np.ndarray:
+    # Se acota antes de convertir a int64 para que valores enormes no desborden
+    if isinstance(values, np.ndarray):
+        return values.astype(np.int64) if upper is None else np.minimum(values, upper).astype(np.int64)
+    if upper is None:
+        return np.asarray(values, dtype=np.int64)
+    return np.array([min(int(v), upper) for v in values], dtype=np.int64)
+
+
+def _flag(rule: dict) -> tuple[str, Callable]:
+    field, points = rule["field"], rule["points"]
+    expression = f"({points} if inputs.{field} else 0)"
+    return expression, lambda columns: np.asarray(columns[field], dtype=bool) * points
+
+
+def _per_unit(rule: dict) -> tuple[str, Callable]:
+    field, points, cap = rule["field"], rule["points"], rule.get("cap")
+    if cap is None:
+        return f"(inputs.{field} * {points})", lambda columns: _as_int_array(columns[field], None) * points
+
+    units_cap = math.ceil(cap / points) if points > 0 else 0
+    expression = f"min(inputs.{field} * {points}, {cap})"
+    return expression, lambda columns: np.minimum(_as_int_array(columns[field], units_cap) * points, cap)
+
+
+# Tipos de regla disponibles: nombre -> (tipo de campo requerido, compilador)
+RULE_TYPES: dict[str, tuple[type, Callable[[dict], tuple[str, Callable]]]] = {
+    "flag": (bool, _flag),
+    "per_unit": (int, _per_unit),
+}
+
+
+def register_rule_type(name: str, field_type: type, compiler: Callable[[dict], tuple[str, Callable]]) -> None:
+    """
+    Registra un nuevo tipo de regla. El compilador recibe la regla y devuelve la expresión Python
+    (sobre `inputs`) para el cálculo individual y una función para el cálculo columnar.
+    """
+    RULE_TYPES[name] = (field_type, compiler)
+
+
+def _validate_rule(rule: Any) -> dict:
+    if not isinstance(rule, dict) or rule.get("type") not in RULE_TYPES:
+        raise RuleSetError(f"Tipo de regla desconocido: {rule!r}")
+
+    field_type, _ = RULE_TYPES[rule["type"]]
+    field = rule.get("field")
+    model_field = RiskInputsSchema.model_fields.get(field) if isinstance(field, str) else None
+    if model_field is None or model_field.annotation is not field_type:
+        raise RuleSetError(f"Campo inválido para una regla '{rule['type']}': {field!r}")
+
+    for key in ("points", "cap"):
+        value = rule.get(key)
+        if key == "cap" and value is None:
+            continue
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise RuleSetError(f"'{key}' debe ser un entero mayor o igual a 0 en la regla {rule!r}")
+    return rule
+
+
+def compile_ruleset(definition: dict) -> RuleSet:
+    """
+    Valida un conjunto de reglas y lo compila una sola vez a una función Python equivalente a
+    escribir las reglas a mano, sin interpretar la definición en cada cálculo.
+    """
+    version = definition.get("version") if isinstance(definition, dict) else None
+    raw_rules = definition.get("rules") if isinstance(definition, dict) else None
+    if not isinstance(version, str) or not version or not isinstance(raw_rules, list):
+        raise RuleSetError("El conjunto de reglas debe tener 'version' (texto) y 'rules' (lista).")
+
+    rules = tuple(_validate_rule(rule) for rule in raw_rules)
+    compiled = [RULE_TYPES[rule["type"]][1](rule) for rule in rules]
+
+    # Los campos y números ya fueron validados, así que el código generado es seguro
+    expression = " + ".join(expr for expr, _ in compiled) or "0"
+    namespace: dict[str, Any] = {}
+    exec(compile(f"def score(inputs):\n    return {expression}\n", f"<ruleset {version}>", "exec"), namespace)
+
+    columnar_terms = [term for _, term in compiled]
+
+    def score_columnar(columns: dict[str, Any]) -> np.ndarray:
+        size = len(next(iter(columns.values()))) if columns else 0
+        total = np.zeros(size, dtype=np.int64)
+        for term in columnar_terms:
+            total += term(columns)
+        return total
+
+    return RuleSet(version=version, rules=rules, score=namespace["score"], score_columnar=score_columnar)
+
+
+def load_ruleset(path: str | Path) -> RuleSet:
+    """
+    Lee y compila un archivo JSON de reglas.
+    """
+    try:
+        definition = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        raise RuleSetError(f"No se pudo leer el archivo de reglas '{path}': {e}")
+    return compile_ruleset(definition)
@@ -0,0 +1,76 @@
+from sqlalchemy import ColumnElement, case, func, literal, literal_column, or_
+from sqlalchemy.orm import Session
+
+from app.models import company as company_model
+
+Company = company_model.Company
+
+# Configuración de texto de Postgres: sin stemming ni stopwords, los nombres de compañías
+# no son lenguaje natural. La expresión debe coincidir con la del índice ix_companies_search_tsv.
+TS_CONFIG = literal_column("'simple'")
+
+
+def company_tsvector() -> ColumnElement:
+    return func.to_tsvector(
+        TS_CONFIG, Company.name + literal_column("' '") + func.coalesce(Company.tax_id, literal_column("''"))
+    )
+
+
+def _escape_like(value: str) -> str:
+    # El patrón se arma en Python (y no con || en SQL) para que el planificador vea una constante
+    return value.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def company_search_filter(db: Session, q: str) -> ColumnElement:
+    """
+    Condición de búsqueda de compañías por nombre o tax_id.
+    En Postgres combina texto completo (tsvector + GIN), similitud de trigramas (pg_trgm) y
+    subcadena en el nombre, más prefijo de tax_id (índice text_pattern_ops); cada rama tiene
+    su índice y el planificador las combina con un BitmapOr. En otros motores (SQLite en los
+    tests) se reduce a subcadena en el nombre o prefijo de tax_id.
+    """
+    q = q.strip()
+    pattern = _escape_like(q)
+    conditions = [
+        Company.name.ilike(f"%{pattern}%", escape="/"),
+        Company.tax_id.like(f"{pattern}%", escape="/"),
+    ]
+    if _is_postgres(db):
+        conditions += [
+            company_tsvector().op("@@")(func.websearch_to_tsquery(TS_CONFIG, q)),
+            Company.name.op("%")(q),
+        ]
+    return or_(*conditions)
+
+
+def company_search_rank(db: Session, q: str) -> ColumnElement:
+    """
+    Relevancia de una compañía para la búsqueda q (mayor es mejor).
+    En Postgres es el máximo entre ts_rank y la similitud de trigramas; en otros motores se
+    aproxima con coincidencia exacta > prefijo > subcadena.
+    """
+    q = q.strip()
+    exact = case(
+        (func.lower(Company.name) == q.lower(), 1.0),
+        (Company.tax_id == q, 1.0),
+        else_=0.0,
+    )
+    if _is_postgres(db):
+        return func.greatest(
+            exact,
+            func.ts_rank(company_tsvector(), func.websearch_to_tsquery(TS_CONFIG, q)),
+            func.similarity(Company.name, q),
+        )
+    pattern = _escape_like(q)
+    return func.max(
+        exact,
+        case(
+            (Company.name.ilike(f"{pattern}%", escape="/"), 0.75),
+            (Company.tax_id.like(f"{pattern}%", escape="/"), 0.75),
+            else_=literal(0.5),
+        ),
+    )
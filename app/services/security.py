@@ -1,16 +1,50 @@
+import time
 from datetime import datetime, timedelta, timezone
-from jose import jwt
+from jose import JWTError, jwt
 from app.config import settings
+from app.services.cache import TTLCache
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+try:
+    import jwt as pyjwt
+except ImportError:  # PyJWT es opcional: solo se necesita con JWT_BACKEND=pyjwt
+    pyjwt = None
+
+# Errores de verificación de ambas librerías JWT
+_TOKEN_ERRORS = (JWTError,) if pyjwt is None else (JWTError, pyjwt.PyJWTError)
+
+# Los hashes con un costo distinto a BCRYPT_ROUNDS se marcan para recalcular (needs_update)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# Tokens ya verificados (token -> claims). Cada entrada vence junto con el "exp" del token
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAXSIZE, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
+class InvalidTokenError(ValueError):
+    """
+    El token JWT no se pudo verificar: firma inválida, mal formado o expirado.
+    """
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Verifica la contraseña y, si el hash quedó desactualizado, devuelve uno nuevo con el costo vigente.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def _use_pyjwt() -> bool:
+    if settings.JWT_BACKEND == "pyjwt":
+        if pyjwt is None:
+            raise RuntimeError("JWT_BACKEND=pyjwt requiere instalar PyJWT.")
+        return True
+    return False
+
 def create_access_token(data: dict):
     """
     Crea un nuevo token de acceso JWT a partir de los datos proporcionados.
@@ -20,6 +54,32 @@ def create_access_token(data: dict):
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
 
+    if _use_pyjwt():
+        return pyjwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verifica la firma y la expiración de un token y devuelve sus claims.
+    Un token ya verificado se sirve desde token_cache hasta su "exp", sin repetir el HMAC.
+    Los claims devueltos se comparten entre peticiones: no se deben modificar.
+    """
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+
+    try:
+        if _use_pyjwt():
+            claims = pyjwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        else:
+            claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except _TOKEN_ERRORS as e:
+        raise InvalidTokenError(str(e))
+
+    exp = claims.get("exp")
+    ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+    if ttl is None or ttl > 0:
+        token_cache.set(token, claims, ttl=ttl)
+    return claims
@@ -0,0 +1,124 @@
+import uuid
+from collections import Counter
+from typing import Iterable
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.dialect import dialect_insert
+from app.models import request as request_model
+from app.models.enums import StatusRequestEnum
+from app.models.request_stats import RequestStat
+
+# Ancho de cada tramo del histograma de risk_score
+RISK_BUCKET_SIZE = 20
+
+StatKey = tuple[uuid.UUID, str, int]
+
+
+def risk_bucket(risk_score: int | None) -> int:
+    """
+    Límite inferior del tramo de risk_score (-1 para solicitudes sin score).
+    """
+    if risk_score is None:
+        return -1
+    return (risk_score // RISK_BUCKET_SIZE) * RISK_BUCKET_SIZE
+
+
+def stat_key(company_id: uuid.UUID, status: str | StatusRequestEnum, risk_score: int | None) -> StatKey:
+    return company_id, StatusRequestEnum(status).value, risk_bucket(risk_score)
+
+
+def apply_deltas(db: Session, deltas: Counter | dict[StatKey, int]) -> None:
+    """
+    Suma (o resta) conteos en la tabla de agregados, dentro de la transacción en curso.
+    Se usa un upsert para que dos escrituras concurrentes sobre el mismo tramo no choquen.
+    """
+    rows = [
+        {"company_id": company_id, "status": status, "risk_bucket": bucket, "count": delta}
+        for (company_id, status, bucket), delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+
+    statement = dialect_insert(db)(RequestStat)
+    statement = statement.on_conflict_do_update(
+        index_elements=[RequestStat.company_id, RequestStat.status, RequestStat.risk_bucket],
+        set_={"count": RequestStat.count + statement.excluded.count},
+    )
+    db.execute(statement, rows)
+
+
+def record_change(db: Session, removed: Iterable[StatKey] = (), added: Iterable[StatKey] = ()) -> None:
+    """
+    Registra solicitudes que salen (removed) o entran (added) de cada tramo.
+    """
+    deltas: Counter = Counter()
+    for key in removed:
+        deltas[key] -= 1
+    for key in added:
+        deltas[key] += 1
+    apply_deltas(db, deltas)
+
+
+def get_stats(db: Session, company_id: uuid.UUID | None = None) -> dict:
+    """
+    Lee los agregados: totales por estado, histograma de risk_score y desglose por compañía.
+    El costo depende del número de compañías y tramos, no del tamaño de la tabla requests.
+    """
+    query = select(RequestStat).where(RequestStat.count != 0)
+    if company_id is not None:
+        query = query.where(RequestStat.company_id == company_id)
+
+    by_status: Counter = Counter()
+    by_bucket: Counter = Counter()
+    by_company: dict[uuid.UUID, Counter] = {}
+    for stat in db.scalars(query):
+        by_status[stat.status] += stat.count
+        by_bucket[stat.risk_bucket] += stat.count
+        by_company.setdefault(stat.company_id, Counter())[stat.status] += stat.count
+
+    return {
+        "total": sum(by_status.values()),
+        "by_status": {status.value: by_status.get(status.value, 0) for status in StatusRequestEnum},
+        "by_risk_bucket": [
+            {
+                "min": bucket if bucket >= 0 else None,
+                "max": bucket + RISK_BUCKET_SIZE - 1 if bucket >= 0 else None,
+                "count": count,
+            }
+            for bucket, count in sorted(by_bucket.items())
+        ],
+        "by_company": [
+            {"company_id": cid, "total": sum(counts.values()), "by_status": dict(counts)}
+            for cid, counts in by_company.items()
+        ],
+    }
+
+
+def rebuild_stats(db: Session) -> None:
+    """
+    Reconstruye la tabla de agregados desde cero a partir de requests (reparación).
+    """
+    bucket = case(
+        (request_model.Request.risk_score.is_(None), -1),
+        else_=(request_model.Request.risk_score // RISK_BUCKET_SIZE) * RISK_BUCKET_SIZE,
+    )
+    grouped = db.execute(
+        select(
+            request_model.Request.company_id,
+            request_model.Request.status,
+            bucket.label("risk_bucket"),
+            func.count().label("count"),
+        ).group_by(request_model.Request.company_id, request_model.Request.status, bucket)
+    ).all()
+
+    db.execute(delete(RequestStat))
+    rows = [
+        {"company_id": row.company_id, "status": StatusRequestEnum(row.status).value, "risk_bucket": row.risk_bucket, "count": row.count}
+        for row in grouped
+    ]
+    if rows:
+        db.execute(insert(RequestStat), rows)
+    db.commit()
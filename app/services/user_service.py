@@ -1,7 +1,12 @@
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.models import user as user_model
 from app.schemas import user as user_schema
 from app.services import security as security_service
+from app.services.cache import TTLCache
+
+# Caché de usuarios autenticados, indexada por el "sub" (email) del token
+principal_cache = TTLCache(maxsize=settings.AUTH_CACHE_MAXSIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
 
 def get_user_by_email(db: Session, email: str) -> user_model.User | None:
     """
@@ -9,13 +14,58 @@ def get_user_by_email(db: Session, email: str) -> user_model.User | None:
     """
     return db.query(user_model.User).filter(user_model.User.email == email).first()
 
-def create_user(db: Session, user: user_schema.UserCreate) -> user_model.User:
+def get_cached_user_by_email(db: Session, email: str) -> user_model.User | None:
+    """
+    Igual que get_user_by_email, pero consulta primero la caché de usuarios autenticados.
+    El usuario cacheado se desliga de la sesión para poder compartirlo entre peticiones.
+    """
+    user = principal_cache.get(email)
+    if user is not None:
+        return user
+
+    user = get_user_by_email(db, email=email)
+    if user is not None:
+        db.expunge(user)
+        principal_cache.set(email, user)
+    return user
+
+def invalidate_principal(email: str) -> None:
+    """
+    Descarta el usuario cacheado para ese email. Todo cambio de un usuario (rol, contraseña,
+    borrado) debe llamar a esta función para no servir un usuario obsoleto durante el TTL.
+    """
+    principal_cache.invalidate(email)
+
+def update_user_role(db: Session, user: user_model.User, role: str) -> user_model.User:
+    """
+    Cambia el rol de un usuario e invalida su entrada en la caché de usuarios autenticados.
+    """
+    user = db.merge(user)
+    user.role = role
+    db.commit()
+    db.refresh(user)
+    invalidate_principal(user.email)
+    return user
+
+def update_password_hash(db: Session, user: user_model.User, password_hash: str) -> user_model.User:
+    """
+    Reemplaza el hash de la contraseña (por ejemplo, al recalcularlo con un costo nuevo).
+    """
+    user = db.merge(user)
+    user.password_hash = password_hash
+    db.commit()
+    invalidate_principal(user.email)
+    return user
+
+def create_user(db: Session, user: user_schema.UserCreate, password_hash: str | None = None) -> user_model.User:
     """
     Crea un nuevo usuario en la base de datos.
+    Se puede entregar el hash ya calculado para no ejecutar bcrypt dentro de la sesión.
     """
-    hashed_password = security_service.get_password_hash(user.password)
+    hashed_password = password_hash or security_service.get_password_hash(user.password)
     db_user = user_model.User(email=user.email, password_hash=hashed_password)
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
-    return db_user
\ No newline at end of file
+    invalidate_principal(db_user.email)
+    return db_user
@@ -0,0 +1,59 @@
+"""
+Microbenchmark de la dependencia de autenticación (deps.get_current_user) por sí sola:
+verificación del JWT con python-jose y con PyJWT, con y sin la caché de tokens verificados.
+El usuario se sirve siempre desde la caché de usuarios, así que no se mide la base de datos.
+
+Uso:
+    python -m benchmarks.bench_auth --number 5000
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.api import deps
+from app.config import settings
+from app.models.user import User
+from app.services import security, user_service
+
+EMAIL = "bench@example.com"
+
+
+async def run_db_inline(db, fn, *args, **kwargs):
+    # Con la caché de usuarios llena la función de servicio no toca la sesión: se llama en línea
+    # para medir solo la dependencia, sin el salto al threadpool
+    return fn(db, *args, **kwargs)
+
+
+async def per_call_us(token: str, number: int) -> float:
+    # La dependencia solo usa de la sesión su info (la marca de read-your-writes)
+    db = SimpleNamespace(info={})
+    start = time.perf_counter()
+    for _ in range(number):
+        await deps.get_current_user(token=token, db=db)
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=5000)
+    args = parser.parse_args()
+
+    user_service.principal_cache.set(EMAIL, User(email=EMAIL, password_hash="x", role="analyst"))
+    deps.run_db = run_db_inline
+
+    print(f"{'backend':<8} {'caché':<6} {'µs/llamada':>11}")
+    # PyJWT es opcional (JWT_BACKEND=pyjwt): si no está instalada se mide solo python-jose
+    for backend in ("jose", "pyjwt") if security.pyjwt is not None else ("jose",):
+        settings.JWT_BACKEND = backend
+        token = security.create_access_token({"sub": EMAIL, "role": "analyst"})
+        for cache_size in (0, settings.TOKEN_CACHE_MAXSIZE):
+            security.token_cache.clear()
+            security.token_cache.maxsize = cache_size
+            us = asyncio.run(per_call_us(token, args.number))
+            print(f"{backend:<8} {'sí' if cache_size else 'no':<6} {us:>11.1f}")
+
+
+
+if __name__ == "__main__":
+    main()
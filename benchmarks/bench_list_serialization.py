@@ -0,0 +1,91 @@
+"""
+Mide el CPU por página del listado de solicitudes con la ruta anterior (objetos ORM con
+joinedload validados por PaginatedResponse[RequestRead]) frente a la ruta rápida (filas Core
+convertidas a dicts y serializadas con orjson).
+
+Uso:
+    python -m benchmarks.bench_list_serialization --requests 2000 --page-size 100
+"""
+import argparse
+import json
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.responses import paginated_response
+from app.db.base import Base
+from app.models import request as request_model
+from app.schemas.common import PaginatedResponse
+from app.schemas.company import CompanyCreate
+from app.schemas.request import RequestCreate, RequestRead, RiskInputsSchema
+from app.services import company_service, request_service
+
+
+def seed(db, n_requests: int) -> None:
+    company = company_service.create_company(db, CompanyCreate(name="Bench Co", tax_id="76.000.000-0"))
+    rows = [
+        (i, RequestCreate(company_id=company.id, risk_inputs=RiskInputsSchema(pep_flag=i % 2 == 0, late_payments=i % 5)))
+        for i in range(n_requests)
+    ]
+    request_service.create_requests_bulk(db, rows)
+
+
+def orm_page(db, page_size: int) -> bytes:
+    # Ruta anterior: objetos ORM + validación from_attributes del response_model
+    items = (
+        request_service.build_requests_query(db)
+        .order_by(request_model.Request.created_at.desc(), request_model.Request.id.desc())
+        .limit(page_size + 1)
+        .all()
+    )
+    response = PaginatedResponse[RequestRead](
+        total=None, page=1, page_size=page_size, items=items[:page_size], has_next=len(items) > page_size
+    )
+    return response.model_dump_json().encode()
+
+
+def fast_page(db, page_size: int) -> bytes:
+    result = request_service.get_requests(db, limit=page_size, total_mode="none")
+    return paginated_response(result, page=1, page_size=page_size).body
+
+
+def cpu_ms(fn, session_factory, page_size: int, iterations: int) -> float:
+    best = float("inf")
+    for _ in range(iterations):
+        db = session_factory()
+        try:
+            start = time.process_time()
+            fn(db, page_size)
+            best = min(best, time.process_time() - start)
+        finally:
+            db.close()
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    with session_factory() as db:
+        seed(db, args.requests)
+        # Mismo contenido en ambas rutas (la ruta anterior no calculaba next_cursor)
+        assert json.loads(orm_page(db, args.page_size))["items"] == json.loads(fast_page(db, args.page_size))["items"]
+
+    orm = cpu_ms(orm_page, session_factory, args.page_size, args.iterations)
+    fast = cpu_ms(fast_page, session_factory, args.page_size, args.iterations)
+
+    print(f"Página de {args.page_size} solicitudes (mejor de {args.iterations}, CPU del proceso)")
+    print(f"{'ORM + response_model':<22} {orm:>8.2f} ms")
+    print(f"{'filas Core + orjson':<22} {fast:>8.2f} ms  ({(fast / orm - 1) * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
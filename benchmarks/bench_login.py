@@ -0,0 +1,132 @@
+"""
+Mide el throughput de /auth/login y la latencia de un endpoint liviano durante una ráfaga de
+logins, con bcrypt en el threadpool (workers=0) y en el pool de procesos de hashing.
+
+Uso:
+    python -m benchmarks.bench_login --logins 200 --concurrency 50 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api import auth
+from app.api.deps import get_db
+from app.db.base import Base
+from app.main import app
+from app.schemas.user import UserCreate
+from app.services import hashing, user_service
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[max(int(len(values) * fraction) - 1, 0)] * 1000
+
+
+async def drive(logins: int, concurrency: int) -> dict:
+    """
+    Lanza `logins` logins con `concurrency` en vuelo y, en paralelo, sondea GET / para medir
+    cuánto afecta la ráfaga al resto de la API.
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for i in range(logins):
+            queue.put_nowait(i)
+        probe_latencies: list[float] = []
+        done = asyncio.Event()
+
+        async def login_worker():
+            while not queue.empty():
+                queue.get_nowait()
+                response = await client.post("/auth/login", data={"username": EMAIL, "password": PASSWORD})
+                response.raise_for_status()
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                (await client.get("/")).raise_for_status()
+                probe_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login_worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+
+    return {
+        "logins_s": logins / elapsed,
+        "probe_p50_ms": statistics.median(probe_latencies) * 1000,
+        "probe_p95_ms": percentile(probe_latencies, 0.95),
+    }
+
+
+def run(url: str, workers: int, max_concurrency: int, logins: int, concurrency: int) -> dict:
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    hasher = hashing.PasswordHasher(workers=workers, max_concurrency=max_concurrency)
+    original = hashing.password_hasher
+    # El router de auth importa el objeto, así que se reemplaza en ambos módulos
+    hashing.password_hasher = auth.password_hasher = hasher
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        result = asyncio.run(drive(logins, concurrency))
+        result.update(hasher.metrics.snapshot())
+        return result
+    finally:
+        app.dependency_overrides.clear()
+        hashing.password_hasher = auth.password_hasher = original
+        hasher.shutdown()
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.TemporaryDirectory()
+    url = f"sqlite:///{os.path.join(tmp_dir.name, 'bench.db')}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        user_service.create_user(db, UserCreate(email=EMAIL, password=PASSWORD))
+    engine.dispose()
+
+    results = {
+        "threadpool": run(url, 0, args.workers, args.logins, args.concurrency),
+        f"procesos ({args.workers})": run(url, args.workers, args.workers, args.logins, args.concurrency),
+    }
+
+    print(f"{'modo':<14} {'logins/s':>9} {'GET / p50':>10} {'GET / p95':>10} {'cola avg ms':>12} {'cola max ms':>12}")
+    for mode, r in results.items():
+        print(
+            f"{mode:<14} {r['logins_s']:>9.1f} {r['probe_p50_ms']:>10.1f} {r['probe_p95_ms']:>10.1f}"
+            f" {r['queue_avg_ms']:>12.1f} {r['queue_max_ms']:>12.1f}"
+        )
+    tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Mide el costo de la instrumentación (MetricsMiddleware + eventos de SQLAlchemy) comparando el
+CPU por petición con y sin ella, en rondas alternadas para repartir el ruido entre ambos modos.
+
+Uso:
+    python -m benchmarks.bench_metrics_overhead --requests 300 --rounds 5
+"""
+import argparse
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.deps import get_db
+from app.api.middleware import MetricsMiddleware
+from app.db import instrumentation
+from app.db.base import Base
+from app.main import app
+from app.schemas.user import UserCreate
+from app.services import user_service
+from seed import seed_scaled
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+LISTENERS = [
+    ("before_cursor_execute", instrumentation._start_timer),
+    ("after_cursor_execute", instrumentation._stop_timer),
+    ("handle_error", instrumentation._discard_timer),
+]
+
+
+def set_instrumentation(enabled: bool) -> None:
+    """
+    Agrega o quita el middleware y los eventos; el stack de middlewares se reconstruye en la
+    siguiente petición.
+    """
+    app.user_middleware = [m for m in app.user_middleware if m.cls is not MetricsMiddleware]
+    for name, fn in LISTENERS:
+        if event.contains(Engine, name, fn):
+            event.remove(Engine, name, fn)
+    if enabled:
+        app.user_middleware.insert(0, _metrics_middleware)
+        for name, fn in LISTENERS:
+            event.listen(Engine, name, fn)
+    app.middleware_stack = None
+
+
+_metrics_middleware = next(m for m in app.user_middleware if m.cls is MetricsMiddleware)
+
+
+def cpu_per_request_ms(client: TestClient, headers: dict, paths: list[str], total: int) -> float:
+    start = time.process_time()
+    for i in range(total):
+        client.get(paths[i % len(paths)], headers=headers).raise_for_status()
+    return (time.process_time() - start) * 1000 / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300, help="Peticiones por ronda y modo")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with factory() as db:
+        user_service.create_user(db, UserCreate(email=EMAIL, password=PASSWORD))
+        company_ids = seed_scaled(db, 50, 2000)
+
+    def override_get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    token = client.post("/auth/login", data={"username": EMAIL, "password": PASSWORD}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    paths = ["/requests/?page_size=20", "/companies/?page_size=20", *(f"/companies/{cid}" for cid in company_ids[:5])]
+
+    results = {True: [], False: []}
+    try:
+        for _ in range(args.rounds):
+            for enabled in (False, True):
+                set_instrumentation(enabled)
+                results[enabled].append(cpu_per_request_ms(client, headers, paths, args.requests))
+    finally:
+        set_instrumentation(True)
+        app.dependency_overrides.clear()
+
+    without, with_metrics = min(results[False]), min(results[True])
+    print(f"CPU por petición (mejor de {args.rounds} rondas de {args.requests})")
+    print(f"{'sin instrumentación':<22} {without:>8.3f} ms")
+    print(f"{'con instrumentación':<22} {with_metrics:>8.3f} ms  ({(with_metrics / without - 1) * 100:+.2f}%)")
+
+
+if __name__ == "__main__":
+    main()
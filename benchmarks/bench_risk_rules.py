@@ -0,0 +1,66 @@
+"""
+Mide la sobrecarga del motor de reglas compilado frente a la función de riesgo escrita a mano.
+
+Uso:
+    python -m benchmarks.bench_risk_rules --max-overhead 10
+
+Termina con código 1 si el evaluador compilado supera el porcentaje de sobrecarga permitido.
+"""
+import argparse
+import sys
+import timeit
+
+from app.schemas.request import RiskInputsSchema
+from app.services import risk as risk_service
+
+
+def hand_written_score(risk_inputs: RiskInputsSchema) -> int:
+    # Copia de las reglas originales, escritas a mano, como línea base
+    score = 0
+    if risk_inputs.pep_flag:
+        score += 60
+    if risk_inputs.sanction_list:
+        score += 40
+    score += min(risk_inputs.late_payments * 10, 30)
+    return score
+
+
+def best_ns(fn, inputs, number: int, repeat: int) -> float:
+    return min(timeit.repeat(lambda: fn(inputs), number=number, repeat=repeat)) / number * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--max-overhead", type=float, default=10.0, help="Sobrecarga máxima permitida (%%)")
+    args = parser.parse_args()
+
+    ruleset = risk_service.get_ruleset()
+    inputs = RiskInputsSchema(pep_flag=True, sanction_list=False, late_payments=2)
+    assert ruleset.score(inputs) == hand_written_score(inputs)
+
+    # Se intercalan las mediciones para que el ruido del sistema afecte a todas por igual
+    candidates = {
+        "a mano": hand_written_score,
+        "compilado": ruleset.score,
+        "calculate_risk_score": risk_service.calculate_risk_score,
+    }
+    results = {name: float("inf") for name in candidates}
+    for _ in range(args.repeat):
+        for name, fn in candidates.items():
+            results[name] = min(results[name], best_ns(fn, inputs, args.number, 1))
+
+    baseline = results["a mano"]
+    print(f"Conjunto de reglas: versión {ruleset.version}")
+    for name, ns in results.items():
+        print(f"{name:<22} {ns:>8.1f} ns/llamada  ({(ns / baseline - 1) * 100:+.1f}%)")
+
+    overhead = (results["compilado"] / baseline - 1) * 100
+    if overhead > args.max_overhead:
+        print(f"El evaluador compilado supera la sobrecarga permitida ({overhead:.1f}% > {args.max_overhead}%)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
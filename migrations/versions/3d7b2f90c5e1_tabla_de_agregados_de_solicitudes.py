@@ -0,0 +1,48 @@
+"""Tabla de agregados de solicitudes
+
+Revision ID: 3d7b2f90c5e1
+Revises: 9a4e1f6b2c87
+Create Date: 2026-10-18 12:40:05.118274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d7b2f90c5e1'
+down_revision: Union[str, Sequence[str], None] = '9a4e1f6b2c87'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'request_stats',
+        sa.Column('company_id', sa.UUID(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('risk_bucket', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+        sa.PrimaryKeyConstraint('company_id', 'status', 'risk_bucket')
+    )
+    # Carga inicial de los agregados a partir de las solicitudes existentes
+    op.execute(
+        """
+        INSERT INTO request_stats (company_id, status, risk_bucket, count)
+        SELECT company_id,
+               lower(status::text),
+               CASE WHEN risk_score IS NULL THEN -1 ELSE (risk_score / 20) * 20 END,
+               count(*)
+        FROM requests
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('request_stats')
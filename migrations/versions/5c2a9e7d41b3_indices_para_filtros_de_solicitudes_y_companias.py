@@ -0,0 +1,66 @@
+"""Indices para filtros de solicitudes y companias
+
+Revision ID: 5c2a9e7d41b3
+Revises: 24e8334dad0d
+Create Date: 2026-10-18 10:12:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2a9e7d41b3'
+down_revision: Union[str, Sequence[str], None] = '24e8334dad0d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # CONCURRENTLY no corre dentro de una transacción y no bloquea las escrituras mientras se construye
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_requests_company_id', 'requests', ['company_id'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_requests_created_at_id', 'requests', ['created_at', 'id'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_requests_status_created_at', 'requests', ['status', 'created_at', 'id'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_requests_risk_score_created_at', 'requests', ['risk_score', 'created_at'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+        op.create_index(
+            'ix_companies_active_name_id', 'companies', ['name', 'id'], unique=False,
+            postgresql_where=sa.text('deleted_at IS NULL'), postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_companies_name_trgm', 'companies', ['name'], unique=False,
+            postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for index_name, table_name in (
+            ('ix_companies_name_trgm', 'companies'),
+            ('ix_companies_active_name_id', 'companies'),
+            ('ix_requests_risk_score_created_at', 'requests'),
+            ('ix_requests_status_created_at', 'requests'),
+            ('ix_requests_created_at_id', 'requests'),
+            ('ix_requests_company_id', 'requests'),
+        ):
+            op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,28 @@
+"""Añade ruleset_version a Request
+
+Revision ID: 9a4e1f6b2c87
+Revises: 5c2a9e7d41b3
+Create Date: 2026-10-18 11:02:17.904311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4e1f6b2c87'
+down_revision: Union[str, Sequence[str], None] = '5c2a9e7d41b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('requests', sa.Column('ruleset_version', sa.String(length=50), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('requests', 'ruleset_version')
@@ -0,0 +1,53 @@
+"""Tabla de trabajos en segundo plano
+
+Revision ID: a3f9c2e87d14
+Revises: c58d2a6e91f4
+Create Date: 2026-10-18 21:05:37.614092
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f9c2e87d14'
+down_revision: Union[str, Sequence[str], None] = 'c58d2a6e91f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('kind', sa.String(length=50), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', 'CANCELLED', name='jobstatusenum'),
+            nullable=False,
+        ),
+        sa.Column('params', sa.JSON(), nullable=True),
+        sa.Column('processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total', sa.Integer(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('cancel_requested', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('created_by', sa.UUID(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_kind_status', 'jobs', ['kind', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_kind_status', table_name='jobs')
+    op.drop_table('jobs')
+    sa.Enum(name='jobstatusenum').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,30 @@
+"""Añade version a Company y Request
+
+Revision ID: b7e3c1d9a205
+Revises: 3d7b2f90c5e1
+Create Date: 2026-10-18 15:12:44.530912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3c1d9a205'
+down_revision: Union[str, Sequence[str], None] = '3d7b2f90c5e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('companies', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('requests', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('requests', 'version')
+    op.drop_column('companies', 'version')
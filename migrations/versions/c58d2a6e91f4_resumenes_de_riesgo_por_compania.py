@@ -0,0 +1,65 @@
+"""Resumenes de riesgo por compania
+
+Revision ID: c58d2a6e91f4
+Revises: e41f8a7c3b62
+Create Date: 2026-10-18 17:21:48.902316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c58d2a6e91f4'
+down_revision: Union[str, Sequence[str], None] = 'e41f8a7c3b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Columnas con NULL o valor por defecto constante: no reescriben la tabla. Los valores se
+    # cargan después con rebuild_rollups.py, por bloques y sin bloquear companies entera
+    op.add_column('companies', sa.Column('latest_risk_score', sa.Integer(), nullable=True))
+    op.add_column('companies', sa.Column('max_risk_score', sa.Integer(), nullable=True))
+    op.add_column('companies', sa.Column('open_requests', sa.Integer(), nullable=False, server_default='0'))
+
+    # CONCURRENTLY no corre dentro de una transacción y no bloquea las escrituras mientras se construye
+    with op.get_context().autocommit_block():
+        # El índice compuesto reemplaza al de company_id y además da la última solicitud de cada compañía
+        op.create_index(
+            'ix_requests_company_id_created_at', 'requests', ['company_id', 'created_at', 'id'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_requests_company_id', table_name='requests', postgresql_concurrently=True, if_exists=True
+        )
+        op.create_index(
+            'ix_companies_active_open_requests', 'companies', ['open_requests', 'id'], unique=False,
+            postgresql_where=sa.text('deleted_at IS NULL'), postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_companies_active_max_risk_score ON companies "
+            "(max_risk_score DESC NULLS LAST, id DESC) WHERE deleted_at IS NULL"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_requests_company_id', 'requests', ['company_id'], unique=False,
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_requests_company_id_created_at', table_name='requests', postgresql_concurrently=True, if_exists=True
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_companies_active_max_risk_score")
+        op.drop_index(
+            'ix_companies_active_open_requests', table_name='companies', postgresql_concurrently=True, if_exists=True
+        )
+    op.drop_column('companies', 'open_requests')
+    op.drop_column('companies', 'max_risk_score')
+    op.drop_column('companies', 'latest_risk_score')
@@ -0,0 +1,42 @@
+"""Indices de busqueda de companias
+
+Revision ID: e41f8a7c3b62
+Revises: b7e3c1d9a205
+Create Date: 2026-10-18 16:03:27.441095
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41f8a7c3b62'
+down_revision: Union[str, Sequence[str], None] = 'b7e3c1d9a205'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY no corre dentro de una transacción y no bloquea las escrituras mientras se construye
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_companies_tax_id_prefix', 'companies', ['tax_id'], unique=False,
+            postgresql_ops={'tax_id': 'text_pattern_ops'}, postgresql_concurrently=True, if_not_exists=True,
+        )
+        # Misma expresión que search.company_tsvector()
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_companies_search_tsv ON companies "
+            "USING gin (to_tsvector('simple', name || ' ' || coalesce(tax_id, '')))"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_companies_search_tsv")
+        op.drop_index(
+            'ix_companies_tax_id_prefix', table_name='companies', postgresql_concurrently=True, if_exists=True
+        )
@@ -0,0 +1,26 @@
+import argparse
+import time
+
+from app.db.db import SessionLocal
+from app.services import rollup_service
+
+
+def rebuild(chunk_size: int):
+    """
+    Reconstruye los resúmenes de riesgo de todas las compañías desde la tabla requests.
+    """
+    db = SessionLocal()
+    try:
+        print(f"Reconstruyendo resúmenes en bloques de {chunk_size} compañías...")
+        start = time.perf_counter()
+        scanned = rollup_service.rebuild_rollups(db, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - start
+        print(f"Compañías revisadas: {scanned}. Tiempo: {elapsed:.1f} s.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstruye los resúmenes de riesgo de las compañías.")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    rebuild(args.chunk_size)
@@ -0,0 +1,26 @@
+import argparse
+import time
+
+from app.db.db import SessionLocal
+from app.services import request_service
+
+
+def rescore(chunk_size: int):
+    """
+    Recalcula el risk_score de todas las solicitudes con las reglas vigentes.
+    """
+    db = SessionLocal()
+    try:
+        print(f"Recalculando risk_score en bloques de {chunk_size} solicitudes...")
+        start = time.perf_counter()
+        scanned, updated = request_service.rescore_requests(db, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - start
+        print(f"Solicitudes revisadas: {scanned}. Actualizadas: {updated}. Tiempo: {elapsed:.1f} s.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalcula el risk_score de todas las solicitudes.")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+    rescore(args.chunk_size)
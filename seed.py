@@ -1,10 +1,87 @@
+import argparse
+import random
 import uuid
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+from app.config import settings
 from app.db.db import SessionLocal
-from app.services import user_service, company_service, request_service
+from app.models import company as company_model, enums as enums_model, request as request_model
+from app.services import user_service, company_service, request_service, rollup_service, stats_service
 from app.schemas.user import UserCreate
 from app.schemas.company import CompanyCreate
 from app.schemas.request import RequestCreate, RiskInputsSchema
 
+# Compañías de ejemplo: seed_data las crea tal cual y seed_scaled las usa como plantilla
+SAMPLE_COMPANIES = [
+    CompanyCreate(name="Fruna", tax_id="76.123.456-7", country="CL"),
+    CompanyCreate(name="Dr. Simi", tax_id="88.888.888-8", country="CL"),
+    CompanyCreate(name="Empresa Chilena", tax_id="99.248.412-K", country="CL"),
+    CompanyCreate(name="Empresa Extranjera", tax_id=None, country="US"),
+    CompanyCreate(name="Acme SpA", tax_id="99.999.999-9", country="US"),
+    CompanyCreate(name="Globex Ltd.", tax_id="85.123.456-7", country="US"),
+    CompanyCreate(name="Initech", tax_id="87.654.321-0", country="US"),
+    CompanyCreate(name="Hooli", tax_id=None, country="CL"),
+]
+
+
+def seed_scaled(db: Session, n_companies: int, n_requests: int, random_seed: int = 0) -> list[uuid.UUID]:
+    """
+    Agrega n_companies compañías sintéticas (variantes numeradas de SAMPLE_COMPANIES) y
+    n_requests solicitudes repartidas entre ellas, con datos reproducibles para la misma semilla.
+    Las solicitudes pasan por la carga masiva de request_service y luego reciben un estado al
+    azar con un UPDATE por clave primaria, por lo que al final se reconstruyen los agregados y
+    los resúmenes por compañía.
+    Se puede correr más de una vez sobre la misma base de datos: la numeración sigue desde las
+    compañías existentes y la semilla se combina con ese punto de partida, así los nombres y
+    los IDs no chocan con los de una corrida anterior.
+    Devuelve los IDs de las compañías creadas.
+    """
+    offset = db.scalar(select(func.count()).select_from(company_model.Company))
+    rng = random.Random(random_seed if offset == 0 else f"{random_seed}:{offset}")
+    chunk_size = settings.BULK_INSERT_CHUNK_SIZE
+
+    companies = []
+    for i in range(offset, offset + n_companies):
+        template = SAMPLE_COMPANIES[i % len(SAMPLE_COMPANIES)]
+        companies.append({
+            "id": uuid.UUID(int=rng.getrandbits(128), version=4),
+            "name": f"{template.name} {i:07d}",
+            "tax_id": f"{rng.randrange(10**8):08d}-{i % 10}" if template.tax_id else None,
+            "country": template.country,
+        })
+    for start in range(0, len(companies), chunk_size):
+        db.execute(insert(company_model.Company), companies[start:start + chunk_size])
+    db.commit()
+
+    company_ids = [company["id"] for company in companies]
+    if not company_ids:
+        return company_ids
+
+    statuses = list(enums_model.StatusRequestEnum)
+    for start in range(0, n_requests, chunk_size):
+        rows = [
+            (i, RequestCreate(
+                company_id=rng.choice(company_ids),
+                risk_inputs=RiskInputsSchema(
+                    pep_flag=rng.random() < 0.2,
+                    sanction_list=rng.random() < 0.05,
+                    late_payments=rng.choice([0, 0, 0, 1, 2, 3, 5, 8]),
+                ),
+            ))
+            for i in range(start, min(start + chunk_size, n_requests))
+        ]
+        results = request_service.create_requests_bulk(db, rows)
+        # Reparte estados para que los filtros por estado tengan resultados
+        db.execute(
+            update(request_model.Request),
+            [{"id": result.id, "status": rng.choice(statuses)} for result in results],
+        )
+    db.commit()
+    stats_service.rebuild_stats(db)
+    rollup_service.rebuild_rollups(db)
+    return company_ids
+
+
 def seed_data():
     """
     Puebla la base de datos con datos iniciales si está vacía.
@@ -23,19 +100,8 @@ def seed_data():
 
         # --- 2. Crear Compañías ---
         print("\nVerificando compañías...")
-        companies_to_create = [
-            CompanyCreate(name="Fruna", tax_id="76.123.456-7", country="CL"),
-            CompanyCreate(name="Dr. Simi", tax_id="88.888.888-8", country="CL"),
-            CompanyCreate(name="Empresa Chilena", tax_id="99.248.412-K", country="CL"),
-            CompanyCreate(name="Empresa Extranjera", tax_id=None, country="US"),
-            CompanyCreate(name="Acme SpA", tax_id="99.999.999-9", country="US"),
-            CompanyCreate(name="Globex Ltd.", tax_id="85.123.456-7", country="US"),
-            CompanyCreate(name="Initech", tax_id="87.654.321-0", country="US"),
-            CompanyCreate(name="Hooli", tax_id=None, country="CL"),
-        ]
-        
         created_companies = {}
-        for company_data in companies_to_create:
+        for company_data in SAMPLE_COMPANIES:
             company = company_service.get_company_by_name(db, name=company_data.name)
             if not company:
                 company = company_service.create_company(db, company=company_data)
@@ -64,4 +130,18 @@ def seed_data():
         db.close()
 
 if __name__ == "__main__":
-    seed_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Puebla la base de datos con datos de ejemplo.")
+    parser.add_argument("--companies", type=int, default=0, help="Compañías sintéticas adicionales")
+    parser.add_argument("--requests", type=int, default=0, help="Solicitudes sintéticas adicionales")
+    parser.add_argument("--random-seed", type=int, default=0)
+    args = parser.parse_args()
+
+    seed_data()
+    if args.companies:
+        db = SessionLocal()
+        try:
+            print(f"\nCreando {args.companies} compañías y {args.requests} solicitudes sintéticas...")
+            seed_scaled(db, args.companies, args.requests, random_seed=args.random_seed)
+            print("Datos sintéticos creados.")
+        finally:
+            db.close()
\ No newline at end of file
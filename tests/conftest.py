@@ -1,10 +1,17 @@
 # tests/conftest.py
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from app.main import app
 from app.api.deps import get_db
+from app.config import settings
+from app.db import routing
+from app.services import company_service, metrics, pagination, security, user_service
 
 from app.db.base import Base
 
@@ -36,6 +43,31 @@ def db_session(db_engine):
         connection.close()
 
 
+@pytest.fixture(scope="function")
+def count_queries(db_engine):
+    """
+    Cuenta las sentencias SQL que llegan al motor de pruebas:
+
+        with count_queries() as statements:
+            client.get(...)
+        assert len(statements) <= 3, statements
+    """
+    @contextmanager
+    def counter():
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db_engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(db_engine, "before_cursor_execute", record)
+
+    return counter
+
+
 @pytest.fixture(scope="function")
 def client(db_session):
     def override_get_db():
@@ -46,4 +78,42 @@ def client(db_session):
 
     app.dependency_overrides[get_db] = override_get_db
     yield TestClient(app)
-    app.dependency_overrides.clear()
\ No newline at end of file
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="function")
+def async_client(monkeypatch):
+    """
+    Cliente que usa AsyncSession (aiosqlite) como en el modo DB_ASYNC.
+    Las tablas se crean dentro del event loop del TestClient, en la primera petición.
+    """
+    # El lifespan corre con el TestClient: la recuperación de trabajos usaría la base de datos real
+    monkeypatch.setattr(settings, "JOB_STALE_SECONDS", None)
+    async_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+    state = {"initialized": False}
+
+    async def override_get_db():
+        if not state["initialized"]:
+            async with async_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            state["initialized"] = True
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # Las cachés en memoria sobreviven entre tests; se limpian para aislar cada prueba
+    user_service.principal_cache.clear()
+    pagination.count_cache.clear()
+    security.token_cache.clear()
+    routing.recent_writers.clear()
+    company_service.company_cache.clear()
+    metrics.reset()
+    yield
@@ -0,0 +1,43 @@
+import json
+
+from fastapi.testclient import TestClient
+
+
+def test_async_session_full_flow(async_client: TestClient):
+    """
+    Prueba el flujo completo (registro, login, compañías y solicitudes) sobre AsyncSession.
+    """
+    async_client.post("/auth/register", json={"email": "async@example.com", "password": "password"})
+    login = async_client.post("/auth/login", data={"username": "async@example.com", "password": "password"})
+    assert login.status_code == 200
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    company = async_client.post("/companies/", headers=headers, json={"name": "Async Corp"})
+    assert company.status_code == 201
+    company_id = company.json()["id"]
+
+    created = async_client.post("/requests/", headers=headers, json={
+        "company_id": company_id,
+        "risk_inputs": {"pep_flag": True, "sanction_list": False, "late_payments": 1}
+    })
+    assert created.status_code == 201
+    assert created.json()["company"]["id"] == company_id
+    assert created.json()["risk_score"] == 70
+
+    updated = async_client.put(f"/requests/{created.json()['id']}", headers=headers, json={
+        "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": 0}
+    })
+    assert updated.status_code == 200
+    assert updated.json()["risk_score"] == 0
+    assert updated.json()["company"]["name"] == "Async Corp"
+
+    listing = async_client.get("/requests/", headers=headers).json()
+    assert listing["total"] == 1
+    assert listing["items"][0]["company"]["id"] == company_id
+
+    export = async_client.get("/requests/export", headers=headers, params={"format": "ndjson"})
+    assert export.status_code == 200
+    assert [json.loads(line)["company_name"] for line in export.text.splitlines()] == ["Async Corp"]
+
+    assert async_client.delete(f"/companies/{company_id}", headers=headers).status_code == 204
+    assert async_client.get(f"/companies/{company_id}", headers=headers).status_code == 404
@@ -1,4 +1,14 @@
+import asyncio
+import time
+
+import pytest
 from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from app.config import settings
+from app.schemas.user import UserCreate
+from app.services import security, user_service
+from app.services.hashing import PasswordHasher
+from app.services.cache import TTLCache
 
 def test_register_user_success(client: TestClient):
     """
@@ -45,4 +55,132 @@ def test_login_success(client: TestClient):
     assert response.status_code == 200
     data = response.json()
     assert "access_token" in data
-    assert data["token_type"] == "bearer"
\ No newline at end of file
+    assert data["token_type"] == "bearer"
+
+def test_current_user_is_cached(client: TestClient, db_session):
+    """
+    Prueba que peticiones repetidas con el mismo token reutilizan el usuario cacheado,
+    y que el cambio de rol invalida la entrada cacheada.
+    """
+    client.post("/auth/register", json={"email": "cache@gmail.com", "password": "testPassword123"})
+    login = client.post("/auth/login", data={"username": "cache@gmail.com", "password": "testPassword123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    # Un analista no puede ver las estadísticas internas
+    assert client.get("/internal/cache", headers=headers).status_code == 403
+
+    user = user_service.get_user_by_email(db_session, email="cache@gmail.com")
+    user_service.update_user_role(db_session, user, "admin")
+
+    client.get("/companies/", headers=headers)
+    client.get("/companies/", headers=headers)
+    response = client.get("/internal/cache", headers=headers)
+
+    assert response.status_code == 200
+    stats = response.json()["principals"]
+    assert stats["misses"] == 2
+    assert stats["hits"] == 2
+
+def test_principal_cache_invalidated_on_user_create(client: TestClient, db_session):
+    """
+    Prueba que crear un usuario invalida una entrada previa para ese email.
+    """
+    user_service.principal_cache.set("invalidate@gmail.com", object())
+    user_service.create_user(db_session, UserCreate(email="invalidate@gmail.com", password="testPassword123"))
+    assert user_service.principal_cache.get("invalidate@gmail.com") is None
+
+def test_ttl_cache_eviction_and_expiry():
+    """
+    Prueba que la caché respeta maxsize (LRU) y el TTL de cada entrada.
+    """
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    cache.set("d", 4, ttl=0)
+    assert cache.get("d") is None
+
+def test_login_rehashes_outdated_password_hash(client: TestClient, db_session):
+    """
+    Prueba que un hash con un costo de bcrypt distinto al configurado se recalcula al iniciar sesión.
+    """
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("testPassword123")
+    user_service.create_user(db_session, UserCreate(email="rehash@gmail.com", password="x"), password_hash=old_hash)
+
+    response = client.post("/auth/login", data={"username": "rehash@gmail.com", "password": "testPassword123"})
+
+    assert response.status_code == 200
+    user = user_service.get_user_by_email(db_session, "rehash@gmail.com")
+    assert user.password_hash != old_hash
+    assert user.password_hash.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert client.post("/auth/login", data={"username": "rehash@gmail.com", "password": "testPassword123"}).status_code == 200
+
+def test_password_hasher_process_pool_metrics():
+    """
+    Prueba el pool de procesos de hashing: resultado correcto y métricas de cola y ejecución.
+    """
+    hasher = PasswordHasher(workers=1, max_concurrency=1)
+
+    async def run():
+        hashes = await asyncio.gather(*(hasher.hash(f"password-{i}") for i in range(2)))
+        return hashes, await hasher.verify_and_update("password-0", hashes[0])
+
+    try:
+        hashes, (verified, new_hash) = asyncio.run(run())
+    finally:
+        hasher.shutdown()
+
+    assert verified and new_hash is None
+    assert security.verify_password("password-1", hashes[1])
+    stats = hasher.metrics.snapshot()
+    assert stats["operations"] == 3
+    assert stats["in_flight"] == 0
+    # Con max_concurrency=1 la segunda operación espera a que termine la primera
+    assert stats["queue_max_ms"] > 0
+
+def test_verified_token_cache(client: TestClient):
+    """
+    Prueba que un token ya verificado se sirve desde la caché y que un token inválido no se cachea.
+    """
+    client.post("/auth/register", json={"email": "token@gmail.com", "password": "testPassword123"})
+    token = client.post("/auth/login", data={"username": "token@gmail.com", "password": "testPassword123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/companies/", headers=headers).status_code == 200
+    assert client.get("/companies/", headers=headers).status_code == 200
+    stats = security.token_cache.stats()
+    assert stats["size"] == 1
+    assert stats["hits"] == 1
+
+    assert client.get("/companies/", headers={"Authorization": f"Bearer {token}x"}).status_code == 401
+    assert security.token_cache.stats()["size"] == 1
+
+@pytest.mark.parametrize("backend", ["jose", "pyjwt"])
+def test_decode_access_token_backends(monkeypatch, backend):
+    """
+    Prueba ambas librerías JWT: tokens válidos, firma alterada y tokens expirados.
+    """
+    pytest.importorskip("jwt")
+    monkeypatch.setattr(settings, "JWT_BACKEND", backend)
+
+    token = security.create_access_token({"sub": "backend@gmail.com"})
+    claims = security.decode_access_token(token)
+    assert claims["sub"] == "backend@gmail.com"
+    # La entrada de la caché vence con el token
+    expires_at, _ = security.token_cache._data[token]
+    assert expires_at - time.monotonic() <= settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    secret_key = settings.SECRET_KEY
+    monkeypatch.setattr(settings, "SECRET_KEY", "otra_clave_secreta_distinta_para_la_prueba")
+    forged = security.create_access_token({"sub": "backend@gmail.com"})
+    monkeypatch.setattr(settings, "SECRET_KEY", secret_key)
+    with pytest.raises(security.InvalidTokenError):
+        security.decode_access_token(forged)
+
+    monkeypatch.setattr(settings, "ACCESS_TOKEN_EXPIRE_MINUTES", -1)
+    with pytest.raises(security.InvalidTokenError):
+        security.decode_access_token(security.create_access_token({"sub": "backend@gmail.com"}))
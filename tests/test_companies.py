@@ -1,4 +1,14 @@
+import uuid
+
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+
+from app.models.company import Company
+from app.schemas.common import PaginatedResponse
+from app.schemas.company import CompanyRead
+from app.services import company_service
+from app.services.cache import MemoryCacheBackend, RedisCacheBackend
 
 # --- Helper ---
 def get_auth_token(client: TestClient) -> str:
@@ -64,4 +74,265 @@ def test_read_single_company_not_found(client: TestClient):
     non_existent_id = "f809f68a-7e0b-4e3f-8c8a-1c8f6b0a7e0b" # ID Aleatorio, se espera que falle
     response = client.get(f"/companies/{non_existent_id}", headers=headers)
 
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_read_companies_cursor_pagination(client: TestClient):
+    """
+    Prueba la paginación por cursor respetando el order_by activo.
+    """
+    token = get_auth_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    for name in ["Delta", "Alfa", "Charlie", "Bravo"]:
+        client.post("/companies/", headers=headers, json={"name": name})
+
+    first = client.get("/companies/", headers=headers, params={"page_size": 3, "order_by": "name"}).json()
+    assert [c["name"] for c in first["items"]] == ["Alfa", "Bravo", "Charlie"]
+    assert first["next_cursor"] is not None
+
+    second = client.get("/companies/", headers=headers, params={"page_size": 3, "order_by": "name", "cursor": first["next_cursor"]}).json()
+    assert [c["name"] for c in second["items"]] == ["Delta"]
+    assert second["next_cursor"] is None
+
+    # Un cursor generado para otro orden es rechazado
+    response = client.get("/companies/", headers=headers, params={"order_by": "-name", "cursor": first["next_cursor"]})
+    assert response.status_code == 400
+
+
+def test_read_companies_cursor_by_created_at(client: TestClient):
+    """
+    Prueba que el cursor sobre created_at avanza aunque varias filas compartan el mismo segundo.
+    """
+    token = get_auth_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    for name in ["Uno", "Dos", "Tres"]:
+        client.post("/companies/", headers=headers, json={"name": name})
+
+    seen = []
+    data = client.get("/companies/", headers=headers, params={"page_size": 1, "order_by": "-created_at"}).json()
+    seen += [c["name"] for c in data["items"]]
+    for _ in range(3):
+        if not data["next_cursor"]:
+            break
+        data = client.get("/companies/", headers=headers, params={"page_size": 1, "order_by": "-created_at", "cursor": data["next_cursor"]}).json()
+        seen += [c["name"] for c in data["items"]]
+
+    assert data["next_cursor"] is None
+    assert sorted(seen) == ["Dos", "Tres", "Uno"]
+
+def test_read_companies_invalid_order_by(client: TestClient):
+    """
+    Prueba que un order_by desconocido o mal formado devuelve 400 en lugar de 500.
+    """
+    token = get_auth_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/companies/", headers=headers, params={"order_by": "no_existe"}).status_code == 400
+    assert client.get("/companies/", headers=headers, params={"order_by": "--name"}).status_code == 400
+
+def test_read_companies_page_size_zero(client: TestClient):
+    """
+    Prueba que page_size=0 devuelve una página vacía.
+    """
+    token = get_auth_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/companies/", headers=headers, json={"name": "Solitaria"})
+    response = client.get("/companies/", headers=headers, params={"page_size": 0})
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+
+def test_read_companies_fast_path_matches_response_model(client: TestClient, db_session):
+    """
+    Prueba que el listado de compañías serializado con orjson es idéntico al del response_model.
+    """
+    token = get_auth_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/companies/", headers=headers, json={"name": "Fast Co", "tax_id": "76.123.456-7"})
+
+    response = client.get("/companies/", headers=headers)
+
+    assert response.status_code == 200
+    companies = db_session.scalars(select(Company).order_by(Company.id)).all()
+    expected = PaginatedResponse[CompanyRead](total=1, page=1, page_size=10, items=companies, has_next=False)
+    assert response.content == expected.model_dump_json().encode()
+
+def test_company_etags_and_conditional_get(client: TestClient):
+    """
+    Prueba los ETag del detalle y del listado: 304 sin cuerpo si no hubo cambios, 200 tras un cambio.
+    """
+    token = get_auth_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    company = client.post("/companies/", headers=headers, json={"name": "ETag Co"}).json()
+
+    first = client.get(f"/companies/{company['id']}", headers=headers)
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    cached = client.get(f"/companies/{company['id']}", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    listing = client.get("/companies/", headers=headers)
+    list_etag = listing.headers["etag"]
+    assert client.get("/companies/", headers={**headers, "If-None-Match": list_etag}).status_code == 304
+
+    # Un PUT sin cambios no toca la fila: el ETag se mantiene
+    unchanged = client.put(f"/companies/{company['id']}", headers=headers, json={"name": "ETag Co", "country": "CL"})
+    assert unchanged.status_code == 200
+    assert client.get(f"/companies/{company['id']}", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    client.put(f"/companies/{company['id']}", headers=headers, json={"name": "ETag Co", "country": "AR"})
+
+    changed = client.get(f"/companies/{company['id']}", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["country"] == "AR"
+    assert client.get("/companies/", headers={**headers, "If-None-Match": list_etag}).status_code == 200
+
+@pytest.fixture(params=["memory", "redis"])
+def company_cache(request, monkeypatch):
+    """
+    Caché de compañías con cada backend: en memoria y Redis (fakeredis como sustituto local).
+    """
+    if request.param == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        backend = RedisCacheBackend(fakeredis.FakeRedis(), prefix="companies", ttl=300)
+    else:
+        backend = MemoryCacheBackend(maxsize=100, ttl=300)
+    monkeypatch.setattr(company_service, "company_cache", backend)
+    return backend
+
+
+def test_company_existence_checks_are_cached(client: TestClient, db_session, company_cache):
+    """
+    Prueba que las comprobaciones de existencia repetidas (también las negativas) no consultan
+    la base de datos, y que crear, renombrar y borrar mantienen la caché al día.
+    """
+    headers = {"Authorization": f"Bearer {get_auth_token(client)}"}
+    company_id = client.post("/companies/", headers=headers, json={"name": "Cached Co"}).json()["id"]
+    missing_id = str(uuid.uuid4())
+
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        assert company_service.company_exists(db_session, uuid.UUID(company_id))
+        assert not company_service.company_exists(db_session, uuid.UUID(missing_id))
+        assert not company_service.company_exists(db_session, uuid.UUID(missing_id))
+        assert company_service.company_name_exists(db_session, "Cached Co")
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    # Solo el id inexistente llegó a la base; lo creado se escribió en la caché al crearlo
+    assert len(statements) == 1
+
+    client.put(f"/companies/{company_id}", headers=headers, json={"name": "Renamed Cached Co"})
+    assert not company_service.company_name_exists(db_session, "Cached Co")
+    assert client.post("/companies/", headers=headers, json={"name": "Renamed Cached Co"}).status_code == 400
+
+    client.delete(f"/companies/{company_id}", headers=headers)
+    response = client.post("/requests/", headers=headers, json={
+        "company_id": company_id,
+        "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": 0}
+    })
+    assert response.status_code == 404
+
+
+def test_redis_cache_backend_falls_back_when_unavailable():
+    """
+    Prueba que un Redis caído se trata como un fallo de caché y no rompe la petición.
+    """
+    redis = pytest.importorskip("redis")
+
+    class BrokenRedis:
+        def get(self, *args, **kwargs):
+            raise redis.ConnectionError("sin conexión")
+
+        set = delete = get
+
+    backend = RedisCacheBackend(BrokenRedis(), prefix="companies", ttl=300)
+    assert backend.get("id:1") is None
+    backend.set("id:1", "1")
+    backend.delete("id:1")
+    assert backend.stats()["errors"] == 3
+
+def test_search_companies_by_name_and_tax_id_with_relevance(client: TestClient):
+    """
+    Prueba la búsqueda por subcadena del nombre y prefijo de tax_id, y el orden por relevancia.
+    """
+    headers = {"Authorization": f"Bearer {get_auth_token(client)}"}
+    for name, tax_id in [
+        ("Mega Acme Holdings", "96.111.000-1"),
+        ("Acme", "77.222.000-2"),
+        ("Acme Industrial", "76.333.000-3"),
+        ("Globex 100%", "76.444.000-4"),
+    ]:
+        client.post("/companies/", headers=headers, json={"name": name, "tax_id": tax_id})
+
+    ranked = client.get("/companies/", headers=headers, params={"q": "acme", "order_by": "relevance"}).json()
+    assert [c["name"] for c in ranked["items"]] == ["Acme", "Acme Industrial", "Mega Acme Holdings"]
+
+    by_tax_id = client.get("/companies/", headers=headers, params={"q": "76."}).json()
+    assert sorted(c["name"] for c in by_tax_id["items"]) == ["Acme Industrial", "Globex 100%"]
+
+    # Los comodines de LIKE en q se buscan literalmente
+    assert client.get("/companies/", headers=headers, params={"q": "%"}).json()["total"] == 1
+    assert client.get("/companies/", headers=headers, params={"order_by": "relevance"}).status_code == 400
+
+
+def test_create_company_name_conflicts_return_400(client: TestClient):
+    """
+    Prueba que un nombre repetido (de una compañía activa o eliminada) responde 400 sin
+    consultar antes si existe.
+    """
+    headers = {"Authorization": f"Bearer {get_auth_token(client)}"}
+    company_id = client.post("/companies/", headers=headers, json={"name": "Conflicto Co"}).json()["id"]
+
+    response = client.post("/companies/", headers=headers, json={"name": "Conflicto Co"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Una compañía con este nombre ya existe, pruebe con otro nombre."
+
+    # El nombre es único en la tabla: una compañía eliminada también lo ocupa
+    client.delete(f"/companies/{company_id}", headers=headers)
+    assert client.post("/companies/", headers=headers, json={"name": "Conflicto Co"}).status_code == 400
+
+
+def test_upsert_companies_bulk(client: TestClient, db_session, company_cache):
+    """
+    Prueba la sincronización masiva: crea, actualiza solo lo que cambió, informa errores por
+    fila y limpia el "no existe" cacheado de las compañías nuevas.
+    """
+    headers = {"Authorization": f"Bearer {get_auth_token(client)}"}
+    existing = client.post("/companies/", headers=headers, json={"name": "Maestro A", "tax_id": "1-9"}).json()
+    client.post("/companies/", headers=headers, json={"name": "Maestro B", "tax_id": "2-7"})
+    deleted_id = client.post("/companies/", headers=headers, json={"name": "Maestro C"}).json()["id"]
+    client.delete(f"/companies/{deleted_id}", headers=headers)
+    assert not company_service.company_name_exists(db_session, "Maestro D")
+
+    response = client.post("/companies/bulk", headers=headers, json=[
+        {"name": "Maestro A", "tax_id": "1-9", "country": "AR"},
+        {"name": "Maestro B", "tax_id": "2-7"},
+        {"name": "Maestro C"},
+        {"name": "Maestro D", "tax_id": "viejo"},
+        {"tax_id": "sin nombre"},
+        {"name": "Maestro D", "tax_id": "4-3"},
+    ])
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["updated"], data["unchanged"], data["failed"]) == (1, 1, 1, 3)
+    results = data["results"]
+    assert [r["index"] for r in results] == [0, 1, 2, 3, 4, 5]
+    assert results[0] == {"index": 0, "id": existing["id"], "outcome": "updated", "error": None}
+    assert results[1]["outcome"] == "unchanged"
+    assert results[2]["error"] == "La compañía con este nombre fue eliminada."
+    assert results[3]["error"] == "Nombre repetido más adelante en la carga."
+    assert results[4]["error"] is not None
+    assert results[5]["outcome"] == "created"
+
+    assert client.get(f"/companies/{existing['id']}", headers=headers).json()["country"] == "AR"
+    created = client.get(f"/companies/{results[5]['id']}", headers=headers).json()
+    assert created["tax_id"] == "4-3"
+    assert company_service.company_name_exists(db_session, "Maestro D")
+    assert client.post("/companies/", headers=headers, json={"name": "Maestro D"}).status_code == 400
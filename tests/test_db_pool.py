@@ -0,0 +1,47 @@
+from sqlalchemy import create_engine, text
+
+from app.config import settings
+from app.db.db import engine_options
+from app.db.pool import InstrumentedQueuePool, pool_status
+
+
+def test_engine_options_skip_pool_for_sqlite_memory():
+    """
+    Prueba que SQLite en memoria conserva su pool por defecto.
+    """
+    assert engine_options("sqlite://") == {}
+    assert engine_options("sqlite:///:memory:") == {}
+
+
+def test_engine_options_from_settings(monkeypatch):
+    """
+    Prueba que el pool y el statement_timeout se configuran desde Settings.
+    """
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+
+    options = engine_options("postgresql+psycopg2://u:p@localhost/db")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 7
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+    async_options = engine_options("postgresql+asyncpg://u:p@localhost/db", is_async=True)
+    assert async_options["connect_args"] == {"server_settings": {"statement_timeout": "5000"}}
+
+
+def test_pool_status_reports_checkouts(tmp_path):
+    """
+    Prueba que el pool instrumentado registra los préstamos de conexiones y su espera.
+    """
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, **engine_options(url))
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        assert pool_status(engine.pool)["checked_out"] == 1
+
+    status = pool_status(engine.pool)
+    assert status["checked_out"] == 0
+    assert status["checkouts"] == 1
+    assert status["wait_max_ms"] >= 0
+    engine.dispose()
@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.enums import StatusRequestEnum
+from app.models.request import Request
+from app.services import request_service
+
+# Combinaciones de filtros que acepta GET /requests
+FILTER_COMBINATIONS = [
+    {},
+    {"status": StatusRequestEnum.PENDING},
+    {"risk_min": 30},
+    {"risk_max": 60},
+    {"risk_min": 30, "risk_max": 60},
+    {"status": StatusRequestEnum.APPROVED, "risk_min": 30},
+    {"search": "acme"},
+    {"search": "acme", "status": StatusRequestEnum.REJECTED, "risk_max": 60},
+]
+
+
+def explain(db: Session, query) -> list[str]:
+    """
+    Devuelve el plan de ejecución de una consulta (EXPLAIN en Postgres, EXPLAIN QUERY PLAN en SQLite).
+    """
+    dialect = db.get_bind().dialect
+    sql = str(query.statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    connection = db.connection()
+
+    if dialect.name == "postgresql":
+        # Con tablas pequeñas el planificador prefiere un seq scan; se desactiva para validar que exista un índice usable
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        return [row[0] for row in connection.exec_driver_sql(f"EXPLAIN {sql}")]
+    return [row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+@pytest.mark.parametrize("filters", FILTER_COMBINATIONS)
+def test_get_requests_filters_use_index(db_session: Session, filters: dict):
+    """
+    Prueba que cada combinación de filtros del listado de solicitudes usa un índice sobre requests.
+    """
+    query = (
+        request_service.build_requests_query(db_session, **filters)
+        .order_by(Request.created_at.desc(), Request.id.desc())
+        .limit(10)
+    )
+    plan = explain(db_session, query)
+
+    if db_session.get_bind().dialect.name == "postgresql":
+        assert not any("Seq Scan on requests" in line for line in plan), plan
+    else:
+        requests_steps = [line for line in plan if line.split(" ")[1:2] == ["requests"]]
+        assert requests_steps, plan
+        assert all("USING" in line for line in requests_steps), plan
@@ -0,0 +1,298 @@
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+
+from app.models.enums import JobStatusEnum
+from app.models.job import Job
+from app.models.request import Request
+from app.services import job_service, user_service
+from tests.conftest import TestingSessionLocal
+from tests.test_requests import setup_for_requests_test
+
+
+@pytest.fixture
+def job_session_factory(db_session):
+    """
+    Sesiones para los trabajos sobre la conexión del test. Cada una trabaja en un SAVEPOINT, así
+    su commit o rollback no termina la transacción que el test deshace al final.
+    """
+    return lambda: TestingSessionLocal(bind=db_session.get_bind(), join_transaction_mode="create_savepoint")
+
+
+@pytest.fixture
+def job_runner(job_session_factory, monkeypatch):
+    monkeypatch.setattr(job_service.job_runner, "session_factory", job_session_factory)
+    return job_service.job_runner
+
+
+@pytest.fixture
+def job_kind():
+    """
+    Registra tipos de trabajo de prueba y los quita al terminar.
+    """
+    registered = []
+
+    def register(kind, handler, max_concurrency=1):
+        job_service.register_job(kind, handler, max_concurrency)
+        registered.append(kind)
+
+    yield register
+    for kind in registered:
+        job_service.JOB_KINDS.pop(kind, None)
+
+
+def admin_headers(client: TestClient, db_session) -> dict:
+    headers, _ = setup_for_requests_test(client)
+    user = user_service.get_user_by_email(db_session, email="requests_test@example.com")
+    user_service.update_user_role(db_session, user, "admin")
+    return headers
+
+
+def test_rescore_runs_as_background_job(client: TestClient, db_session, job_runner):
+    """
+    Prueba que el recálculo se lanza como trabajo, informa su avance y deja los scores al día.
+    """
+    headers = admin_headers(client, db_session)
+    company_id = client.get("/companies/", headers=headers).json()["items"][0]["id"]
+    for late_payments in range(4):
+        client.post("/requests/", headers=headers, json={
+            "company_id": company_id,
+            "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": late_payments}
+        })
+    # Simula scores calculados con reglas anteriores
+    db_session.execute(update(Request).where(Request.risk_score > 10).values(risk_score=999))
+    db_session.commit()
+
+    response = client.post("/internal/rescore", headers=headers, json={"chunk_size": 100})
+    assert response.status_code == 202
+    job = response.json()
+    assert job["kind"] == "rescore"
+    assert job_runner.wait(uuid.UUID(job["id"]), timeout=30)
+
+    job = client.get(f"/jobs/{job['id']}", headers=headers).json()
+    assert job["status"] == "succeeded"
+    assert (job["processed"], job["total"]) == (4, 4)
+    assert job["result"] == {"scanned": 4, "updated": 2}
+    assert job["started_at"] is not None and job["finished_at"] is not None
+    assert sorted(db_session.scalars(select(Request.risk_score))) == [0, 10, 20, 30]
+
+
+def test_jobs_are_visible_to_their_creator_and_admins(client: TestClient, db_session, job_runner):
+    """
+    Prueba que un analista no ve trabajos ajenos ni puede lanzar el recálculo.
+    """
+    headers = admin_headers(client, db_session)
+    job_id = client.post("/internal/rescore", headers=headers).json()["id"]
+    job_runner.wait(uuid.UUID(job_id), timeout=30)
+
+    client.post("/auth/register", json={"email": "jobs_analyst@example.com", "password": "password"})
+    token = client.post(
+        "/auth/login", data={"username": "jobs_analyst@example.com", "password": "password"}
+    ).json()["access_token"]
+    analyst = {"Authorization": f"Bearer {token}"}
+
+    assert client.post("/internal/rescore", headers=analyst).status_code == 403
+    assert client.get(f"/jobs/{job_id}", headers=analyst).status_code == 404
+    assert client.get(f"/jobs/{uuid.uuid4()}", headers=headers).status_code == 404
+    # Un trabajo terminado ya no se puede cancelar
+    assert client.post(f"/jobs/{job_id}/cancel", headers=headers).status_code == 409
+
+
+def test_cancel_queued_and_running_jobs(db_session, job_session_factory, job_kind, monkeypatch):
+    """
+    Prueba que un trabajo en cola se cancela en el acto y nunca corre, y que uno en curso se
+    detiene en su siguiente reporte de avance conservando lo ya hecho.
+    """
+    steps = []
+
+    def handler(context):
+        for step in range(1, 4):
+            steps.append(step)
+            if step == 2:
+                # Otra petición pide cancelar mientras corre
+                with job_session_factory() as other:
+                    job_service.cancel_job(other, context.job_id)
+            context.report(step, 3)
+        return {"steps": 3}
+
+    job_kind("prueba", handler)
+    monkeypatch.setattr(job_service.job_runner, "submit", lambda job_id, kind: None)
+
+    queued = job_service.enqueue_job(db_session, "prueba")
+    cancelled = job_service.cancel_job(db_session, queued.id)
+    assert cancelled.status == JobStatusEnum.CANCELLED
+    assert cancelled.finished_at is not None
+    with job_session_factory() as db:
+        job_service.execute_job(db, queued.id, "prueba")
+    assert steps == []
+
+    running = job_service.enqueue_job(db_session, "prueba")
+    with job_session_factory() as db:
+        job_service.execute_job(db, running.id, "prueba")
+    job = db_session.get(Job, running.id, populate_existing=True)
+    assert steps == [1, 2]
+    assert job.status == JobStatusEnum.CANCELLED
+    assert job.cancel_requested
+    assert (job.processed, job.total) == (2, 3)
+    assert job.result is None
+
+
+def test_failed_job_records_error(db_session, job_session_factory, job_kind, monkeypatch):
+    """
+    Prueba que un error en el trabajo lo deja como failed con el mensaje, sin perder la fila.
+    """
+    def handler(context):
+        context.report(1, 2)
+        raise RuntimeError("reglas inválidas")
+
+    job_kind("falla", handler)
+    monkeypatch.setattr(job_service.job_runner, "submit", lambda job_id, kind: None)
+
+    queued = job_service.enqueue_job(db_session, "falla")
+    with job_session_factory() as db:
+        job_service.execute_job(db, queued.id, "falla")
+
+    job = db_session.get(Job, queued.id, populate_existing=True)
+    assert job.status == JobStatusEnum.FAILED
+    assert job.error == "reglas inválidas"
+    assert job.processed == 1
+
+    with pytest.raises(job_service.UnknownJobKindError):
+        job_service.enqueue_job(db_session, "no_existe")
+
+
+def test_job_runner_respects_concurrency_limits(job_kind, monkeypatch):
+    """
+    Prueba que el pool no supera sus hilos ni el límite de cada tipo, y que la cola avanza
+    en orden a medida que terminan los trabajos.
+    """
+    release = {}
+    started = []
+
+    def fake_execute(db, job_id, kind):
+        started.append(job_id)
+        release[job_id].wait(10)
+        return True
+
+    job_kind("lento", lambda context: None, max_concurrency=1)
+    job_kind("rapido", lambda context: None, max_concurrency=2)
+    monkeypatch.setattr(job_service, "execute_job", fake_execute)
+    runner = job_service.JobRunner(workers=2, session_factory=lambda: TestingSessionLocal())
+
+    jobs = [(uuid.uuid4(), kind) for kind in ("lento", "lento", "rapido", "rapido")]
+    for job_id, kind in jobs:
+        release[job_id] = threading.Event()
+        runner.submit(job_id, kind)
+    try:
+        stats = runner.stats()
+        assert stats["running"] == {"lento": 1, "rapido": 1}
+        assert stats["queued"] == 2
+
+        # Al terminar el primer "lento" entra el segundo (antes que el "rapido" que espera hilo)
+        release[jobs[0][0]].set()
+        assert runner.wait(jobs[0][0], timeout=10)
+        assert runner.stats()["running"] == {"lento": 1, "rapido": 1}
+        assert runner.stats()["queued"] == 1
+        for job_id, _ in jobs[1:]:
+            release[job_id].set()
+        for job_id, _ in jobs:
+            assert runner.wait(job_id, timeout=10)
+        assert set(started) == {job_id for job_id, _ in jobs}
+        assert runner.stats() == {"workers": 2, "queued": 0, "running": {}}
+    finally:
+        for event in release.values():
+            event.set()
+        runner.shutdown()
+
+
+def test_shutdown_fails_jobs_left_in_queue(db_session, job_session_factory, job_kind, monkeypatch):
+    """
+    Prueba que al apagar el pool los trabajos que esperaban en la cola quedan como failed en la
+    tabla (y quien los esperaba se entera), mientras el que estaba en curso termina.
+    """
+    release = threading.Event()
+    job_kind("bloqueante", lambda context: release.wait(10) and {"ok": True})
+    monkeypatch.setattr(job_service.job_runner, "submit", lambda job_id, kind: None)
+    running = job_service.enqueue_job(db_session, "bloqueante")
+    queued = job_service.enqueue_job(db_session, "bloqueante")
+
+    runner = job_service.JobRunner(workers=1, session_factory=job_session_factory)
+    runner.submit(running.id, "bloqueante")
+    runner.submit(queued.id, "bloqueante")
+    try:
+        assert runner.stats()["queued"] == 1
+        runner.shutdown()
+        assert runner.wait(queued.id, timeout=0)
+    finally:
+        release.set()
+    assert runner.wait(running.id, timeout=10)
+
+    job = db_session.get(Job, queued.id, populate_existing=True)
+    assert job.status == JobStatusEnum.FAILED
+    assert "se detuvo" in job.error
+    assert job.finished_at is not None
+    assert db_session.get(Job, running.id, populate_existing=True).status == JobStatusEnum.SUCCEEDED
+
+
+def test_recover_resubmits_queued_and_fails_stale_running_jobs(db_session, job_runner, job_kind):
+    """
+    Prueba que al arrancar se vuelven a ejecutar los trabajos que quedaron en cola, se dan por
+    fallidos los que quedaron en curso sin reportar avance y se respetan los que sí avanzan.
+    """
+    job_kind("recuperado", lambda context: {"recuperado": True})
+    now = datetime.now(timezone.utc)
+    stale = Job(kind="colgado", status=JobStatusEnum.RUNNING, started_at=now - timedelta(hours=2), updated_at=now - timedelta(hours=1))
+    alive = Job(kind="colgado", status=JobStatusEnum.RUNNING, started_at=now, updated_at=now)
+    queued = Job(kind="recuperado")
+    unknown = Job(kind="retirado")
+    db_session.add_all([stale, alive, queued, unknown])
+    db_session.commit()
+
+    job_runner.recover(stale_after_seconds=600)
+    assert job_runner.wait(queued.id, timeout=30)
+
+    def status(job):
+        return db_session.get(Job, job.id, populate_existing=True)
+
+    assert status(stale).status == JobStatusEnum.FAILED
+    assert "interrumpió" in status(stale).error
+    assert status(alive).status == JobStatusEnum.RUNNING
+    assert status(queued).status == JobStatusEnum.SUCCEEDED
+    assert status(queued).result == {"recuperado": True}
+    assert status(unknown).status == JobStatusEnum.FAILED
+
+
+def test_concurrency_limit_counts_jobs_running_in_other_processes(db_session, job_session_factory, job_kind, monkeypatch):
+    """
+    Prueba que un trabajo no empieza mientras otro proceso tiene lleno el límite de su tipo:
+    sigue en cola, se reintenta y corre cuando el otro termina.
+    """
+    job_kind("exclusivo", lambda context: {"ok": True}, max_concurrency=1)
+    monkeypatch.setattr(job_service.job_runner, "submit", lambda job_id, kind: None)
+    # Lo ejecuta otro proceso: solo existe en la tabla
+    other = Job(kind="exclusivo", status=JobStatusEnum.RUNNING, started_at=datetime.now(timezone.utc))
+    db_session.add(other)
+    db_session.commit()
+    queued = job_service.enqueue_job(db_session, "exclusivo")
+
+    with job_session_factory() as db:
+        assert job_service.execute_job(db, queued.id, "exclusivo") is False
+    assert db_session.get(Job, queued.id, populate_existing=True).status == JobStatusEnum.QUEUED
+
+    runner = job_service.JobRunner(workers=1, session_factory=job_session_factory, retry_seconds=0.05)
+    runner.submit(queued.id, "exclusivo")
+    try:
+        assert not runner.wait(queued.id, timeout=0.3)
+        assert runner.stats()["queued"] == 1
+
+        db_session.execute(update(Job).where(Job.id == other.id).values(status=JobStatusEnum.SUCCEEDED))
+        db_session.commit()
+        assert runner.wait(queued.id, timeout=10)
+    finally:
+        runner.shutdown()
+    assert db_session.get(Job, queued.id, populate_existing=True).status == JobStatusEnum.SUCCEEDED
+
@@ -0,0 +1,104 @@
+import logging
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+
+
+def get_auth_headers(client: TestClient) -> dict:
+    client.post("/auth/register", json={"email": "metrics@example.com", "password": "password"})
+    login = client.post("/auth/login", data={"username": "metrics@example.com", "password": "password"})
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+@pytest.fixture(autouse=True)
+def metrics_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "token-de-metricas")
+    return {"Authorization": "Bearer token-de-metricas"}
+
+
+def sample(text: str, name: str, **labels) -> float:
+    """
+    Valor de una serie en la salida de /metrics (las etiquetas se comparan por inclusión).
+    """
+    for line in text.splitlines():
+        match = re.fullmatch(rf"{name}\{{(.*)\}} (\S+)", line)
+        if match and all(f'{key}="{value}"' in match.group(1) for key, value in labels.items()):
+            return float(match.group(2))
+    raise AssertionError(f"No existe la serie {name} {labels}")
+
+
+def exercise(client: TestClient) -> None:
+    headers = get_auth_headers(client)
+    company_id = client.post("/companies/", headers=headers, json={"name": "Metrics Co"}).json()["id"]
+    for _ in range(2):
+        client.get(f"/companies/{company_id}", headers=headers)
+    client.get("/companies/00000000-0000-0000-0000-000000000000", headers=headers)
+
+
+def test_metrics_record_latency_statements_and_db_time_per_route(client: TestClient, metrics_token):
+    """
+    Prueba que /metrics expone, por plantilla de ruta, latencia, sentencias SQL y tiempo en la base de datos.
+    """
+    exercise(client)
+
+    response = client.get("/metrics", headers=metrics_token)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    route = {"method": "GET", "route": "/companies/{company_id}"}
+    assert sample(text, "http_request_duration_seconds_count", status="200", **route) == 2
+    assert sample(text, "http_request_duration_seconds_count", status="404", **route) == 1
+    # Cada lectura hace al menos una sentencia; ninguna queda en el bucket de cero
+    assert sample(text, "http_request_db_statements_count", **route) == 3
+    assert sample(text, "http_request_db_statements_bucket", le="0", **route) == 0
+    assert sample(text, "http_request_db_seconds_sum", **route) > 0
+    # La URL concreta no genera series propias
+    assert "/companies/0000" not in text
+
+
+def test_metrics_follow_async_sessions(async_client: TestClient, metrics_token):
+    """
+    Prueba que las sentencias ejecutadas con AsyncSession (run_sync) se cuentan en la petición.
+    """
+    exercise(async_client)
+
+    text = async_client.get("/metrics", headers=metrics_token).text
+    assert sample(text, "http_request_db_statements_bucket", le="0", method="GET", route="/companies/{company_id}") == 0
+
+
+def test_metrics_require_the_metrics_token(client: TestClient, monkeypatch):
+    """
+    Prueba que /metrics exige METRICS_TOKEN (ni siquiera un usuario autenticado lo ve) y que
+    sin token configurado no se expone.
+    """
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer otro"}).status_code == 401
+    assert client.get("/metrics", headers=get_auth_headers(client)).status_code == 401
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    assert client.get("/metrics", headers={"Authorization": "Bearer token-de-metricas"}).status_code == 404
+
+
+def test_slow_queries_are_logged_without_parameter_values(client: TestClient, metrics_token, monkeypatch, caplog):
+    """
+    Prueba que las sentencias sobre SLOW_QUERY_MS se registran en el log con la cantidad y los
+    tipos de sus parámetros, nunca con sus valores (ni el hash de la contraseña ni el correo).
+    """
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+
+    with caplog.at_level(logging.WARNING, logger="app.db.slow_query"):
+        headers = get_auth_headers(client)
+        client.get("/companies/", headers=headers, params={"q": "lenta"})
+
+    messages = [record.message for record in caplog.records if "Consulta lenta" in record.message]
+    assert any("INSERT INTO users" in message and "parámetros: " in message for message in messages)
+    assert any("str" in message.split("parámetros: ")[1] for message in messages)
+    for message in messages:
+        assert "lenta" not in message.split("parámetros: ")[1]
+        assert "metrics@example.com" not in message
+        assert "$2b$" not in message
+    assert re.search(r"^db_slow_queries_total [1-9]", client.get("/metrics", headers=metrics_token).text, re.M)
@@ -0,0 +1,109 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from tests.test_requests import setup_for_requests_test
+
+# Máximo de sentencias SQL por llamada a cada endpoint, con las cachés de autenticación y de
+# compañías ya pobladas. Si un cambio agrega consultas (un lazy load al serializar, una
+# lectura extra tras el commit) el test falla y muestra las sentencias ejecutadas.
+QUERY_BUDGETS = {
+    "POST /auth/login": 1,
+    "POST /companies/": 1,
+    "POST /companies/bulk": 2,
+    "GET /companies/": 2,
+    "GET /companies/{company_id}": 1,
+    "PUT /companies/{company_id}": 2,
+    "DELETE /companies/{company_id}": 2,
+    "POST /requests/": 3,
+    "POST /requests/bulk": 4,
+    "GET /requests/": 2,
+    "GET /requests/stats": 1,
+    "GET /requests/export": 1,
+    "GET /requests/{request_id}": 1,
+    "PUT /requests/{request_id}": 4,
+    "DELETE /requests/{request_id}": 4,
+}
+
+
+def call(client: TestClient, endpoint: str, headers: dict, company_id: str, request_id: str):
+    """
+    Hace una llamada válida al endpoint indicado.
+    """
+    risk_inputs = {"pep_flag": True, "sanction_list": False, "late_payments": 2}
+    calls = {
+        "POST /auth/login": lambda: client.post(
+            "/auth/login", data={"username": "requests_test@example.com", "password": "password"}
+        ),
+        "POST /companies/": lambda: client.post("/companies/", headers=headers, json={"name": "Presupuesto Co"}),
+        "POST /companies/bulk": lambda: client.post("/companies/bulk", headers=headers, json=[
+            {"name": "Test Co for Requests", "tax_id": "76.000.000-0"}, *({"name": f"Presupuesto Co {i}"} for i in range(4))
+        ]),
+        "GET /companies/": lambda: client.get("/companies/", headers=headers),
+        "GET /companies/{company_id}": lambda: client.get(f"/companies/{company_id}", headers=headers),
+        "PUT /companies/{company_id}": lambda: client.put(
+            f"/companies/{company_id}", headers=headers, json={"name": "Presupuesto Co 2"}
+        ),
+        "DELETE /companies/{company_id}": lambda: client.delete(f"/companies/{company_id}", headers=headers),
+        "POST /requests/": lambda: client.post(
+            "/requests/", headers=headers, json={"company_id": company_id, "risk_inputs": risk_inputs}
+        ),
+        "POST /requests/bulk": lambda: client.post(
+            "/requests/bulk", headers=headers, json=[{"company_id": company_id, "risk_inputs": risk_inputs}] * 5
+        ),
+        "GET /requests/": lambda: client.get("/requests/", headers=headers),
+        "GET /requests/stats": lambda: client.get("/requests/stats", headers=headers),
+        "GET /requests/export": lambda: client.get("/requests/export", headers=headers),
+        "GET /requests/{request_id}": lambda: client.get(f"/requests/{request_id}", headers=headers),
+        "PUT /requests/{request_id}": lambda: client.put(
+            f"/requests/{request_id}", headers=headers, json={"status": "approved", "risk_inputs": risk_inputs}
+        ),
+        "DELETE /requests/{request_id}": lambda: client.delete(f"/requests/{request_id}", headers=headers),
+    }
+    return calls[endpoint]()
+
+
+@pytest.mark.parametrize("endpoint", QUERY_BUDGETS)
+def test_endpoint_query_budget(client: TestClient, count_queries, endpoint: str):
+    """
+    Prueba que cada endpoint se mantiene dentro de su presupuesto de sentencias SQL.
+    """
+    headers, company_id = setup_for_requests_test(client)
+    request_id = client.post("/requests/", headers=headers, json={
+        "company_id": company_id, "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": 0}
+    }).json()["id"]
+
+    with count_queries() as statements:
+        response = call(client, endpoint, headers, company_id, request_id)
+
+    assert response.status_code < 400, response.text
+    budget = QUERY_BUDGETS[endpoint]
+    assert len(statements) <= budget, (
+        f"{endpoint} ejecutó {len(statements)} sentencias (presupuesto {budget}):\n" + "\n".join(statements)
+    )
+
+
+@pytest.mark.parametrize("path", ["/requests/", "/companies/", "/requests/export"])
+def test_list_queries_do_not_grow_with_rows(client: TestClient, count_queries, path: str):
+    """
+    Prueba que los listados no hacen N+1: las sentencias no crecen con la cantidad de filas
+    ni de compañías distintas en la página.
+    """
+    headers, _ = setup_for_requests_test(client)
+
+    def create_rows(start: int, stop: int):
+        # Cada solicitud con su propia compañía
+        for i in range(start, stop):
+            other = client.post("/companies/", headers=headers, json={"name": f"N+1 Co {i}"}).json()["id"]
+            client.post("/requests/", headers=headers, json={
+                "company_id": other, "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": i}
+            })
+
+    create_rows(0, 1)
+    with count_queries() as few:
+        client.get(path, headers=headers)
+
+    create_rows(1, 6)
+    with count_queries() as many:
+        client.get(path, headers=headers)
+
+    assert len(many) == len(few), "\n".join(many)
@@ -0,0 +1,74 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import db as db_module, routing
+from app.db.base import Base
+from app.models.company import Company
+
+
+@pytest.fixture
+def replica_session_factory(tmp_path, monkeypatch):
+    """
+    Segunda base SQLite que hace de réplica de lectura (sin replicación: parte vacía).
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(db_module, "ReplicaSessionLocal", factory)
+    yield factory
+    engine.dispose()
+
+
+def login(client: TestClient, email: str) -> dict:
+    client.post("/auth/register", json={"email": email, "password": "password"})
+    token = client.post("/auth/login", data={"username": email, "password": "password"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_reads_go_to_replica_except_after_own_writes(client: TestClient, replica_session_factory):
+    """
+    Prueba que los GET usan la réplica, salvo para el usuario que acaba de escribir (read-your-writes).
+    """
+    writer = login(client, "writer@example.com")
+    reader = login(client, "reader@example.com")
+
+    created = client.post("/companies/", headers=writer, json={"name": "Primary Co"})
+    assert created.status_code == 201
+
+    # Quien escribió lee de la primaria y ve su cambio
+    assert client.get("/companies/", headers=writer).json()["total"] == 1
+    assert client.get(f"/companies/{created.json()['id']}", headers=writer).status_code == 200
+    # Otro usuario lee de la réplica, que todavía no tiene la compañía
+    assert client.get("/companies/", headers=reader).json()["total"] == 0
+
+    with replica_session_factory() as replica:
+        replica.add(Company(name="Replica Co"))
+        replica.commit()
+
+    assert [c["name"] for c in client.get("/companies/", headers=reader).json()["items"]] == ["Replica Co"]
+
+    # Al cerrarse la ventana, quien escribió también vuelve a la réplica
+    routing.recent_writers.clear()
+    assert [c["name"] for c in client.get("/companies/", headers=writer).json()["items"]] == ["Replica Co"]
+
+
+def test_writes_are_tracked_only_after_commit(replica_session_factory):
+    """
+    Prueba que solo una escritura confirmada abre la ventana de read-your-writes.
+    """
+    with replica_session_factory() as db:
+        db.info["principal"] = "tracked@example.com"
+
+        db.add(Company(name="Rolled Back Co"))
+        db.flush()
+        db.rollback()
+        assert not routing.wrote_recently("tracked@example.com")
+
+        db.commit()
+        assert not routing.wrote_recently("tracked@example.com")
+
+        db.add(Company(name="Committed Co"))
+        db.commit()
+        assert routing.wrote_recently("tracked@example.com")
@@ -1,6 +1,17 @@
+import csv
+import io
+import json
+import uuid
+
 from fastapi.testclient import TestClient
-from app.services.risk import calculate_risk_score
-from app.schemas.request import RiskInputsSchema
+from hypothesis import given, settings, strategies as st
+from sqlalchemy import select, update
+from app.models.company import Company
+from app.models.request import Request
+from app.services import request_service, rollup_service, stats_service
+from app.services.risk import calculate_risk_score, calculate_risk_scores, calculate_risk_scores_columnar
+from app.schemas.common import PaginatedResponse
+from app.schemas.request import RequestRead, RiskInputsSchema
 
 
 # --- Helper ---
@@ -107,4 +118,341 @@ def test_create_request_for_non_existent_company(client: TestClient):
 
     response = client.post("/requests/", headers=headers, json=request_data)
 
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_read_requests_cursor_pagination(client: TestClient):
+    """
+    Prueba que recorrer las páginas con next_cursor entrega todas las solicitudes sin repetir.
+    """
+    headers, company_id = setup_for_requests_test(client)
+    for late_payments in range(5):
+        client.post("/requests/", headers=headers, json={
+            "company_id": company_id,
+            "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": late_payments}
+        })
+
+    seen = []
+    data = client.get("/requests/", headers=headers, params={"page_size": 2}).json()
+    seen += [item["id"] for item in data["items"]]
+    # Se limita el número de páginas para que una regresión falle en vez de colgar la prueba
+    for _ in range(5):
+        if not data["next_cursor"]:
+            break
+        data = client.get("/requests/", headers=headers, params={"page_size": 2, "cursor": data["next_cursor"]}).json()
+        seen += [item["id"] for item in data["items"]]
+
+    assert data["next_cursor"] is None
+    assert data["total"] is None
+    assert len(seen) == 5
+    assert len(set(seen)) == 5
+
+def test_read_requests_invalid_cursor(client: TestClient):
+    """
+    Prueba que un cursor inválido devuelve 400.
+    """
+    headers, _ = setup_for_requests_test(client)
+    response = client.get("/requests/", headers=headers, params={"cursor": "no-es-un-cursor"})
+    assert response.status_code == 400
+
+def test_read_requests_total_modes(client: TestClient):
+    """
+    Prueba los modos de total: exact cuenta, none lo omite y estimate se cachea por filtros.
+    """
+    headers, company_id = setup_for_requests_test(client)
+    for _ in range(3):
+        client.post("/requests/", headers=headers, json={"company_id": company_id, "risk_inputs": {}})
+
+    exact = client.get("/requests/", headers=headers, params={"page_size": 2, "total": "exact"}).json()
+    assert exact["total"] == 3
+    assert exact["has_next"] is True
+
+    none = client.get("/requests/", headers=headers, params={"page_size": 2, "total": "none"}).json()
+    assert none["total"] is None
+    assert none["has_next"] is True
+
+    estimate = client.get("/requests/", headers=headers, params={"total": "estimate"}).json()
+    assert estimate["total"] == 3
+    assert estimate["has_next"] is False
+
+    # Dentro del TTL el estimado se sirve desde la caché, aunque haya nuevas filas
+    client.post("/requests/", headers=headers, json={"company_id": company_id, "risk_inputs": {}})
+    cached = client.get("/requests/", headers=headers, params={"total": "estimate"}).json()
+    assert cached["total"] == 3
+
+def test_read_requests_page_size_zero(client: TestClient):
+    """
+    Prueba que page_size=0 devuelve una página vacía sin cursor.
+    """
+    headers, company_id = setup_for_requests_test(client)
+    client.post("/requests/", headers=headers, json={"company_id": company_id, "risk_inputs": {}})
+
+    response = client.get("/requests/", headers=headers, params={"page_size": 0})
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+    assert response.json()["next_cursor"] is None
+
+
+def test_create_requests_bulk_json(client: TestClient):
+    """
+    Prueba la carga masiva con un arreglo JSON, reportando errores por fila.
+    """
+    headers, company_id = setup_for_requests_test(client)
+    rows = [
+        {"company_id": company_id, "risk_inputs": {"pep_flag": True, "late_payments": 1}},
+        {"company_id": "f809f68a-7e0b-4e3f-8c8a-1c8f6b0a7e0b", "risk_inputs": {}},
+        {"company_id": company_id, "risk_inputs": {"late_payments": -1}},
+        {"company_id": company_id, "risk_inputs": {"sanction_list": True}},
+    ]
+
+    response = client.post("/requests/bulk", headers=headers, json=rows)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 2
+    assert [r["index"] for r in data["results"]] == [0, 1, 2, 3]
+    assert data["results"][0]["risk_score"] == 70
+    assert data["results"][1]["error"] == "La compañía especificada no existe."
+    assert data["results"][2]["error"] is not None
+    assert data["results"][3]["risk_score"] == 40
+
+    listing = client.get("/requests/", headers=headers).json()
+    assert listing["total"] == 2
+
+def test_create_requests_bulk_ndjson(client: TestClient):
+    """
+    Prueba la carga masiva en formato NDJSON.
+    """
+    headers, company_id = setup_for_requests_test(client)
+    body = "\n".join(
+        json.dumps({"company_id": company_id, "risk_inputs": {"late_payments": n}}) for n in range(3)
+    ) + "\nno-es-json\n"
+
+    response = client.post(
+        "/requests/bulk", headers={**headers, "Content-Type": "application/x-ndjson"}, content=body
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 3
+    assert data["failed"] == 1
+    assert [r["risk_score"] for r in data["results"][:3]] == [0, 10, 20]
+
+def test_calculate_risk_scores_matches_scalar():
+    """Prueba que el cálculo en lote coincide con el cálculo individual."""
+    inputs = [
+        RiskInputsSchema(pep_flag=pep, sanction_list=sanction, late_payments=late)
+        for pep in (False, True) for sanction in (False, True) for late in range(6)
+    ]
+    assert calculate_risk_scores(inputs) == [calculate_risk_score(i) for i in inputs]
+
+
+@settings(max_examples=200, deadline=None)
+@given(st.lists(st.tuples(st.booleans(), st.booleans(), st.integers(min_value=0, max_value=10**12)), max_size=50))
+def test_columnar_risk_scores_match_scalar(rows):
+    """Prueba (basada en propiedades) que el motor vectorizado coincide con el cálculo individual."""
+    inputs = [RiskInputsSchema(pep_flag=p, sanction_list=s, late_payments=l) for p, s, l in rows]
+    assert calculate_risk_scores(inputs) == [calculate_risk_score(i) for i in inputs]
+
+    if rows:
+        pep, sanction, late = zip(*rows)
+        columnar = calculate_risk_scores_columnar({"pep_flag": pep, "sanction_list": sanction, "late_payments": late})
+        assert columnar.tolist() == [calculate_risk_score(i) for i in inputs]
+
+def test_rescore_requests_updates_changed_scores(client: TestClient, db_session):
+    """
+    Prueba que el recálculo masivo corrige los scores desactualizados y deja el resto intacto.
+    """
+    headers, company_id = setup_for_requests_test(client)
+    for late_payments in range(4):
+        client.post("/requests/", headers=headers, json={
+            "company_id": company_id,
+            "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": late_payments}
+        })
+
+    # Simula scores calculados con reglas anteriores
+    db_session.execute(update(Request).where(Request.risk_score > 10).values(risk_score=999))
+    db_session.commit()
+
+    scanned, updated = request_service.rescore_requests(db_session, chunk_size=3)
+
+    assert scanned == 4
+    assert updated == 2
+    scores = sorted(db_session.scalars(select(Request.risk_score)))
+    assert scores == [0, 10, 20, 30]
+
+def test_request_stats_follow_writes(client: TestClient, db_session):
+    """
+    Prueba que los agregados del dashboard siguen a las altas, cambios, bajas y cargas masivas,
+    y que coinciden con una reconstrucción completa desde la tabla requests.
+    """
+    headers, company_id = setup_for_requests_test(client)
+    created = client.post("/requests/", headers=headers, json={
+        "company_id": company_id,
+        "risk_inputs": {"pep_flag": True, "sanction_list": False, "late_payments": 0}
+    }).json()
+    to_delete = client.post("/requests/", headers=headers, json={
+        "company_id": company_id,
+        "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": 1}
+    }).json()
+    client.post("/requests/bulk", headers=headers, json=[
+        {"company_id": company_id, "risk_inputs": {"pep_flag": False, "sanction_list": True, "late_payments": 0}},
+        {"company_id": company_id, "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": 0}},
+    ])
+    client.put(f"/requests/{created['id']}", headers=headers, json={
+        "status": "approved",
+        "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": 3}
+    })
+    client.delete(f"/requests/{to_delete['id']}", headers=headers)
+
+    response = client.get("/requests/stats", headers=headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 3
+    assert data["by_status"] == {"pending": 2, "in_review": 0, "approved": 1, "rejected": 0}
+    assert data["by_risk_bucket"] == [
+        {"min": 0, "max": 19, "count": 1},
+        {"min": 20, "max": 39, "count": 1},
+        {"min": 40, "max": 59, "count": 1},
+    ]
+    assert data["by_company"] == [{"company_id": company_id, "total": 3, "by_status": {"pending": 2, "approved": 1}}]
+
+    stats_service.rebuild_stats(db_session)
+    assert client.get("/requests/stats", headers=headers).json() == data
+
+    filtered = client.get("/requests/stats", headers=headers, params={"company_id": str(uuid.uuid4())}).json()
+    assert filtered["total"] == 0
+
+def test_company_rollups_follow_writes(client: TestClient, db_session):
+    """
+    Prueba que los resúmenes de riesgo de la compañía siguen a las altas, cambios, bajas,
+    cargas masivas y recálculos, y que coinciden con una reconstrucción completa.
+    """
+    headers, company_id = setup_for_requests_test(client)
+    other_id = client.post("/companies/", headers=headers, json={"name": "Sin solicitudes"}).json()["id"]
+
+    def rollups():
+        company = client.get(f"/companies/{company_id}", headers=headers).json()
+        # La última solicitud es la primera del listado (varias pueden compartir created_at)
+        first = client.get("/requests/", headers=headers, params={"page_size": 1}).json()["items"]
+        assert company["latest_risk_score"] == (first[0]["risk_score"] if first else None)
+        return company["max_risk_score"], company["open_requests"]
+
+    highest = client.post("/requests/", headers=headers, json={
+        "company_id": company_id,
+        "risk_inputs": {"pep_flag": True, "sanction_list": True, "late_payments": 0}
+    }).json()
+    client.post("/requests/bulk", headers=headers, json=[
+        {"company_id": company_id, "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": 2}},
+        {"company_id": company_id, "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": 1}},
+    ])
+    latest = client.post("/requests/", headers=headers, json={
+        "company_id": company_id,
+        "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": 0}
+    }).json()
+    assert rollups() == (highest["risk_score"], 4)
+
+    client.put(f"/requests/{latest['id']}", headers=headers, json={
+        "status": "approved",
+        "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": 3}
+    })
+    assert rollups() == (highest["risk_score"], 3)
+
+    client.delete(f"/requests/{highest['id']}", headers=headers)
+    assert rollups() == (30, 2)
+
+    # Simula scores calculados con reglas anteriores y los corrige con el recálculo masivo
+    db_session.execute(update(Request).values(risk_score=999))
+    db_session.commit()
+    request_service.rescore_requests(db_session)
+    assert rollups() == (30, 2)
+
+    # Sin solicitudes los resúmenes quedan en NULL y van al final del orden
+    listing = client.get("/companies/", headers=headers, params={"order_by": "-max_risk_score"}).json()
+    assert [c["id"] for c in listing["items"]] == [company_id, other_id]
+    assert listing["items"][1]["max_risk_score"] is None
+    assert listing["items"][1]["open_requests"] == 0
+
+    db_session.execute(update(Company).values(latest_risk_score=None, max_risk_score=None, open_requests=0))
+    db_session.commit()
+    assert rollup_service.rebuild_rollups(db_session, chunk_size=1) == 2
+    assert rollups() == (30, 2)
+
+def test_export_requests_csv_and_ndjson(client: TestClient):
+    """
+    Prueba la exportación en streaming en ambos formatos, con los filtros del listado.
+    """
+    headers, company_id = setup_for_requests_test(client)
+    for late_payments in range(3):
+        client.post("/requests/", headers=headers, json={
+            "company_id": company_id,
+            "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": late_payments}
+        })
+
+    response = client.get("/requests/export", headers=headers, params={"format": "csv"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert sorted(row["risk_score"] for row in rows) == ["0", "10", "20"]
+    assert rows[0]["company_id"] == company_id
+    assert rows[0]["company_name"] == "Test Co for Requests"
+
+    response = client.get("/requests/export", headers=headers, params={"format": "ndjson", "risk_min": 10})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted((line["risk_score"], line["late_payments"]) for line in lines) == [(10, 1), (20, 2)]
+
+def test_read_requests_fast_path_matches_response_model(client: TestClient, db_session):
+    """
+    Prueba que el listado serializado con orjson es idéntico byte a byte al que produciría
+    PaginatedResponse[RequestRead] validando los objetos ORM.
+    """
+    headers, company_id = setup_for_requests_test(client)
+    for pep_flag in (True, False):
+        client.post("/requests/", headers=headers, json={
+            "company_id": company_id,
+            "risk_inputs": {"pep_flag": pep_flag, "sanction_list": False, "late_payments": 2}
+        })
+
+    response = client.get("/requests/", headers=headers, params={"page_size": 1})
+
+    assert response.status_code == 200
+    data = response.json()
+    first = db_session.get(Request, uuid.UUID(data["items"][0]["id"]))
+    expected = PaginatedResponse[RequestRead](
+        total=2, page=1, page_size=1, items=[first], has_next=True, next_cursor=data["next_cursor"]
+    )
+    assert response.content == expected.model_dump_json().encode()
+
+def test_request_etags_follow_request_and_company_versions(client: TestClient):
+    """
+    Prueba el ETag del detalle de una solicitud: cambia si cambia la solicitud o su compañía.
+    """
+    headers, company_id = setup_for_requests_test(client)
+    created = client.post("/requests/", headers=headers, json={
+        "company_id": company_id,
+        "risk_inputs": {"pep_flag": False, "sanction_list": False, "late_payments": 0}
+    }).json()
+    url = f"/requests/{created['id']}"
+
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200
+    assert first.json() == created
+    etag = first.headers["etag"]
+    assert client.get(url, headers={**headers, "If-None-Match": etag}).status_code == 304
+    list_etag = client.get("/requests/", headers=headers).headers["etag"]
+
+    client.put(f"/companies/{company_id}", headers=headers, json={"name": "Renamed Co"})
+
+    after_company = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert after_company.status_code == 200
+    assert after_company.json()["company"]["name"] == "Renamed Co"
+    assert client.get("/requests/", headers={**headers, "If-None-Match": list_etag}).status_code == 200
+
+    client.put(url, headers=headers, json={"status": "approved"})
+    assert after_company.headers["etag"] != client.get(url, headers=headers).headers["etag"]
+    assert client.get(f"/requests/{uuid.uuid4()}", headers={**headers, "If-None-Match": etag}).status_code == 404
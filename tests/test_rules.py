@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from app.schemas.request import RiskInputsSchema
+from app.services import risk as risk_service
+from app.services.rules import RuleSetError, compile_ruleset
+
+CUSTOM_RULESET = {
+    "version": "test-2",
+    "rules": [
+        {"type": "flag", "field": "pep_flag", "points": 50},
+        {"type": "per_unit", "field": "late_payments", "points": 5},
+    ],
+}
+
+
+@pytest.fixture
+def restore_ruleset():
+    yield
+    risk_service.reload_ruleset(risk_service._ruleset_path())
+
+
+def test_compile_ruleset_scalar_and_columnar():
+    """
+    Prueba que un conjunto de reglas compilado evalúa igual en modo individual y columnar.
+    """
+    ruleset = compile_ruleset(CUSTOM_RULESET)
+    inputs = RiskInputsSchema(pep_flag=True, sanction_list=True, late_payments=7)
+
+    assert ruleset.version == "test-2"
+    assert ruleset.score(inputs) == 85
+    columns = {"pep_flag": [True, False], "sanction_list": [True, True], "late_payments": [7, 0]}
+    assert ruleset.score_columnar(columns).tolist() == [85, 0]
+
+
+@pytest.mark.parametrize("rule", [
+    {"type": "desconocida", "field": "pep_flag", "points": 1},
+    {"type": "flag", "field": "no_existe", "points": 1},
+    {"type": "flag", "field": "late_payments", "points": 1},
+    {"type": "per_unit", "field": "late_payments", "points": -1},
+    {"type": "flag", "field": "pep_flag", "points": "60"},
+])
+def test_compile_ruleset_rejects_invalid_rules(rule):
+    """
+    Prueba que las reglas mal definidas se rechazan al compilar.
+    """
+    with pytest.raises(RuleSetError):
+        compile_ruleset({"version": "x", "rules": [rule]})
+
+
+def test_reload_ruleset_changes_scores_and_version(client, tmp_path, restore_ruleset):
+    """
+    Prueba que recargar las reglas cambia el score y el ruleset_version de las nuevas solicitudes.
+    """
+    client.post("/auth/register", json={"email": "rules@example.com", "password": "password"})
+    token = client.post("/auth/login", data={"username": "rules@example.com", "password": "password"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    company_id = client.post("/companies/", headers=headers, json={"name": "Rules Co"}).json()["id"]
+    request_data = {"company_id": company_id, "risk_inputs": {"pep_flag": True, "late_payments": 7}}
+
+    before = client.post("/requests/", headers=headers, json=request_data).json()
+    assert before["risk_score"] == 90
+    assert before["ruleset_version"] == risk_service.get_ruleset().version
+
+    path = tmp_path / "ruleset.json"
+    path.write_text(json.dumps(CUSTOM_RULESET))
+    risk_service.reload_ruleset(path)
+
+    after = client.post("/requests/", headers=headers, json=request_data).json()
+    assert after["risk_score"] == 85
+    assert after["ruleset_version"] == "test-2"